@@ -0,0 +1,62 @@
+"""
+Benchmark linking author pages to their articles: scanning the metadata of
+every page as before, against linking from the 'author' references of the
+reference graph. The graph is filled while pages are added, so building it
+is timed separately as 'edges'.
+
+Pages are loaded from their metadata alone with `defer`.
+
+Usage::
+
+    python benchmarks/author_refs.py [articles] [repeat]
+"""
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.graph import ReferenceGraph
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+def scan(g):
+    for article in g.pages:
+        if 'author' in g.pages[article].meta:
+            for author in g.pages[article].meta['author']:
+                if author in g.pages:
+                    g.pages[author].refs += [g.pages[article], ]
+
+
+def edges(g):
+    g.graph = ReferenceGraph()
+    for page in g.pages.values():
+        for author in page.meta.get('author', []):
+            g.graph.add(page.slug, author, 'author')
+
+
+def graph(g):
+    g._add_refs()
+
+
+def main(articles=50000, repeat=3):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        mdg = MarkdownGenerator(Flask(__name__), search_path=path,
+                                defer=True)
+        mdg.load_pages()
+        authors = list(mdg.pages_iter(page_type='author'))
+        print("{:<8} {:>8} {:>10}".format("method", "pages", "seconds"))
+        methods = [('scan', scan), ('edges', edges), ('graph', graph)]
+        for label, fn in methods * repeat:
+            for author in authors:
+                author.refs = []
+            start = time.perf_counter()
+            fn(mdg)
+            print("{:<8} {:>8} {:>10.3f}".format(
+                label, len(mdg.pages), time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,87 @@
+"""
+Synthetic content corpus for the benchmarks.
+
+Generates a pages tree in the layout recommended by the README with a number
+of articles spread over authors and topics.
+"""
+import os
+import random
+
+
+ARTICLE = """type: article
+slug: article-{n}
+title: Article {n}
+description: Synthetic article number {n}
+topics: {topics}
+author: {author}
+publish: Fri, 16 Mar 2018 01:27:{s:02d} +0000
+
+## Article {n} ##
+
+{body}
+
+### Links ###
+
+Back to the [author]{{{{{author}}}}} or [this article]{{{{article-{n}}}}}.
+"""
+
+AUTHOR = """type: author
+slug: {author}
+title: Author {author}
+publish: Thu, 31 May 2018 03:46:13 +0000
+author-long: Author {author}
+
+# About {author} #
+
+Writes synthetic content.
+"""
+
+INDEX = """type: index
+slug: index
+title: Welcome
+publish: Thu, 31 May 2018 03:46:13 +0000
+
+## Welcome ##
+"""
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do "
+         "eiusmod tempor incididunt ut labore et dolore magna aliqua").split()
+
+
+def paragraph(rng, words=80):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def build(path, articles=1000, authors=20, topics=50, paragraphs=6, seed=0):
+    """
+    Write a synthetic pages tree
+
+    :param path: Directory to write the pages to
+    :type path: `str`
+
+    :param articles: Number of article pages
+    :type articles: `int`
+
+    :return: `str` path written to
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(path, 'authors'), exist_ok=True)
+    with open(os.path.join(path, 'index.md'), 'w') as f:
+        f.write(INDEX)
+    for a in range(authors):
+        with open(os.path.join(path, 'authors',
+                               'author-{}.md'.format(a)), 'w') as f:
+            f.write(AUTHOR.format(author='author-{}'.format(a)))
+    for n in range(articles):
+        group = os.path.join(path, 'articles', 'group-{}'.format(n % 100))
+        os.makedirs(group, exist_ok=True)
+        body = "\n\n".join(paragraph(rng) for _ in range(paragraphs))
+        page_topics = ",".join("topic {}".format(rng.randrange(topics))
+                               for _ in range(3))
+        with open(os.path.join(group, 'article-{}.md'.format(n)), 'w') as f:
+            f.write(ARTICLE.format(n=n,
+                                   s=n % 60,
+                                   topics=page_topics,
+                                   author='author-{}'.format(n % authors),
+                                   body=body))
+    return path
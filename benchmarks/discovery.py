@@ -0,0 +1,69 @@
+"""
+Benchmark finding page sources with
+:class:`flask_flatearth.discovery.SourceDiscovery` against the previous
+`os.walk` loop followed by an `os.stat` of each source for the manifest.
+
+The tree holds `files` sources spread over directories of 100 files, a
+tenth of them with other extensions, plus a '.git' directory of a tenth the
+size which is ignored by the scan.
+
+Usage::
+
+    python benchmarks/discovery.py [files] [repeat]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from flask_flatearth.discovery import SourceDiscovery
+
+
+def build_tree(path, files):
+    for n in range(files):
+        directory = os.path.join(path, 'section-{}'.format(n // 1000),
+                                 'part-{}'.format(n // 100))
+        if n % 100 == 0:
+            os.makedirs(directory)
+        ext = '.html' if n % 10 == 0 else '.md'
+        with open(os.path.join(directory, 'page-{}{}'.format(n, ext)),
+                  'w') as f:
+            f.write('slug: page-{}\n'.format(n))
+    objects = os.path.join(path, '.git', 'objects')
+    os.makedirs(objects)
+    for n in range(files // 10):
+        with open(os.path.join(objects, 'object-{}.md'.format(n)), 'w'):
+            pass
+
+
+def walk(path, file_ext='.md'):
+    page_files = []
+    for dirpath, dirnames, files in os.walk(path):
+        for name in files:
+            if name.lower().split('.')[-1] == file_ext \
+                    or name.lower().split('.')[-1] in file_ext:
+                page_files += [os.path.join(dirpath, name), ]
+    manifest = {}
+    for page in page_files:
+        st = os.stat(page)
+        manifest[page] = (st.st_mtime_ns, st.st_size)
+    return manifest
+
+
+def scan(path):
+    return SourceDiscovery(path).scan()
+
+
+def main(files=100000, repeat=5):
+    with tempfile.TemporaryDirectory() as path:
+        build_tree(path, files)
+        print("{:<8} {:>8} {:>10}".format("method", "sources", "seconds"))
+        for label, fn in [('os.walk', walk), ('scandir', scan)] * repeat:
+            start = time.perf_counter()
+            found = fn(path)
+            print("{:<8} {:>8} {:>10.3f}".format(
+                label, len(found), time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,70 @@
+"""
+Benchmark selecting the latest articles of the feeds: the site, author and
+topic feeds. Sorting the articles of every feed by 'publish' is timed against
+the bounded heaps kept by the FeedsExtension as pages are processed, and
+rendering the feed documents is timed separately as 'render'.
+
+Pages are loaded from their metadata alone with `defer`.
+
+Usage::
+
+    python benchmarks/feeds.py [articles] [repeat]
+"""
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.ext.feeds import FeedsExtension
+from flask_flatearth.ext.topics import TopicExtension, topic_slug
+from flask_flatearth.generators.markdown import MarkdownGenerator
+from flask_flatearth.util import sort_pages
+
+
+def sort(ext):
+    feeds = {}
+    for page in ext.g.pages_iter(page_type='article'):
+        names = ['all'] + ['authors/' + a for a in page.meta['author']]
+        names += ['topics/' + topic_slug(t) for t in page.meta['topics']]
+        for name in names:
+            feeds.setdefault(name, []).append(page)
+    return {name: sort_pages(feeds[name], 'publish', reverse=True)[:ext.size]
+            for name in feeds}
+
+
+def heap(ext):
+    ext._reset()
+    for page in ext.g.pages.values():
+        ext._process_page(page.meta, None, page.file_name)
+    return ext.heaps
+
+
+def render(ext):
+    ext._generated(ext.g.pages)
+    return ext.feeds
+
+
+def main(articles=50000, repeat=3):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        app = Flask(__name__)
+        app.config.update(SERVER_NAME='localhost')
+        mdg = MarkdownGenerator(app, search_path=path, defer=True)
+        TopicExtension(generator=mdg)
+        ext = FeedsExtension(generator=mdg)
+        mdg.load_pages()
+        print("{:<8} {:>8} {:>8} {:>10}".format("method", "pages", "feeds",
+                                                "seconds"))
+        methods = [('sort', sort), ('heap', heap), ('render', render)]
+        for label, fn in methods * repeat:
+            start = time.perf_counter()
+            feeds = fn(ext)
+            print("{:<8} {:>8} {:>8} {:>10.3f}".format(
+                label, len(mdg.pages), len(feeds),
+                time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,49 @@
+"""
+Benchmark ContentGenerator.freeze against fetching every page through the
+flask test client, as Frozen-Flask does.
+
+Usage::
+
+    python benchmarks/freeze.py [articles] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth import BASEPATH
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def main(articles=2000, workers=8):
+    with tempfile.TemporaryDirectory() as path:
+        build(os.path.join(path, 'pages'), articles=articles)
+        app = Flask(__name__, template_folder=TEMPLATES)
+        app.config.update(SERVER_NAME='localhost')
+        mdg = MarkdownGenerator(app, search_path=os.path.join(path, 'pages'))
+        mdg.generate()
+        urls = [u for p in mdg.generated_pages.values() for u in p.urls()]
+
+        client = app.test_client()
+        start = time.perf_counter()
+        for url in urls:
+            client.get(url).get_data()
+        print("{:<24} {:>8.3f}s for {} urls".format(
+            "test client", time.perf_counter() - start, len(urls)))
+
+        out = os.path.join(path, 'out')
+        for label in ["freeze", "freeze (unchanged)"]:
+            start = time.perf_counter()
+            stats = mdg.freeze(out, workers=workers, encodings=['gzip'])
+            print("{:<24} {:>8.3f}s {}".format(
+                label, time.perf_counter() - start, stats))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""
+Benchmark the cost of debug logging on MarkdownGenerator.generate.
+
+Generates the corpus once with the flask_flatearth loggers at WARNING, where
+debug messages are skipped before they are formatted, and once at DEBUG with
+the records discarded by a NullHandler, which measures what formatting every
+debug message costs. The levels are run alternately `repeat` times each, in
+a fresh process every time, and the best times are compared.
+
+Usage::
+
+    python benchmarks/logging_overhead.py [articles] [repeat]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth import BASEPATH
+from flask_flatearth.ext.topics import TopicExtension
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def run(path, level):
+    logger = logging.getLogger('flask_flatearth')
+    logger.setLevel(level)
+    app = Flask(__name__, template_folder=TEMPLATES)
+    app.config.update(SERVER_NAME='localhost')
+    start = time.perf_counter()
+    mdg = MarkdownGenerator(app, search_path=path)
+    TopicExtension(generator=mdg)
+    mdg.generate()
+    return time.perf_counter() - start, len(mdg.generated_pages)
+
+
+def main(articles=10000, repeat=2):
+    logger = logging.getLogger('flask_flatearth')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        print("{:>8} {:>8} {:>10}".format("level", "pages", "seconds"))
+        results = {}
+        for level in [logging.DEBUG, logging.WARNING] * repeat:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                elapsed, pages = pool.submit(run, path, level).result()
+            results[level] = min(elapsed, results.get(level, elapsed))
+            print("{:>8} {:>8} {:>10.3f}".format(
+                logging.getLevelName(level), pages, elapsed))
+        print("debug formatting costs {:.3f}s".format(
+            results[logging.DEBUG] - results[logging.WARNING]))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
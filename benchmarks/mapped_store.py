@@ -0,0 +1,88 @@
+"""
+Benchmark worker startup time and memory with each worker generating the
+site against serving the pages a master process published to a mapped
+store file.
+
+Each worker is a fresh process that starts the app, then requests every
+page. Private memory is the anonymous resident memory of the worker, and
+shared memory the resident pages of mapped files, which all workers share
+through the page cache.
+
+Usage::
+
+    python benchmarks/mapped_store.py [articles] [runs]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import flask
+
+from corpus import build
+from flask_flatearth import BASEPATH
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def create_app(path, store_map=None):
+    app = flask.Flask(__name__, template_folder=TEMPLATES)
+    app.config.update(SERVER_NAME='localhost')
+    if store_map:
+        app.config.update(FLATEARTH_STORE_MAP=store_map,
+                          FLATEARTH_LAZY=True,
+                          FLATEARTH_DEFER=True)
+    mdg = MarkdownGenerator(app, search_path=path)
+    mdg.generate()
+    return app, mdg
+
+
+def memory():
+    status = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            status[key] = value.strip()
+    return (int(status['RssAnon'].split()[0]) // 1024,
+            int(status['RssFile'].split()[0]) // 1024)
+
+
+def worker(path, store_map):
+    start = time.perf_counter()
+    app, mdg = create_app(path, store_map)
+    startup = time.perf_counter() - start
+    client = app.test_client()
+    for page in mdg.generated_pages.values():
+        client.get(page.urls()[0])
+    return startup, memory()
+
+
+def main(articles=2000, runs=2):
+    spawn = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        store_map = os.path.join(path, 'pages.store')
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            pool.submit(publish, path, store_map).result()
+        print("{:<10} {:>10} {:>12} {:>11}".format(
+            "worker", "startup s", "private MB", "shared MB"))
+        for label, mapped in [('generate', None), ('mapped', store_map)] \
+                * runs:
+            with ProcessPoolExecutor(max_workers=1,
+                                     mp_context=spawn) as pool:
+                startup, (private, shared) = pool.submit(
+                    worker, path, mapped).result()
+            print("{:<10} {:>10.2f} {:>12} {:>11}".format(
+                label, startup, private, shared))
+
+
+def publish(path, store_map):
+    app, mdg = create_app(path)
+    mdg.publish(store_map)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
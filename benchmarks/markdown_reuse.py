@@ -0,0 +1,63 @@
+"""
+Benchmark converting page sources with a new Markdown instance per file
+against the reused, reset instance of
+:func:`flask_flatearth.generators.markdown.converter`.
+
+The overhead column is the time to convert a one word document, which is
+about the per file cost independent of the content.
+
+Usage::
+
+    python benchmarks/markdown_reuse.py [articles] [paragraphs]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from markdown import Markdown
+
+from corpus import build
+from flask_flatearth.generators.markdown import EXTENSIONS, OUTPUT_FORMAT
+from flask_flatearth.generators.markdown import UrlForExtension, converter
+
+
+def fresh(text):
+    md = Markdown(extensions=[UrlForExtension() if e == 'urlfor' else e
+                              for e in EXTENSIONS],
+                  output_format=OUTPUT_FORMAT)
+    return md.convert(text), md.Meta
+
+
+def reused(text):
+    md = converter()
+    return md.convert(text), md.Meta
+
+
+def main(articles=2000, paragraphs=3):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles, paragraphs=paragraphs)
+        texts = []
+        for dirpath, dirnames, files in os.walk(path):
+            for name in files:
+                with open(os.path.join(dirpath, name), 'rb') as f:
+                    texts.append(f.read().decode('utf-8'))
+    print("{:>8} {:>8} {:>10} {:>12} {:>12}".format(
+        "method", "files", "seconds", "us per file", "us overhead"))
+    results = {}
+    for label, convert in [('fresh', fresh), ('reused', reused)] * 2:
+        start = time.perf_counter()
+        results[label] = [convert(t) for t in texts]
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for t in texts:
+            convert('x')
+        overhead = time.perf_counter() - start
+        print("{:>8} {:>8} {:>10.3f} {:>12.1f} {:>12.1f}".format(
+            label, len(texts), elapsed, elapsed / len(texts) * 1e6,
+            overhead / len(texts) * 1e6))
+    assert results['fresh'] == results['reused']
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
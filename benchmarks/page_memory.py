@@ -0,0 +1,82 @@
+"""
+Benchmark the memory held by the page records of a deferred load: the
+ContentPage objects with their metadata and references, and everything
+`load_pages()` allocates.
+
+Records are sized by walking each page, its metadata and references, and
+counting every object once, so that values shared between pages are only
+counted for the first page holding them. Content is deferred so the HTML of
+the pages is left out.
+
+Usage::
+
+    python benchmarks/page_memory.py [articles]
+"""
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+def sizeof(obj, seen):
+    """
+    Size of `obj` and the containers and strings it holds, skipping the
+    objects in `seen`
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += sizeof(k, seen) + sizeof(v, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += sizeof(v, seen)
+    return size
+
+
+def record_size(page, seen):
+    size = sys.getsizeof(page)
+    attrs = getattr(page, '__dict__', None)
+    if attrs is not None:
+        size += sizeof(attrs, seen)
+        values = list(attrs.values())
+    else:
+        values = [getattr(page, s) for c in type(page).__mro__
+                  for s in getattr(c, '__slots__', ()) if hasattr(page, s)]
+    for value in values:
+        if isinstance(value, (str, dict, list, tuple, set)):
+            size += sizeof(value, seen)
+    return size
+
+
+def main(articles=20000):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles, paragraphs=1)
+        mdg = MarkdownGenerator(Flask(__name__), search_path=path,
+                                defer=True)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        mdg.load_pages()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        loaded = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+        seen = set(id(p) for p in mdg.pages.values())
+        records = sum(record_size(p, seen) for p in mdg.pages.values())
+        pages = len(mdg.pages)
+        print("{:>8} {:>14} {:>14}".format("pages", "record B/page",
+                                           "loaded B/page"))
+        print("{:>8} {:>14.0f} {:>14.0f}".format(pages, records / pages,
+                                                 loaded / pages))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,45 @@
+"""
+Benchmark MarkdownGenerator.load_pages wall clock time against the number of
+worker processes.
+
+Usage::
+
+    python benchmarks/parallel_load.py [articles] [max workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+def run(path, workers):
+    app = Flask(__name__)
+    app.config.update(FLATEARTH_WORKERS=workers)
+    mdg = MarkdownGenerator(app, search_path=path)
+    start = time.perf_counter()
+    mdg.load_pages()
+    return time.perf_counter() - start, len(mdg.pages)
+
+
+def main(articles=2000, max_workers=os.cpu_count()):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        base = None
+        print("{:>8} {:>8} {:>10} {:>8}".format("workers", "pages",
+                                                "seconds", "speedup"))
+        workers = 1
+        while workers <= max_workers:
+            elapsed, pages = run(path, workers)
+            base = base or elapsed
+            print("{:>8} {:>8} {:>10.3f} {:>7.2f}x".format(
+                workers, pages, elapsed, base / elapsed))
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
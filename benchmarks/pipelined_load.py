@@ -0,0 +1,47 @@
+"""
+Benchmark MarkdownGenerator.load_pages on slow storage with and without
+reader threads.
+
+Slow storage is simulated by sleeping `latency` milliseconds before each
+source is read, as a network file system round trip would.
+
+Usage::
+
+    python benchmarks/pipelined_load.py [articles] [latency ms] [readers]
+"""
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.generators import markdown
+
+
+def run(path, readers):
+    app = Flask(__name__)
+    app.config.update(FLATEARTH_READERS=readers)
+    mdg = markdown.MarkdownGenerator(app, search_path=path)
+    start = time.perf_counter()
+    mdg.load_pages()
+    return time.perf_counter() - start, len(mdg.pages)
+
+
+def main(articles=2000, latency=2, readers=8):
+    read_source = markdown.read_source
+
+    def slow_read(file_name):
+        time.sleep(latency / 1000.0)
+        return read_source(file_name)
+    markdown.read_source = slow_read
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        print("{:>8} {:>8} {:>10}".format("readers", "pages", "seconds"))
+        for n in [0, readers, 0, readers]:
+            elapsed, pages = run(path, n)
+            print("{:>8} {:>8} {:>10.3f}".format(n, pages, elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,48 @@
+"""
+Benchmark the 'flatearth_render' template filter on converted articles:
+rendering the content as a Jinja2 template against substituting the
+`url_for` placeholders with ContentGenerator.render_content.
+
+Usage::
+
+    python benchmarks/render_content.py [articles] [repeat]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import flask
+
+from corpus import build
+from flask_flatearth import BASEPATH
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def main(articles=1000, repeat=3):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        app = flask.Flask(__name__, template_folder=TEMPLATES)
+        app.config.update(SERVER_NAME='localhost')
+        mdg = MarkdownGenerator(app, search_path=path)
+        mdg.generate()
+        contents = [p.html for p in mdg.pages_iter(page_type='article')]
+        print("{:<24} {:>8} {:>12}".format("filter", "pages", "us per page"))
+        with app.app_context():
+            for _ in range(repeat):
+                for label, fn in [('render_template_string',
+                                   flask.render_template_string),
+                                  ('render_content', mdg.render_content)]:
+                    start = time.perf_counter()
+                    for content in contents:
+                        fn(content)
+                    elapsed = time.perf_counter() - start
+                    print("{:<24} {:>8} {:>12.1f}".format(
+                        label, len(contents),
+                        elapsed / len(contents) * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
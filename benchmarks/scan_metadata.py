@@ -0,0 +1,33 @@
+"""
+Benchmark ContentGenerator.scan_metadata against load_pages, which converts
+every source.
+
+Usage::
+
+    python benchmarks/scan_metadata.py [articles]
+"""
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from corpus import build
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+
+def main(articles=50000):
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        app = Flask(__name__)
+        print("{:<14} {:>8} {:>10}".format("pass", "files", "seconds"))
+        for label in ['scan_metadata', 'load_pages']:
+            mdg = MarkdownGenerator(app, search_path=path)
+            start = time.perf_counter()
+            getattr(mdg, label)()
+            print("{:<14} {:>8} {:>10.3f}".format(
+                label, len(mdg.page_files), time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,55 @@
+"""
+Benchmark writing the sitemap of a large site: building the whole document
+and compressing it, against streaming the entries into gzip compressed
+sitemap files of 50k URLs with `write_sitemaps()`.
+
+Peak memory is measured with tracemalloc in a second run, beyond the page
+URLs and dates.
+
+Usage::
+
+    python benchmarks/sitemap.py [urls]
+"""
+import datetime
+import gzip
+import sys
+import time
+import tracemalloc
+
+from flask_flatearth.ext.sitemap import sitemap_entry, write_sitemaps
+
+
+def document(entries):
+    body = ''.join(sitemap_entry('url', loc, lastmod).decode('utf-8')
+                   for loc, lastmod in entries)
+    data = ('<?xml version="1.0" encoding="UTF-8"?>\n<urlset>\n' + body +
+            '</urlset>\n').encode('utf-8')
+    return [gzip.compress(data, mtime=0)]
+
+
+def streamed(entries):
+    return [f.encoded['gzip'] for f in write_sitemaps(iter(entries))]
+
+
+def main(urls=200000):
+    start = datetime.datetime(2018, 3, 16, tzinfo=datetime.timezone.utc)
+    entries = [('https://example.com/articles/article-{}/'.format(n),
+                start + datetime.timedelta(minutes=n))
+               for n in range(urls)]
+    print("{:<10} {:>8} {:>6} {:>10} {:>10} {:>10}".format(
+        "method", "urls", "files", "seconds", "peak MB", "gzip MB"))
+    for label, fn in [('document', document), ('streamed', streamed)]:
+        begin = time.perf_counter()
+        files = fn(entries)
+        seconds = time.perf_counter() - begin
+        tracemalloc.start()
+        fn(entries)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("{:<10} {:>8} {:>6} {:>10.3f} {:>10.1f} {:>10.1f}".format(
+            label, urls, len(files), seconds, peak / 2 ** 20,
+            sum(len(f) for f in files) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
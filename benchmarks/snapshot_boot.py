@@ -0,0 +1,91 @@
+"""
+Benchmark worker boot time from a snapshot against generating the site
+over a mapped store file published by a master process.
+
+The master process generates the site once, then publishes the store file
+and writes the snapshot. Each worker is a fresh process that starts the app
+and serves one article to check the boot. Snapshots are loaded with all of
+their state, or with `defer` to only read the page URLs.
+
+Boot time is split between creating the app and generator, and generating
+the site, which searches the content directory, or loading the snapshot.
+
+Usage::
+
+    python benchmarks/snapshot_boot.py [articles] [runs]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import flask
+
+from corpus import build
+from flask_flatearth import BASEPATH
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def create_app(path, store_map=None, defer=False):
+    app = flask.Flask(__name__, template_folder=TEMPLATES)
+    app.config.update(SERVER_NAME='localhost', FLATEARTH_DEFER=defer)
+    if store_map:
+        app.config.update(FLATEARTH_STORE_MAP=store_map,
+                          FLATEARTH_LAZY=True,
+                          FLATEARTH_DEFER=True)
+    return app, MarkdownGenerator(app, search_path=path)
+
+
+def master(path, store_map, snapshot):
+    app, mdg = create_app(path)
+    mdg.generate()
+    mdg.publish(store_map)
+    start = time.perf_counter()
+    mdg.snapshot(snapshot)
+    return time.perf_counter() - start, os.path.getsize(snapshot)
+
+
+def worker(path, store_map, snapshot, defer=False):
+    start = time.perf_counter()
+    app, mdg = create_app(path, store_map, defer)
+    init = time.perf_counter() - start
+    start = time.perf_counter()
+    if snapshot:
+        mdg.load_snapshot(snapshot)
+    else:
+        mdg.generate()
+    load = time.perf_counter() - start
+    status = app.test_client().get('/articles/article-0/').status_code
+    return init, load, status
+
+
+def main(articles=50000, runs=2):
+    spawn = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as path:
+        build(path, articles=articles)
+        store_map = os.path.join(path, 'pages.store')
+        snapshot = os.path.join(path, 'site.snapshot')
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            seconds, size = pool.submit(master, path, store_map,
+                                        snapshot).result()
+        print("snapshot written in {:.2f}s, {:.1f} MB".format(
+            seconds, size / 2 ** 20))
+        print("{:<10} {:>8} {:>8} {:>8}".format("worker", "init s", "load s",
+                                                "status"))
+        for label, args in [('mapped', (store_map, None)),
+                            ('snapshot', (None, snapshot)),
+                            ('deferred', (None, snapshot, True))] * runs:
+            with ProcessPoolExecutor(max_workers=1,
+                                     mp_context=spawn) as pool:
+                init, load, status = pool.submit(worker, path,
+                                                 *args).result()
+            print("{:<10} {:>8.3f} {:>8.3f} {:>8}".format(label, init, load,
+                                                         status))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,46 @@
+"""
+Benchmark the template compile time of a new process with and without the
+Jinja2 bytecode cache set up by 'FLATEARTH_TEMPLATE_CACHE_DIR'.
+
+Each run is a fresh process, as a new server worker would be. The first run
+with the cache directory fills it.
+
+Usage::
+
+    python benchmarks/template_warmup.py [runs]
+"""
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask
+
+from flask_flatearth import BASEPATH
+from flask_flatearth.generators.markdown import MarkdownGenerator
+
+PAGES = os.path.join(BASEPATH, 'examples', 'pages')
+TEMPLATES = os.path.join(BASEPATH, 'examples', 'template')
+
+
+def run(cache_dir):
+    app = Flask(__name__, template_folder=TEMPLATES)
+    if cache_dir:
+        app.config.update(FLATEARTH_TEMPLATE_CACHE_DIR=cache_dir)
+    mdg = MarkdownGenerator(app, search_path=PAGES)
+    loaded = mdg.warm_templates(os.listdir(TEMPLATES))
+    return len(loaded), mdg.metrics.phases['compile_templates']['seconds']
+
+
+def main(runs=5):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print("{:<10} {:>10} {:>10}".format("cache", "templates", "ms"))
+        for label, path in [('none', None), ('bytecode', cache_dir)] * runs:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                loaded, seconds = pool.submit(run, path).result()
+            print("{:<10} {:>10} {:>10.2f}".format(label, loaded,
+                                                  seconds * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -1,19 +1,49 @@
+import contextvars
 import logging
 import os
+import re
+import sys
+import threading
+from functools import partial
+from urllib.parse import quote
 
 import flask
+from markupsafe import escape
+from jinja2 import FileSystemBytecodeCache, TemplateNotFound
+from jinja2 import meta as jinja_meta
 
+from .discovery import SourceDiscovery, changed_sources
+from .graph import ReferenceGraph
+from .metrics import Metrics
+from .response import PreparedPage
+from .routing import add_late_rules
+from .store import MappedPageStore, PageStore, store_from_config, \
+    write_store
+from .util import last_modified, sort_pages
+
+
+__version__ = '0.1'
 
 log = logging.getLogger('flask_flatearth')
 
 
 BASEPATH = os.getcwd()
 
+URLFOR_PLACEHOLDER = "{{{{url_for('{slug}')}}}}"
+URLFOR_RE = re.compile(r"\{\{url_for\('([\w_-]+)'\)\}\}")
+
 
 class ContentPage(object):
     """
     Content page interface object
 
+    Pages are kept compact with `__slots__`. Subclasses adding attributes
+    should declare their own `__slots__`, as a subclass without them gets a
+    per-instance `__dict__` again.
+
+    Pages are pickled with the `TRANSIENT` attributes reset, and with the
+    pages they reference.
+
     :var CONTENT_TYPE: Default ContentPage type
     :type CONTENT_TYPE: `str`
 
@@ -23,6 +53,10 @@ class ContentPage(object):
     :var RULES: Default rules to register page to
     :type RULES: `list` of `str`
 
+    :var TRANSIENT: Attributes pickled with a reset value, such as the app,
+                    the view state and the HTML content
+    :type TRANSIENT: `dict` of {<attribute `str`>: <value>}
+
     .. note::
         The RULES can be specified with '{slug}' and other named specifiers.
         Only '{slug}' is guaranteed however and if the keyword arguments are
@@ -59,12 +93,27 @@ class ContentPage(object):
     :type views_set: `bool`
 
     :ivar refs: References to other objects for iterating in templates
-    :type refs: `list`
+    :type refs: `tuple`
+
+    :ivar rendered_bytes: Size of the last rendered content
+    :type rendered_bytes: `int`
+
+    :ivar loader: Returns the HTML content of a page whose conversion was
+                  deferred, called when the page is first rendered
+    :type loader: `callable`
     """
     CONTENT_TYPE = "page"
     TEMPLATE = "base.html"
     RULES = ['/{slug}/', ]
 
+    __slots__ = ('_app', 'slug', 'meta', 'rules', 'content_type', 'template',
+                 'html', 'file_name', 'rules_set', 'views_set', 'refs',
+                 '_store', '_params', '_encodings', '_prepared',
+                 'rendered_bytes', 'loader')
+    TRANSIENT = {'_app': None, 'html': None, '_store': None,
+                 '_params': None, '_encodings': (), '_prepared': None,
+                 'loader': None, 'views_set': False}
+
     def __init__(self,
                  app=None,
                  slug=None,
@@ -117,7 +166,13 @@ class ContentPage(object):
         self.file_name = file_name
         self.rules_set = False
         self.views_set = False
-        self.refs = []
+        self.refs = ()
+        self._store = None
+        self._params = None
+        self._encodings = ()
+        self._prepared = None
+        self.rendered_bytes = None
+        self.loader = None
 
     @property
     def app(self):
@@ -142,16 +197,50 @@ class ContentPage(object):
         `register_view()`.
         :param kwargs: Keyword args to be passed to `rule.format(**kwargs)`
         """
-        for rule in self.rules:
-            r = rule.format(slug=self.slug, **kwargs)
+        for r in self.urls(**kwargs):
             with self.app.app_context():
                 self.app.add_url_rule(r, endpoint=self.slug)
         self.rules_set = True
         return self
 
-    def register_view(self, **kwargs):
+    def register_late_rules(self, **kwargs):
+        """
+        Add rules to an app that may already be serving requests
+
+        .. see::
+            :func:`flask_flatearth.routing.add_late_rules`
+        :param kwargs: Keyword args to be passed to `rule.format(**kwargs)`
+        """
+        add_late_rules(self.app, self.urls(**kwargs), self.slug)
+        self.rules_set = True
+        return self
+
+    def register_view(self, store=None, lazy=False, encodings=(), keep=False,
+                      **kwargs):
         """
         Set view functions
+
+        Without a `store`, the template is rendered here and the view serves
+        the prepared page. With a `store`, the view looks the prepared page up
+        in the store and renders the page again if the store does not hold it.
+
+        Views answer conditional requests from the page ETag and the
+        `last_modified()` date.
+
+        :param store: Store for the rendered pages
+        :type store: :class:`flask_flatearth.store.PageStore`
+
+        :param lazy: Defer rendering to the first request. Requires a `store`.
+        :type lazy: `bool`
+
+        :param encodings: Content encodings to precompress pages with
+        :type encodings: `list` of `str`
+
+        :param keep: With `lazy`, keep a page the store already holds, such
+                     as a page published to a mapped store by another
+                     process. Otherwise the held page is discarded.
+        :type keep: `bool`
+
         :param kwargs: Parameters to be passed into view generation
         """
         if not self.rules_set:
@@ -159,16 +248,131 @@ class ContentPage(object):
                   "register_rules() for {}".format(self.slug)
             raise RuntimeError(msg)
         params = self.page_content(**kwargs)
-        with self.app.app_context():
-            content = flask.render_template(self.template, **params)
+        self._store = store
+        self._params = params if store is not None else None
+        self._encodings = encodings
+        self._prepared = None
+        if store is None:
+            self._prepared = self.prepare(self.render(**params), encodings)
+        elif lazy:
+            if not keep:
+                store.discard(self.slug)
+        else:
+            store.put(self.slug,
+                      self.prepare(self.render(**params), encodings))
 
-        def view_fn(content):
-            return lambda: content
+        def view_fn(page):
+            return lambda: page.prepared().response()
 
-        self.app.view_functions[self.slug] = view_fn(content)
+        self.app.view_functions[self.slug] = view_fn(self)
         self.views_set = True
         return self
 
+    def adopt_view(self, page):
+        """
+        Take over the view registered by another page for the same slug
+
+        Used when a page is regenerated without changes to its content, so
+        that `prepared()` serves what the existing view serves.
+
+        :param page: Page with the registered view
+        :type page: `ContentPage`
+        """
+        self._store = page._store
+        self._params = page._params
+        self._encodings = page._encodings
+        self._prepared = page._prepared
+        self.views_set = page.views_set
+        return self
+
+    def prepare(self, content, encodings=()):
+        """
+        Prepare rendered content for serving
+
+        :param content: Rendered content
+        :type content: `str`
+
+        :param encodings: Content encodings to precompress with
+        :type encodings: `list` of `str`
+
+        :return: :class:`flask_flatearth.response.PreparedPage`
+        """
+        prepared = PreparedPage.prepare(content,
+                                        last_modified=self.last_modified(),
+                                        encodings=encodings)
+        self.rendered_bytes = len(prepared.body)
+        return prepared
+
+    def last_modified(self):
+        """
+        Last modification of the page content
+
+        Pages listing other pages through `refs` change whenever a listed
+        page is added, removed or edited, which no date of the metadata
+        tells, so they have none and are validated by their ETag only.
+
+        :return: :class:`datetime.datetime` or `None`
+        """
+        if self.refs:
+            return None
+        return last_modified(self.meta)
+
+    def prepared(self):
+        """
+        Prepared page served by the view
+
+        Pages dropped by the store are rendered again.
+
+        :raise RuntimeError: if `register_view()` was not called first
+
+        :return: :class:`flask_flatearth.response.PreparedPage`
+        """
+        if not self.views_set:
+            msg = "Attempting to prepare {} before calling " \
+                  "register_view()".format(self.slug)
+            raise RuntimeError(msg)
+        if self._store is None:
+            return self._prepared
+        prepared = self._store.get(self.slug)
+        if prepared is None:
+            prepared = self.prepare(self.render(**self._params),
+                                    self._encodings)
+            self._store.put(self.slug, prepared)
+        return prepared
+
+    def render(self, **params):
+        """
+        Render the page template
+
+        Rendering runs in an empty context, so a page rendered while handling
+        a request is the same as one rendered by `generate()`.
+
+        Pages with a `loader` and no `html` are converted here, and their
+        content is passed to the template as 'page_content'.
+
+        :param params: Template context
+        :return: `str` rendered content
+        """
+        if 'page_content' in params and params['page_content'] is None \
+                and self.loader is not None:
+            if self.html is None:
+                self.html = self.loader()
+            params['page_content'] = self.html
+        app = self.app
+        if app is flask.current_app:
+            # The proxy does not resolve in the empty context
+            app = app._get_current_object()
+        return contextvars.Context().run(self._render, app, params)
+
+    def urls(self, **kwargs):
+        """
+        URLs of the page rules
+
+        :param kwargs: Keyword args to be passed to `rule.format(**kwargs)`
+        :return: `list` of `str`
+        """
+        return [rule.format(slug=self.slug, **kwargs) for rule in self.rules]
+
     def __repr__(self):
         msg = "{cls}({app}, '{slug}', content_type='{content}')".format(
             cls=self.__class__.__name__,
@@ -188,23 +392,88 @@ class ContentPage(object):
     def __eq__(self, other):
         return hash(self) == hash(other)
 
+    def __getstate__(self):
+        slots = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name in self.TRANSIENT:
+                    slots[name] = self.TRANSIENT[name]
+                elif hasattr(self, name):
+                    slots[name] = getattr(self, name)
+        return getattr(self, '__dict__', None), slots
+
     def __hash__(self):
         return hash(self.slug)
 
+    def _render(self, app, params):
+        with app.app_context():
+            return flask.render_template(self.template, **params)
+
 
 class ContentListingPage(ContentPage):
     """
     Content Listing interface objects
+
+    Listings generated by a :class:`ListingPageGenerator` hold the window of
+    pages they list. Templates receive it as `pages` along with a
+    `pagination` dictionary holding the listing page `number`, the `count`
+    of listing pages and the `previous` and `next` listing page slugs.
+
+    :var PAGE_RULE: Rule suffix of the listing pages after the first
+    :type PAGE_RULE: `str`
+
+    :ivar number: Listing page number, starting at 1
+    :type number: `int`
+
+    :ivar listed: Pages listed by this page, or `None` to list all pages of
+                  the content type
+    :type listed: `list` of `ContentPage`
+
+    :ivar pagination: Listing page position
+    :type pagination: `dict`
     """
     CONTENT_TYPE = "page"
     SLUG = "pages"
     TEMPLATE = "pages.html"
     RULES = ['/pages/', ]
+    PAGE_RULE = 'page/{number}/'
+
+    __slots__ = ('number', 'listed', 'pagination')
+
+    def __init__(self, number=1, listed=None, pagination=None, **kwargs):
+        """
+        Initialize the ContentListingPage
+
+        :param number: Listing page number
+        :type number: `int`
+
+        :param listed: Pages listed by this page
+        :type listed: `list` of `ContentPage`
+
+        :param pagination: Listing page position
+        :type pagination: `dict`
+
+        :param kwargs: Arguments for :class:`ContentPage`
+        """
+        super(ContentListingPage, self).__init__(**kwargs)
+        self.number = number
+        self.listed = listed
+        self.pagination = pagination if pagination else {
+            'number': 1, 'count': 1, 'previous': None, 'next': None}
+
+    def last_modified(self):
+        return None
 
     def page_content(self, **kwargs):
-        pages = kwargs['generator'].pages_iter(page_type=self.CONTENT_TYPE)
+        if self.listed is None:
+            pages = list(
+                kwargs['generator'].pages_iter(page_type=self.CONTENT_TYPE))
+        else:
+            pages = self.listed
         slug = kwargs.get('slug', self.SLUG)
-        kwargs.update({'pages': pages, 'slug': slug})
+        kwargs.update({'pages': pages,
+                       'slug': slug,
+                       'pagination': self.pagination})
         return kwargs
 
 
@@ -226,24 +495,27 @@ class PageGenerator(object):
     PAGE_CLS = ContentPage
 
     def __init__(self, g, ext=None, **kwargs):
-        msg = "Initializing PageGenerator {obj} with " \
-              "{d}".format(obj=self.__class__.__name__,
-                           d={'g': g, 'ext': ext, **kwargs})
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Initializing PageGenerator {obj} with " \
+                  "{d}".format(obj=self.__class__.__name__,
+                               d={'g': g, 'ext': ext, **kwargs})
+            log.debug(msg)
         self.g = g
         self.ext = ext
         self.opts = {p: kwargs[p] for p in kwargs if p not in ['g', 'ext']}
-        msg = "PageGenerator {cls} processing options " \
-              "{data}".format(cls=self.__class__.__name__,
-                              data=self.opts)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "PageGenerator {cls} processing options " \
+                  "{data}".format(cls=self.__class__.__name__,
+                                  data=self.opts)
+            log.debug(msg)
         self._process_options(**self.opts)
 
     def __call__(self, **kwargs):
-        msg = "PageGenerator {obj} generating page with " \
-              "{data}".format(obj=self,
-                              data=kwargs)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "PageGenerator {obj} generating page with " \
+                  "{data}".format(obj=self,
+                                  data=kwargs)
+            log.debug(msg)
         return self._generate(**kwargs)
 
     def __repr__(self):
@@ -294,6 +566,69 @@ class PageGenerator(object):
         pass
 
 
+class ListingPageGenerator(PageGenerator):
+    """
+    Listing PageGenerator
+
+    Generates the listing pages for the pages of the `PAGE_CLS` content type.
+    With a `page_size` set on the ContentGenerator, the listing is split into
+    windows of that size. The first window is served by the listing `RULES`
+    and the following ones by the rules with the `PAGE_RULE` suffix, such as
+    '/articles/page/2/'. With a `sort_key`, the pages are listed in the
+    sorted order kept by :meth:`ContentGenerator.pages_sorted`.
+    """
+    PAGE_CLS = ContentListingPage
+
+    def _generate(self, **kwargs):
+        listing = self._listing()
+        size = self.g.page_size
+        count = max(1, -(-len(listing) // size)) if size else 1
+        slug = kwargs.get('slug', self.PAGE_CLS.SLUG)
+        slugs = [slug] + ["{s}-page-{n}".format(s=slug, n=n)
+                          for n in range(2, count + 1)]
+        rules = kwargs.get('rules', self.PAGE_CLS.RULES)
+        pages = {}
+        for n in range(1, count + 1):
+            opts = {kw: kwargs[kw] for kw in ["app",
+                                              "meta",
+                                              "content_type",
+                                              "template",
+                                              "html",
+                                              "file_name"] if kw in kwargs}
+            if n > 1:
+                suffix = self.PAGE_CLS.PAGE_RULE.format(number=n)
+                opts['rules'] = [r.rstrip('/') + '/' + suffix for r in rules]
+            elif 'rules' in kwargs:
+                opts['rules'] = rules
+            window = listing[(n - 1) * size:n * size] if size else listing
+            pagination = {'number': n,
+                          'count': count,
+                          'previous': slugs[n - 2] if n > 1 else None,
+                          'next': slugs[n] if n < count else None}
+            page = self.PAGE_CLS(slug=slugs[n - 1],
+                                 number=n,
+                                 listed=window,
+                                 pagination=pagination,
+                                 **opts)
+            for member in window:
+                self.g.graph.add(page.slug, member.slug, 'set')
+            pages[page.slug] = page
+        return pages
+
+    def _listing(self):
+        """
+        Pages to list
+
+        :return: `list` of `ContentPage`
+        """
+        page_type = self.PAGE_CLS.CONTENT_TYPE
+        if self.g.sort_key:
+            return self.g.pages_sorted(page_type,
+                                       self.g.sort_key,
+                                       self.g.sort_reverse)
+        return list(self.g.pages_iter(page_type=page_type))
+
+
 class MetaProcessor(object):
     """
     MetaProcessor callable object
@@ -304,23 +639,25 @@ class MetaProcessor(object):
     argument of data.
 
     :param data: Data to process
-    :type data: `list`
+    :type data: `tuple` of `str`
 
     :return: Any value to be assigned into page metadata
     """
     def __init__(self, g, ext=None):
-        msg = "Initializing MetaProcessor {obj} with " \
-              "{d}".format(obj=self.__class__.__name__,
-                           d={'generator': g, 'extension': ext})
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Initializing MetaProcessor {obj} with " \
+                  "{d}".format(obj=self.__class__.__name__,
+                               d={'generator': g, 'extension': ext})
+            log.debug(msg)
         self.g = g
         self.ext = ext
 
     def __call__(self, data):
-        msg = "MetaProcessor {obj} processing data " \
-              "{data}".format(obj=self,
-                              data=data)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "MetaProcessor {obj} processing data " \
+                  "{data}".format(obj=self,
+                                  data=data)
+            log.debug(msg)
         return self._process(data)
 
     def __repr__(self):
@@ -370,6 +707,11 @@ class ContentGenerator(object):
     be set will raise a RuntimeError until `init_app()` is called explicitly.
     This includes the main `generate()` method.
 
+    :var INTERN: Metadata labels whose values repeat across pages, such as
+                 page types and author slugs. Their values are interned and
+                 their value tuples shared between pages.
+    :type INTERN: `list` of `str`
+
     :ivar app: Flask application (default `None`)
     :type app: :class:`flask.Flask`
 
@@ -380,6 +722,13 @@ class ContentGenerator(object):
     :ivar file_ext: File extension of content page sources
     :type file_ext: `str` or `list` of `str`
 
+    :ivar ignore: Shell style patterns of file and directory names to skip
+                  when searching for page sources
+    :type ignore: `list` of `str`
+
+    :ivar discovery: Finds the page sources below `search_path`
+    :type discovery: :class:`flask_flatearth.discovery.SourceDiscovery`
+
     :ivar generators: Additional page generators
     :type generators: `dict` of {<name `str`>: \
             :class:<generator `PageGenerator`>}
@@ -395,21 +744,122 @@ class ContentGenerator(object):
     :type pages: `dict` of {<slug `str`>: :class:<page \
             `ContentPage`>}
 
-    :ivar page_files: Content file names
+    :ivar page_files: Content file names, found below `search_path` when
+                      first needed
     :type page_files: `list` of <file names `str`>
 
     :ivar set_generators: Page set generators
     :type set_generators: `dict` of {<lable `str`: \
             :class:<generator `PageGenerator`>}
+
+    :ivar workers: Number of worker processes used to load page sources
+    :type workers: `int`
+
+    :ivar readers: Number of threads reading page sources ahead of their
+                   conversion, or 0 to read each source when converting it
+    :type readers: `int`
+
+    :ivar queue_depth: Maximum number of sources pending in each stage of
+                       loading
+    :type queue_depth: `int`
+
+    :ivar cache: Conversion cache for page sources (default `None`)
+    :type cache: :class:`flask_flatearth.cache.ConversionCache`
+
+    :ivar sources: Converted sources by file name
+    :type sources: `dict` of {<file name `str`>: (<html `str`>, \
+            <meta `dict`>)}
+
+    :ivar manifest: Stat of each source when it was converted
+    :type manifest: `dict` of {<file name `str`>: (<mtime `int`>, \
+            <size `int`>)}
+
+    :ivar generated_pages: All pages registered with the flask app by
+                           `generate()`, including extension and set pages
+    :type generated_pages: `dict` of {<slug `str`>: :class:<page \
+            `ContentPage`>}
+
+    :ivar urls: Escaped URL by page slug and whether it was resolved in a
+                request context, for the `url_for` placeholders of page
+                content
+    :type urls: `dict` of {(<slug `str`>, <request `bool`>): `str`}
+
+    :ivar paths: Page slug by URL for the pages loaded by `load_snapshot()`
+    :type paths: `dict` of {<url `str`>: <slug `str`>}
+
+    :ivar graph: References between pages, such as from articles to their
+                 authors, filled as pages are processed
+    :type graph: :class:`flask_flatearth.graph.ReferenceGraph`
+
+    :ivar type_index: Slugs of `pages` by page type, in insertion order
+    :type type_index: `dict` of {<type `str`>: `list` of <slug `str`>}
+
+    :ivar lock: Lock held while the pages are regenerated
+    :type lock: :class:`threading.RLock`
+
+    :ivar store: Store for rendered pages. Without a store, each view holds
+                 its rendered page.
+    :type store: :class:`flask_flatearth.store.PageStore`
+
+    :ivar lazy: Render pages on their first request instead of in
+                `generate()`. Pages are always rendered lazily with a
+                :class:`flask_flatearth.store.MappedPageStore`.
+    :type lazy: `bool`
+
+    :ivar encodings: Content encodings to precompress pages with
+    :type encodings: `list` of `str`
+
+    :ivar page_size: Number of pages per listing page, or `None` to list all
+                     pages on one listing page
+    :type page_size: `int`
+
+    :ivar sort_key: Metadata label to sort listings by, such as 'publish',
+                    'sequence' or 'title'. Listings keep the source order if
+                    `None`.
+    :type sort_key: `str`
+
+    :ivar sort_reverse: Sort listings descending
+    :type sort_reverse: `bool`
+
+    :ivar metrics: Timings and sizes recorded while generating pages
+    :type metrics: :class:`flask_flatearth.metrics.Metrics`
+
+    :ivar defer: Load pages from their metadata alone and convert each source
+                 when its page is first rendered. Snapshots loaded by
+                 `load_snapshot()` restore their state when first needed.
+    :type defer: `bool`
     """
     SEARCH_PATH = os.path.abspath(os.path.join(BASEPATH, "pages"))
     FILE_EXT = '.md'
+    IGNORE = SourceDiscovery.IGNORE
+    WORKERS = 1
+    READERS = 0
+    QUEUE_DEPTH = 64
+    LAZY = False
+    ENCODINGS = []
+    PAGE_SIZE = None
+    SORT_KEY = None
+    SORT_REVERSE = False
+    DEFER = False
+    INTERN = ['type', 'author', 'set']
 
     def __init__(self,
                  app=None,
                  extensions=[],
                  search_path=None,
-                 file_ext=None):
+                 file_ext=None,
+                 ignore=None,
+                 workers=None,
+                 readers=None,
+                 queue_depth=None,
+                 cache=None,
+                 store=None,
+                 lazy=None,
+                 encodings=None,
+                 page_size=None,
+                 sort_key=None,
+                 sort_reverse=None,
+                 defer=None):
         """
         Initialize ContentGenerator
 
@@ -425,16 +875,83 @@ class ContentGenerator(object):
 
         :param file_ext: Pages file extension(s)
         :type file_ext: `str` or `list`
+
+        :param ignore: File and directory name patterns to skip
+        :type ignore: `list` of `str`
+
+        :param workers: Worker processes for loading pages. Values greater
+                        than 1 enable parallel loading.
+        :type workers: `int`
+
+        :param readers: Threads reading sources ahead of their conversion
+        :type readers: `int`
+
+        :param queue_depth: Maximum number of sources pending in each stage
+                            of loading
+        :type queue_depth: `int`
+
+        :param cache: Conversion cache for page sources
+        :type cache: :class:`flask_flatearth.cache.ConversionCache`
+
+        :param store: Store for rendered pages
+        :type store: :class:`flask_flatearth.store.PageStore`
+
+        :param lazy: Render pages on their first request
+        :type lazy: `bool`
+
+        :param encodings: Content encodings to precompress pages with, out of
+                          'gzip' and 'br'
+        :type encodings: `list` of `str`
+
+        :param page_size: Number of pages per listing page
+        :type page_size: `int`
+
+        :param sort_key: Metadata label to sort listings by
+        :type sort_key: `str`
+
+        :param sort_reverse: Sort listings descending
+        :type sort_reverse: `bool`
+
+        :param defer: Defer the conversion of sources to rendering
+        :type defer: `bool`
         """
         self._app = app
         self.search_path = search_path if search_path else self.SEARCH_PATH
         self.file_ext = file_ext if file_ext else self.FILE_EXT
-        self.page_files = []
+        self.ignore = ignore if ignore is not None else self.IGNORE
+        self.workers = workers if workers else self.WORKERS
+        self.readers = readers if readers is not None else self.READERS
+        self.queue_depth = queue_depth if queue_depth else self.QUEUE_DEPTH
+        self.cache = cache
+        self.store = store
+        self.lazy = lazy if lazy is not None else self.LAZY
+        self.encodings = encodings if encodings else self.ENCODINGS
+        self.page_size = page_size if page_size else self.PAGE_SIZE
+        self.sort_key = sort_key if sort_key else self.SORT_KEY
+        self.sort_reverse = sort_reverse if sort_reverse is not None \
+            else self.SORT_REVERSE
+        self.defer = defer if defer is not None else self.DEFER
+        self._page_files = None
+        self.discovery = None
         self.meta_processors = {}
         self.generators = {}
         self.set_generators = {}
         self.extensions = {}
         self.pages = {}
+        self.type_index = {}
+        self._sorted = {}
+        self.graph = ReferenceGraph()
+        self._interned = {}
+        self._ctx = None
+        self.sources = {}
+        self.manifest = {}
+        self.generated_pages = {}
+        self.paths = {}
+        self._slug_urls = {}
+        self._snapshot = None
+        self.urls = {}
+        self.lock = threading.RLock()
+        self.metrics = Metrics()
         if app is not None:
             self.init_app(app)
         if extensions:
@@ -449,11 +966,6 @@ class ContentGenerator(object):
                 msg = "{ext} not able to be registered. Is it a valid \
                         extension instance?".format(ext=ext)
                 log.error(msg)
-        for dirpath, dirnames, files in os.walk(self.search_path):
-            for name in files:
-                if name.lower().split('.')[-1] == self.file_ext \
-                        or name.lower().split('.')[-1] in self.file_ext:
-                    self.page_files += [os.path.join(dirpath, name), ]
         self._setup()
 
     def add_meta_processor(self, label, processor):
@@ -508,6 +1020,21 @@ class ContentGenerator(object):
         else:
             self.set_generators.update({name: generator})
 
+    def add_pages(self, pages):
+        """
+        Add pages and index them by type
+
+        :param pages: Pages to add
+        :type pages: `dict` of {<slug `str`>: :class:<page `ContentPage`>}
+        """
+        for slug in pages:
+            if slug in self.pages:
+                self._unindex_page(self.pages[slug])
+            self.pages[slug] = pages[slug]
+            page_type = pages[slug].meta['type']
+            self.type_index.setdefault(page_type, []).append(slug)
+            self._sorted.pop(page_type, None)
+
     def add_extension(self, extension):
         """
         Register an extension with this ContentGenerator
@@ -527,6 +1054,17 @@ class ContentGenerator(object):
         else:
             return flask.current_app
 
+    @property
+    def page_files(self):
+        # Sources are not walked when booting from a snapshot
+        if self._page_files is None:
+            self._page_files = self._discover()
+        return self._page_files
+
+    @page_files.setter
+    def page_files(self, page_files):
+        self._page_files = page_files
+
     def generate(self):
         """
         Generate content for flask application
@@ -544,49 +1082,300 @@ class ContentGenerator(object):
             flask application. The behavior is undefined and subject to the
             <flask app `flask.Flask`> url_map behavior with duplicate entries
             or behavior of duplicate :func:`flask.Flask.add_url_rule` calls.
+            Use `regenerate()` to update the pages after content changes.
         """
+        if self.lazy and self.store is None:
+            self.store = PageStore()
         self.load_pages()
-        msg = "ContentGenerator {g} has pages {p}".format(g=self, p=self.pages)
-        log.debug(msg)
-        pages = {**self.pages}
-        for e in self.extensions:
-            gen_pages = self.extensions[e]()
-            for p in gen_pages:
-                if p in pages:
-                    msg = "Page {p} already present. Attempted duplicate by " \
-                        "{e}".format(p=p, g=self.extensions[e])
-                    raise RuntimeError(msg)
-            pages.update(gen_pages)
-        for g in self.set_generators:
-            pg = self.set_generators
-            gen_pages = pg[g](app=self.app,
-                              slug=pg[g].PAGE_CLS.SLUG,
-                              generator=self)
-            for p in gen_pages:
-                if p in pages:
-                    msg = "Page {p} already present. Attempted duplicate by " \
-                        "{e}".format(p=p, g=self.set_generators[g])
-                    raise RuntimeError(msg)
-            pages.update(gen_pages)
-        msg = "ContentGenerator {g} has pages {p}".format(g=self, p=pages)
-        log.debug(msg)
-        ctx = {}
-        ctx.update({'authors': {a.slug: a for a in
-                                self.pages_iter(page_type='author')}})
-        ctx.update({'articles': {a.slug: a for a in
-                                 self.pages_iter(page_type='article')}})
-        ctx.update({'generator': self})
-        for ext in self.extensions:
-            ctx.update(self.extensions[ext].generate_context())
+        pages, ctx = self._generate_pages()
+        if self._app is not None or flask.has_app_context():
+            self.warm_templates(set(pages[p].template for p in pages))
         for p in pages:
-            pages[p].register_rules()
+            with self.metrics.timer('register_rules', page=p):
+                pages[p].register_rules()
+        self.urls = {}
         for p in pages:
-            pages[p].register_view(
-                page_content=pages[p].html,
-                meta=pages[p].meta,
-                refs=pages[p].refs,
-                **ctx
-            )
+            self._register_view(pages[p], ctx, keep=True)
+        self.generated_pages = pages
+        self._generated()
+
+    def regenerate(self, changed_paths=None):
+        """
+        Update the generated content after source changes
+
+        Only sources whose stat differs from the `manifest` are converted
+        again. The pages are then rebuilt from the converted `sources`, and
+        views are rendered again only for pages that are affected by the
+        changes: pages from changed sources, pages referencing or referenced
+        by them through `refs`, pages whose `refs` changed and listing pages.
+        Existing url rules are reused, new pages have their rules added and
+        views of removed pages respond with 404.
+
+        Changed sources that cannot be added as pages, such as empty or
+        partly saved files without a type or slug, are logged and skipped.
+        Their previous pages are kept until they change again.
+
+        :param changed_paths: Source paths to check. All sources found under
+                              `search_path` are checked if `None`.
+        :type changed_paths: `list` of `str`
+
+        :raise RuntimeError: if `generate()` was not called first
+
+        :return: `set` of slugs with updated views
+        """
+        with self.lock:
+            self._restore_snapshot()
+            return self._regenerate(changed_paths)
+
+    def watch(self, interval=None, debounce=None, app=None):
+        """
+        Watch `search_path` and regenerate pages as sources change
+
+        :param interval: Seconds between checks for changes when polling
+        :type interval: `float`
+
+        :param debounce: Seconds without further changes before regenerating
+        :type debounce: `float`
+
+        :param app: Flask app to regenerate pages in, by default the app of
+                    the ContentGenerator or the current app
+        :type app: :class:`flask.Flask`
+
+        :return: The started :class:`flask_flatearth.watch.ContentWatcher`
+        """
+        from .watch import ContentWatcher
+        return ContentWatcher(self,
+                              interval=interval,
+                              debounce=debounce,
+                              app=app).start()
+
+    def freeze(self, output_dir, workers=None, encodings=()):
+        """
+        Write the generated pages to `output_dir` as static files
+
+        .. see:: :class:`flask_flatearth.freeze.ContentFreezer`
+
+        :param output_dir: Directory to write to
+        :type output_dir: `str`
+
+        :param workers: Number of writer threads
+        :type workers: `int`
+
+        :param encodings: Encodings to also write '.gz' and '.br' files for
+        :type encodings: `list` of `str`
+
+        :return: `dict` of counters
+        """
+        from .freeze import ContentFreezer
+        self._restore_snapshot()
+        return ContentFreezer(self,
+                              output_dir,
+                              workers=workers,
+                              encodings=encodings).freeze()
+
+    def publish(self, path):
+        """
+        Write the generated pages to a store file
+
+        The store file is served by a
+        :class:`flask_flatearth.store.MappedPageStore`, set up for the
+        'FLATEARTH_STORE_MAP' configuration. A master process can generate the
+        pages once and publish them for worker processes, which then serve
+        the published pages without rendering them. Lazy pages are rendered
+        as they are written.
+
+        :param path: Store file name
+        :type path: `str`
+
+        :raise RuntimeError: if called before `generate()`
+
+        :return: `int` number of pages written
+        """
+        self._restore_snapshot()
+        if not self.generated_pages:
+            msg = "Attempting to publish {g} before calling " \
+                  "generate()".format(g=self)
+            raise RuntimeError(msg)
+        pages = self.generated_pages
+        written = write_store(path, ((p, self.prepared(pages[p]))
+                                     for p in pages))
+        msg = "ContentGenerator {g} published {n} pages to {p}".format(
+            g=self, n=written, p=path)
+        log.info(msg)
+        return written
+
+    def snapshot(self, path):
+        """
+        Write the generated content to a snapshot file
+
+        The snapshot holds the rendered pages, the page URLs, and the
+        generated pages with their metadata and references, the reference
+        `graph` and the source `manifest`. Worker processes boot from it with
+        `load_snapshot()` instead of `generate()`. Lazy pages are rendered as
+        they are written.
+
+        :param path: Snapshot file name
+        :type path: `str`
+
+        :raise RuntimeError: if called before `generate()`
+
+        :return: `int` number of pages written
+        """
+        from .snapshot import write_snapshot
+        self._restore_snapshot()
+        if not self.generated_pages:
+            msg = "Attempting to snapshot {g} before calling " \
+                  "generate()".format(g=self)
+            raise RuntimeError(msg)
+        pages = self.generated_pages
+        paths = {}
+        slug_urls = {}
+        for p in pages:
+            for url in pages[p].urls():
+                paths.setdefault(url, p)
+                slug_urls.setdefault(p, url)
+        boot = {'paths': paths, 'slug_urls': slug_urls}
+        state = {'pages': pages,
+                 'source_pages': self.pages,
+                 'type_index': self.type_index,
+                 'graph': self.graph,
+                 'page_files': self.page_files,
+                 'manifest': self.manifest,
+                 'sources': {p: (None, self.sources[p][1])
+                             for p in self.sources}}
+        written = write_snapshot(path, boot, state,
+                                 ((p, self.prepared(pages[p]))
+                                  for p in pages))
+        msg = "ContentGenerator {g} wrote snapshot of {n} pages to " \
+              "{p}".format(g=self, n=written, p=path)
+        log.info(msg)
+        return written
+
+    def load_snapshot(self, path):
+        """
+        Serve the content of a snapshot file written by `snapshot()`
+
+        This replaces `generate()`. No source is read and no template is
+        rendered: pages are served from the snapshot file, which is mapped
+        as the `store`. Rather than a url rule for each page, a single rule
+        serves the page URLs of the snapshot, and `flask.url_for()` builds
+        them for the page slugs. `regenerate()` may be used afterwards, and
+        adds url rules for new pages.
+
+        With `defer`, only the page URLs are read, and the generated pages,
+        `graph` and `sources` are restored when first needed, such as by
+        `pages_iter()`, `regenerate()` or `freeze()`. Until then `pages` and
+        `generated_pages` are empty, and extensions are given the generated
+        pages once they are restored. Requests for URLs that are not page
+        URLs restore them, so the url rules extensions add are served.
+
+        The snapshot is unpickled, so it must come from a trusted location.
+
+        :param path: Snapshot file name
+        :type path: `str`
+
+        :raise RuntimeError: if `generate()` or `load_snapshot()` were called
+                             first, or the file is not a snapshot
+
+        :return: `int` number of pages loaded
+        """
+        from .snapshot import read_snapshot
+        if self.generated_pages or self.paths:
+            msg = "Attempting to load snapshot {p} after generating " \
+                  "{g}".format(p=path, g=self)
+            raise RuntimeError(msg)
+        with self.metrics.timer('load_snapshot'):
+            boot, self.store = read_snapshot(path)
+        self._clear_pages()
+        self.paths = boot['paths']
+        self._slug_urls = boot['slug_urls']
+        self.urls = {}
+        self._snapshot = path
+        self._register_paths()
+        if not self.defer:
+            self._restore_snapshot()
+        msg = "ContentGenerator {g} loaded snapshot of {n} pages from " \
+              "{p}".format(g=self, n=len(self._slug_urls), p=path)
+        log.info(msg)
+        return len(self._slug_urls)
+
+    def prepared(self, page):
+        """
+        Prepared page served by the view of a generated page
+
+        Pages loaded by `load_snapshot()` have their view registered first
+        if they were not requested yet.
+
+        :param page: Generated page
+        :type page: `ContentPage`
+
+        :return: :class:`flask_flatearth.response.PreparedPage`
+        """
+        if not page.views_set and page.slug in self._slug_urls:
+            self._register_path_view(page)
+        return page.prepared()
+
+    def metrics_response(self):
+        """
+        Serve the recorded metrics in the Prometheus text format
+
+        Mounted on the flask app at 'FLATEARTH_METRICS_URL' when configured.
+        The `metrics` are also available as a `dict` and a JSON report
+        through :meth:`flask_flatearth.metrics.Metrics.as_dict` and
+        :meth:`flask_flatearth.metrics.Metrics.to_json`.
+
+        :return: :class:`flask.Response`
+        """
+        return flask.Response(self.metrics.prometheus(),
+                              mimetype='text/plain; version=0.0.4')
+
+    def warm_templates(self, names):
+        """
+        Load and compile templates ahead of rendering
+
+        The templates they extend, include or import are loaded as well, so
+        the first render of each page does not pay for compiling them. These
+        are found by parsing the source of templates the bytecode cache does
+        not hold. Templates it holds are loaded without being parsed, leaving
+        their references to be loaded from the cache when rendering. The
+        time spent is recorded in the 'compile_templates' metrics phase.
+        Templates that cannot be found are skipped, leaving the error to the
+        render of the page using them.
+
+        :param names: Template names
+        :type names: `list` of `str`
+
+        :return: `list` of the template names loaded
+        """
+        env = self.app.jinja_env
+        pending = sorted(names)
+        loaded = []
+        while pending:
+            name = pending.pop(0)
+            if name in loaded:
+                continue
+            refs = ()
+            try:
+                source, file_name, uptodate = env.loader.get_source(env, name)
+                with self.metrics.timer('compile_templates', template=name):
+                    bcc = env.bytecode_cache
+                    if bcc is None or bcc.get_bucket(
+                            env, name, file_name, source).code is None:
+                        refs = jinja_meta.find_referenced_templates(
+                            env.parse(source, name, file_name))
+                    env.get_template(name)
+            except TemplateNotFound:
+                msg = "Template {t} not found to load before " \
+                      "rendering".format(t=name)
+                log.warning(msg)
+                continue
+            loaded.append(name)
+            pending.extend(r for r in refs if r is not None)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "ContentGenerator {g} loaded templates {t}".format(
+                g=self, t=loaded)
+            log.debug(msg)
+        return loaded
 
     def get_page(self, slug):
         """
@@ -604,7 +1393,26 @@ class ContentGenerator(object):
 
         :return: :class:`meth`
         """
-        return flask.render_template_string
+        return self.render_content
+
+    def render_content(self, source):
+        """
+        Resolve the `url_for` placeholders of converted page content
+
+        Placeholders written by the Markdown `urlfor` extension are
+        substituted with the URL of their page, which is looked up once per
+        slug after the rules are registered. Content holding any other Jinja2
+        syntax is rendered with :func:`flask.render_template_string` instead.
+
+        :param source: Converted page content
+        :type source: `str`
+
+        :return: `str`
+        """
+        resolved = URLFOR_RE.sub(self._url_for, source)
+        if '{{' in resolved or '{%' in resolved or '{#' in resolved:
+            return flask.render_template_string(source)
+        return resolved
 
     def init_app(self, app):
         """
@@ -612,18 +1420,157 @@ class ContentGenerator(object):
 
         .. note::
             This registers a template filter 'flatearth_render' which by
-            default returns :func:`flask.render_template_string`
+            default is :meth:`render_content`
+
+        .. note::
+            If 'FLATEARTH_CACHE_DIR' is configured and no cache was passed in,
+            a :class:`flask_flatearth.cache.ConversionCache` is created for
+            that directory. Likewise a page store for rendered pages is
+            created by :func:`flask_flatearth.store.store_from_config`.
+
+        .. note::
+            If 'FLATEARTH_TEMPLATE_CACHE_DIR' is configured and the app Jinja2
+            environment has no bytecode cache, a
+            :class:`jinja2.FileSystemBytecodeCache` is set up for that
+            directory, so compiled templates are shared between processes.
         """
         self.search_path = app.config.get('FLATEARTH_SEARCH_PATH',
                                           self.search_path)
         self.file_ext = app.config.get('FLATEARTH_FILE_EXT',
                                        self.file_ext)
+        self.ignore = app.config.get('FLATEARTH_IGNORE', self.ignore)
+        self.workers = int(app.config.get('FLATEARTH_WORKERS',
+                                          self.workers))
+        self.readers = int(app.config.get('FLATEARTH_READERS',
+                                          self.readers))
+        self.queue_depth = int(app.config.get('FLATEARTH_QUEUE_DEPTH',
+                                              self.queue_depth))
+        cache_dir = app.config.get('FLATEARTH_CACHE_DIR')
+        if self.cache is None and cache_dir:
+            from .cache import ConversionCache
+            self.cache = ConversionCache(
+                cache_dir,
+                max_bytes=app.config.get('FLATEARTH_CACHE_MAX_BYTES'))
+        template_cache_dir = app.config.get('FLATEARTH_TEMPLATE_CACHE_DIR')
+        if template_cache_dir and app.jinja_env.bytecode_cache is None:
+            os.makedirs(template_cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+                template_cache_dir)
+        self.lazy = bool(app.config.get('FLATEARTH_LAZY', self.lazy))
+        self.encodings = app.config.get('FLATEARTH_ENCODINGS',
+                                        self.encodings)
+        if self.store is None:
+            self.store = store_from_config(app.config)
+        metrics_url = app.config.get('FLATEARTH_METRICS_URL')
+        if metrics_url:
+            app.add_url_rule(metrics_url,
+                             endpoint='flatearth_metrics',
+                             view_func=self.metrics_response)
+        page_size = app.config.get('FLATEARTH_PAGE_SIZE', self.page_size)
+        self.page_size = int(page_size) if page_size else None
+        self.sort_key = app.config.get('FLATEARTH_SORT_KEY', self.sort_key)
+        self.sort_reverse = bool(app.config.get('FLATEARTH_SORT_REVERSE',
+                                                self.sort_reverse))
+        self.defer = bool(app.config.get('FLATEARTH_DEFER', self.defer))
         app.add_template_filter(self.get_renderer(),
                                 name='flatearth_render')
 
-    def load_pages(self):
+    def convert_pages(self, page_files):
+        """
+        Convert page sources
+
+        Implemented by generators to read and convert each source.
+
+        :param page_files: Source file names to convert
+        :type page_files: `list` of `str`
+
+        :return: Iterator of (<file name `str`>, <html `str`>, <meta `dict`>)
+                 in the order of `page_files`
+        """
         raise NotImplementedError
 
+    def convert_source(self, file_name):
+        """
+        Convert a single page source
+
+        :param file_name: Source file name
+        :type file_name: `str`
+
+        :return: `tuple` of (<html `str`>, <meta `dict`>)
+        """
+        for page, html, meta in self.convert_pages([file_name, ]):
+            return html, meta
+
+    def scan_pages(self, page_files):
+        """
+        Read the metadata of page sources without converting them
+
+        Implemented by generators to read only the metadata header of each
+        source.
+
+        :param page_files: Source file names to scan
+        :type page_files: `list` of `str`
+
+        :return: Iterator of (<file name `str`>, <meta `dict`>) in the order
+                 of `page_files`
+        """
+        raise NotImplementedError
+
+    def scan_metadata(self):
+        """
+        Read and process the metadata of all `page_files`
+
+        Only the metadata header of each source is read, so this is much
+        faster than `load_pages()` for passes that do not need the content.
+
+        :raise KeyError: on duplicate page slug
+
+        :return: `dict` of {<file name `str`>: <meta `dict`>}
+        """
+        metadata = {}
+        slugs = set()
+        for page, md_meta in self.scan_pages(self.page_files):
+            meta = self._process_meta(self._compact_meta(md_meta))
+            if meta.get('type') in self.generators:
+                if meta['slug'] in slugs:
+                    msg = "page slug {} already added to " \
+                          "pages".format(meta['slug'])
+                    raise KeyError(msg)
+                slugs.add(meta['slug'])
+            metadata[page] = meta
+        return metadata
+
+    def load_pages(self):
+        """
+        Convert all `page_files` and load them into pages
+
+        With `defer`, only the metadata of the sources is read, and each
+        source is converted when its page is first rendered.
+
+        Each source is added as its conversion arrives, in the order of
+        `page_files`, while the following sources are still being read and
+        converted.
+
+        Entries of the conversion `cache` beyond its size are pruned once all
+        sources are loaded.
+
+        :raise KeyError: on duplicate page slug
+        """
+        page_files = self.page_files
+        found = self.discovery.manifest if self.discovery else {}
+        for page in page_files:
+            stat = found.get(page)
+            self.manifest[page] = stat if stat else self._stat(page)
+        for page, html, meta in self._load_sources(page_files):
+            self.sources[page] = (html, meta)
+            self._add_source(page)
+        self._add_refs()
+        if self.cache is not None:
+            self.cache.prune()
+            msg = "Conversion cache {c} stats {s}".format(
+                c=self.cache, s=self.cache.stats())
+            log.info(msg)
+
     def pages_iter(self, page_type='page'):
         """
         Iterator for Pages
@@ -639,41 +1586,473 @@ class ContentGenerator(object):
         :type page_type: `str`
         :return: `ContentPage` of `page_type`
         """
-        for page in [p for p in self.pages if
-                     self.pages[p].meta['type'] == page_type]:
+        if self._snapshot is not None:
+            self._restore_snapshot()
+        for page in self.type_index.get(page_type, []):
             yield self.pages[page]
 
+    def pages_sorted(self, page_type='page', key='publish', reverse=False):
+        """
+        Pages of `page_type` sorted by a metadata label
+
+        The sort is computed once per type and label until pages of that type
+        are added. Pages missing the label come last, in insertion order.
+
+        :param page_type: The page type
+        :type page_type: `str`
+
+        :param key: Metadata label to sort by, such as 'publish', 'sequence'
+                    or 'title'
+        :type key: `str`
+
+        :param reverse: Sort descending
+        :type reverse: `bool`
+
+        :return: `list` of `ContentPage`
+        """
+        views = self._sorted.setdefault(page_type, {})
+        if (key, reverse) not in views:
+            views[(key, reverse)] = sort_pages(
+                self.pages_iter(page_type=page_type), key, reverse)
+        return views[(key, reverse)]
+
+    def _add_sources(self):
+        """
+        Add pages for the converted `sources`
+
+        :raise KeyError: on duplicate page slug
+        """
+        for page in self.page_files:
+            self._add_source(page)
+        self._add_refs()
+
+    def _add_source(self, page):
+        """
+        Add the page of a converted source
+
+        :param page: Source file name
+        :type page: `str`
+
+        :raise KeyError: on duplicate page slug
+        """
+        html, md_meta = self.sources[page]
+        with self.metrics.timer('meta', source=page):
+            meta = self._process_meta(md_meta)
+        if meta['type'] in self.generators:
+            if meta['slug'] in self.pages:
+                msg = "page slug {} already added to " \
+                      "pages".format(meta['slug'])
+                raise KeyError(msg)
+            else:
+                with self.metrics.timer('process_page', source=page):
+                    self._process_page(meta=meta,
+                                       html=html,
+                                       file_name=page)
+                self.add_pages(self.generators[meta['type']](
+                        app=self.app,
+                        slug=meta['slug'],
+                        meta=meta,
+                        html=html,
+                        file_name=page
+                ))
+                for author in meta.get('author', []):
+                    self.graph.add(meta['slug'], author, 'author')
+                if html is None:
+                    self.pages[meta['slug']].loader = partial(
+                        self._load_html, page)
+
+    def _add_refs(self):
+        """
+        Link the added pages to their authors from the 'author' references
+        of the `graph`
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Generated pages {p}".format(p=self.pages)
+            log.debug(msg)
+        for author in self.graph.referenced('author'):
+            articles = self.graph.sources(author, 'author')
+            if author in self.pages:
+                self.pages[author].refs = tuple(self.pages[a]
+                                                for a in articles)
+            else:
+                for article in articles:
+                    msg = "No existing author {author} for " \
+                          "{article}".format(author=author,
+                                             article=article)
+                    log.warn(msg)
+
+    def _clear_pages(self):
+        self.pages = {}
+        self.type_index = {}
+        self._sorted = {}
+        self._interned = {}
+        self._ctx = None
+        self.graph.clear()
+
+    def _changed_files(self, paths=None):
+        """
+        Compare sources against the manifest
+
+        :param paths: Source paths to check, or `None` for all sources
+        :type paths: `list` of `str`
+
+        :return: `tuple` of (<changed or added `list`>, <removed `list`>)
+        """
+        if paths is None:
+            self._discover()
+            return changed_sources(self.manifest, self.discovery.manifest)
+        known = {os.path.abspath(p): p for p in self.page_files}
+        changed = []
+        removed = []
+        for path in paths:
+            page = known.get(os.path.abspath(path), path)
+            if not os.path.isfile(page):
+                if page in self.manifest:
+                    removed.append(page)
+            elif self._source_discovery().includes(page) \
+                    and self.manifest.get(page) != self._stat(page):
+                changed.append(page)
+        return sorted(changed), sorted(removed)
+
+    def _discover(self):
+        """
+        Find the page sources below `search_path`
+
+        The stat of each source found is kept in the `discovery` manifest.
+
+        :return: `list` of file names
+        """
+        self.discovery = None
+        discovery = self._source_discovery()
+        with self.metrics.timer('walk'):
+            return list(discovery.scan())
+
+    def _source_discovery(self):
+        """
+        Source discovery of `search_path`, created when first needed
+
+        :return: :class:`flask_flatearth.discovery.SourceDiscovery`
+        """
+        if self.discovery is None:
+            self.discovery = SourceDiscovery(self.search_path,
+                                             file_ext=self.file_ext,
+                                             ignore=self.ignore)
+        return self.discovery
+
+    def _generate_pages(self):
+        """
+        Collect pages from the extensions and set generators
+
+        :raise RuntimeError: on duplicate page slug
+
+        :return: `tuple` of (<pages `dict`>, <template context `dict`>)
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "ContentGenerator {g} has pages {p}".format(g=self,
+                                                              p=self.pages)
+            log.debug(msg)
+        pages = {**self.pages}
+        for e in self.extensions:
+            gen_pages = self.extensions[e]()
+            for p in gen_pages:
+                if p in pages:
+                    msg = "Page {p} already present. Attempted duplicate by " \
+                        "{e}".format(p=p, e=self.extensions[e])
+                    raise RuntimeError(msg)
+            pages.update(gen_pages)
+        for g in self.set_generators:
+            pg = self.set_generators
+            gen_pages = pg[g](app=self.app,
+                              slug=pg[g].PAGE_CLS.SLUG,
+                              generator=self)
+            for p in gen_pages:
+                if p in pages:
+                    msg = "Page {p} already present. Attempted duplicate by " \
+                        "{e}".format(p=p, e=self.set_generators[g])
+                    raise RuntimeError(msg)
+            pages.update(gen_pages)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "ContentGenerator {g} has pages {p}".format(g=self, p=pages)
+            log.debug(msg)
+        return pages, self._context()
+
+    def _context(self):
+        """
+        Template context of the pages
+
+        :return: `dict`
+        """
+        ctx = {}
+        ctx.update({'authors': {a.slug: a for a in
+                                self.pages_iter(page_type='author')}})
+        ctx.update({'articles': {a.slug: a for a in
+                                 self.pages_iter(page_type='article')}})
+        ctx.update({'generator': self})
+        ctx.update({'graph': self.graph})
+        for ext in self.extensions:
+            ctx.update(self.extensions[ext].generate_context())
+        return ctx
+
+    def _generated(self):
+        """
+        Pass the generated pages to the extensions
+        """
+        for ext in self.extensions:
+            self.extensions[ext].generated(self.generated_pages)
+
+    def _load_html(self, file_name):
+        """
+        Convert a source whose conversion was deferred
+
+        :param file_name: Source file name
+        :type file_name: `str`
+
+        :return: `str` html
+        """
+        with self.lock:
+            html, meta = self.sources.get(file_name, (None, None))
+            if html is None:
+                html, meta = self.convert_source(file_name)
+                meta = self._compact_meta(meta)
+                if file_name in self.sources:
+                    self.sources[file_name] = (html, meta)
+            return html
+
+    def _load_sources(self, page_files):
+        """
+        Convert page sources, or scan their metadata with `defer`
+
+        :return: Iterator of (<file name `str`>, <html `str` or `None`>,
+                 <meta `dict`>)
+        """
+        if not self.defer:
+            return ((page, html, self._compact_meta(meta)) for page, html, meta
+                    in self.convert_pages(page_files))
+        return ((page, None, self._compact_meta(meta)) for page, meta in
+                self.scan_pages(page_files))
+
+    def _matches(self, name):
+        """
+        Check if a file name is a page source
+
+        :param name: File name
+        :type name: `str`
+
+        :return: `bool`
+        """
+        return self._source_discovery().matches(name)
+
+    def _compact_meta(self, meta):
+        """
+        Compact metadata from a source
+
+        Labels are interned and values kept as tuples, shared between pages
+        for the `INTERN` labels.
+
+        :param meta: Metadata from source
+        :type meta: `dict` of {<label `str`>: `list` of <value `str`>}
+
+        :return: `dict` of {<label `str`>: `tuple` of <value `str`>}
+        """
+        return {sys.intern(label): self._intern(values)
+                if label in self.INTERN else tuple(values)
+                for label, values in meta.items()}
+
+    def _intern(self, value):
+        """
+        Intern a metadata value of an `INTERN` label
+
+        :param value: Metadata value
+        :type value: `str` or `tuple` of `str`
+
+        :return: The interned string, or the tuple shared by the pages with
+                 an equal value
+        """
+        if isinstance(value, str):
+            return sys.intern(value)
+        value = tuple(sys.intern(v) for v in value)
+        return self._interned.setdefault(value, value)
+
     def _process_meta(self, meta):
         """
         Prepare metadata dictionary
+
+        Labels are interned, and values of several entries are kept as
+        tuples. Values of the `INTERN` labels are interned as well.
+
         :param meta: Metadata from source
         :type meta: `dict`
         :return: `dict`
         """
-        msg = "Calling `_process_meta` for {m}".format(m=meta)
-        log.debug(msg)
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            msg = "Calling `_process_meta` for {m}".format(m=meta)
+            log.debug(msg)
         m = {}
         for label in meta:
             if label in self.meta_processors:
-                msg = "Found meta_processor for {lbl}.".format(lbl=label)
-                log.debug(msg)
-                m.update({label: self.meta_processors[label](meta[label])})
+                if debug:
+                    msg = "Found meta_processor for {lbl}.".format(lbl=label)
+                    log.debug(msg)
+                m.update({sys.intern(label):
+                          self.meta_processors[label](meta[label])})
             else:
-                msg = "No meta_processor found for {lbl}.".format(lbl=label)
-                log.debug(msg)
+                if debug:
+                    msg = "No meta_processor found for {lbl}.".format(
+                        lbl=label)
+                    log.debug(msg)
                 v = meta[label][0] if len(meta[label]) == 1 \
                     and label not in ['author'] \
-                    else meta[label]
-                m.update({label: v})
-        msg = "Returning `_process_meta` values '{v}' for '{m}'" \
-              "data.".format(v=m, m=meta)
-        log.debug(msg)
+                    else tuple(meta[label])
+                if label in self.INTERN:
+                    v = self._intern(v)
+                m.update({sys.intern(label): v})
+        if debug:
+            msg = "Returning `_process_meta` values '{v}' for '{m}'" \
+                  "data.".format(v=m, m=meta)
+            log.debug(msg)
         return m
 
     def _process_page(self, meta, html, file_name):
         for ext in self.extensions:
             self.extensions[ext]._process_page(meta, html, file_name)
 
+    def _regenerate(self, changed_paths):
+        if not self.generated_pages:
+            msg = "Attempting to regenerate {g} before calling " \
+                  "generate()".format(g=self)
+            raise RuntimeError(msg)
+        changed, removed = self._changed_files(changed_paths)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "ContentGenerator {g} regenerating for changed {c} and " \
+                  "removed {r}".format(g=self, c=changed, r=removed)
+            log.debug(msg)
+        stats = {page: self._stat(page) for page in changed}
+        slugs = {slug: self.pages[slug].file_name for slug in self.pages
+                 if self.pages[slug].file_name not in removed}
+        loaded = []
+        for page, html, meta in self._load_sources(changed):
+            error = self._source_error(page, meta, slugs)
+            if error is not None:
+                # Kept out of the manifest to be checked again
+                msg = "Skipping source {p}: {e}".format(p=page, e=error)
+                log.warning(msg)
+                continue
+            loaded.append((page, html, meta))
+        touched = set(removed)
+        for page in removed:
+            self.page_files.remove(page)
+            del self.sources[page]
+            del self.manifest[page]
+        for page, html, meta in loaded:
+            if page not in self.sources:
+                self.page_files.append(page)
+            self.manifest[page] = stats[page]
+            if html is None or self.sources.get(page) != (html, meta):
+                self.sources[page] = (html, meta)
+                touched.add(page)
+        if not touched:
+            return set()
+        old_pages = self.generated_pages
+        self._clear_pages()
+        for ext in self.extensions:
+            self.extensions[ext].reset()
+        self._add_sources()
+        pages, ctx = self._generate_pages()
+        dirty = set(p for p in old_pages if old_pages[p].file_name in touched)
+        dirty.update(p for p in pages if pages[p].file_name in touched)
+        for slug in list(dirty):
+            for page in (old_pages.get(slug), pages.get(slug)):
+                if page is not None:
+                    dirty.update(r.slug for r in page.refs)
+        updated = set()
+        for p in pages:
+            page = pages[p]
+            old = old_pages.get(p)
+            refs = [r.slug for r in page.refs]
+            if old is None or old.rules != page.rules:
+                with self.metrics.timer('register_rules', page=p):
+                    page.register_late_rules()
+            else:
+                page.rules_set = True
+            if old is None or p in dirty \
+                    or isinstance(page, ContentListingPage) \
+                    or refs != [r.slug for r in old.refs] \
+                    or dirty.intersection(refs):
+                updated.add(p)
+            else:
+                page.adopt_view(old)
+        self.urls = {}
+        for p in updated:
+            self._register_view(pages[p], ctx)
+        for p in old_pages:
+            if p not in pages:
+                self.app.view_functions[p] = _not_found
+                if self.store is not None:
+                    self.store.discard(p)
+                updated.add(p)
+        self.generated_pages = pages
+        self._generated()
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "ContentGenerator {g} regenerated views for {u}".format(
+                g=self, u=updated)
+            log.debug(msg)
+        return updated
+
+    def _source_error(self, page, meta, slugs):
+        """
+        Check that a converted source can be added as a page
+
+        Sources being saved may be empty or lack metadata, and are checked
+        before the pages are rebuilt so that they cannot leave the pages
+        half rebuilt.
+
+        :param page: Source file name
+        :type page: `str`
+
+        :param meta: Compacted metadata of the source
+        :type meta: `dict`
+
+        :param slugs: Slugs of the pages added so far, updated with the slug
+                      of the source
+        :type slugs: `dict` of {<slug `str`>: <file name `str`>}
+
+        :return: `str` reason the source cannot be added, or `None`
+        """
+        try:
+            meta = self._process_meta(meta)
+        except Exception as e:
+            return "invalid metadata: {e!r}".format(e=e)
+        if 'type' not in meta:
+            return "no type"
+        if meta['type'] not in self.generators:
+            return None
+        if 'slug' not in meta:
+            return "no slug"
+        other = slugs.setdefault(meta['slug'], page)
+        if other != page:
+            return "slug {s} already used by {o}".format(s=meta['slug'],
+                                                         o=other)
+        return None
+
+    def _register_view(self, page, ctx, keep=False):
+        # Pages published to a mapped store are served from it as they are
+        lazy = self.lazy or isinstance(self.store, MappedPageStore)
+        with self.metrics.timer('register_view', page=page.slug):
+            page.register_view(
+                store=self.store,
+                lazy=lazy,
+                encodings=self.encodings,
+                keep=keep,
+                page_content=page.html,
+                meta=page.meta,
+                refs=page.refs,
+                **ctx
+            )
+        self.metrics.record_page(page.slug,
+                                 source=page.file_name,
+                                 size=page.rendered_bytes)
+
     def _setup(self):
         """
         Setup ContentGenerator
@@ -682,6 +2061,130 @@ class ContentGenerator(object):
         """
         pass
 
+    def _unindex_page(self, page):
+        page_type = page.meta['type']
+        self.type_index[page_type].remove(page.slug)
+        self._sorted.pop(page_type, None)
+
+    def _register_paths(self):
+        """
+        Serve the URLs of `paths` with a single url rule
+
+        Page slugs are built by `flask.url_for()` from a url build error
+        handler, as they have no url rules of their own.
+        """
+        app = self.app
+        if '/' in self.paths:
+            app.add_url_rule('/', endpoint='flatearth_pages',
+                             defaults={'path': ''},
+                             view_func=self._serve_path)
+        app.add_url_rule('/<path:path>', endpoint='flatearth_pages',
+                         view_func=self._serve_path)
+        app.url_build_error_handlers.append(self._build_url)
+
+    def _serve_path(self, path):
+        url = '/' + path
+        slug = self.paths.get(url)
+        if slug is None:
+            if url + '/' in self.paths:
+                return flask.redirect(
+                    flask.request.script_root + url + '/', code=308)
+            if self._snapshot is not None:
+                # Extensions add their rules once the pages are restored
+                self._restore_snapshot()
+                adapter = self.app.create_url_adapter(flask.request)
+                rule, args = adapter.match(return_rule=True)
+                if rule.endpoint != 'flatearth_pages':
+                    return self.app.view_functions[rule.endpoint](**args)
+            flask.abort(404)
+        view = self.app.view_functions.get(slug)
+        if view is not None:
+            return view()
+        prepared = self.store.get(slug)
+        if prepared is not None:
+            return prepared.response()
+        self._restore_snapshot()
+        return self._register_path_view(self.generated_pages[slug])()
+
+    def _restore_snapshot(self):
+        """
+        Restore the state of a snapshot loaded with `defer`
+        """
+        from .snapshot import read_snapshot_state
+        if self._snapshot is None:
+            return
+        with self.lock:
+            if self._snapshot is None:
+                return
+            with self.metrics.timer('load_snapshot'):
+                state = read_snapshot_state(self._snapshot)
+            self.pages = state['source_pages']
+            self.type_index = state['type_index']
+            self.graph = state['graph']
+            self.page_files = state['page_files']
+            self.manifest = state['manifest']
+            self.sources = state['sources']
+            self.generated_pages = state['pages']
+            self._snapshot = None
+            self._generated()
+
+    def _register_path_view(self, page):
+        """
+        Register the view of a page loaded from a snapshot
+
+        :param page: Page served from the `store`
+        :type page: `ContentPage`
+
+        :return: `callable` view
+        """
+        with self.lock:
+            if self._ctx is None:
+                self._ctx = self._context()
+            if page._app is None:
+                page._app = self._app
+            if page.file_name in self.sources and page.loader is None:
+                page.loader = partial(self._load_html, page.file_name)
+            page.register_view(store=self.store,
+                               lazy=True,
+                               keep=True,
+                               page_content=page.html,
+                               meta=page.meta,
+                               refs=page.refs,
+                               **self._ctx)
+        return self.app.view_functions[page.slug]
+
+    def _build_url(self, error, endpoint, values):
+        url = self._slug_urls.get(endpoint)
+        if url is None or [v for v in values if not v.startswith('_')]:
+            return None
+        if values.get('_external'):
+            # Flask adds the server name, script root and scheme
+            url = self.app.url_for('flatearth_pages', path=url[1:],
+                                   _external=True,
+                                   _scheme=values.get('_scheme'))
+        elif flask.has_request_context():
+            url = flask.request.script_root + url
+        if values.get('_anchor'):
+            url += '#' + quote(values['_anchor'], safe="%!#$&'()*+,/:;=?@")
+        return url
+
+    def _url_for(self, match):
+        # url_for() builds external URLs outside of a request context
+        key = (match.group(1), flask.has_request_context())
+        url = self.urls.get(key)
+        if url is None:
+            url = str(escape(flask.url_for(key[0])))
+            self.urls[key] = url
+        return url
+
+    def _stat(self, file_name):
+        st = os.stat(file_name)
+        return st.st_mtime_ns, st.st_size
+
+
+def _not_found():
+    flask.abort(404)
+
 
 class IndexPage(ContentPage):
     """
@@ -690,7 +2193,7 @@ class IndexPage(ContentPage):
     CONTENT_TYPE = "index"
     TEMPLATE = "article.html"
     RULES = ['/', ]
-    pass
+    __slots__ = ()
 
 
 class AuthorPage(ContentPage):
@@ -700,7 +2203,7 @@ class AuthorPage(ContentPage):
     CONTENT_TYPE = "author"
     TEMPLATE = "author.html"
     RULES = ['/authors/{slug}/', ]
-    pass
+    __slots__ = ()
 
 
 class AuthorListingPage(ContentListingPage):
@@ -711,7 +2214,7 @@ class AuthorListingPage(ContentListingPage):
     SLUG = "authors"
     TEMPLATE = "authors.html"
     RULES = ['/authors/', ]
-    pass
+    __slots__ = ()
 
 
 class ArticlePage(ContentPage):
@@ -721,7 +2224,7 @@ class ArticlePage(ContentPage):
     CONTENT_TYPE = "article"
     TEMPLATE = "article.html"
     RULES = ['/articles/{slug}/', ]
-    pass
+    __slots__ = ()
 
 
 class ArticleListingPage(ContentListingPage):
@@ -732,4 +2235,4 @@ class ArticleListingPage(ContentListingPage):
     SLUG = "articles"
     TEMPLATE = "articles.html"
     RULES = ['/articles/', ]
-    pass
+    __slots__ = ()
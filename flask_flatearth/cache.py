@@ -0,0 +1,207 @@
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from . import __version__
+
+
+log = logging.getLogger('flask_flatearth.cache')
+
+
+class ConversionCache(object):
+    """
+    Content addressed cache of converted page sources
+
+    Entries hold the converted HTML and the raw metadata of a page source and
+    are keyed by a hash of the source bytes, the converter configuration and
+    the flatearth version. Entries are stored as individual files below
+    `path` so that several processes can share the cache directory. Writes go
+    to a temporary file that is atomically renamed into place, so readers
+    never see partial entries.
+
+    The cache is bounded by `max_bytes`. Reading an entry refreshes its
+    modification time, and :meth:`prune` removes the least recently used
+    entries until the cache fits the budget.
+
+    :var MAX_BYTES: Default size budget in bytes
+    :type MAX_BYTES: `int`
+
+    :ivar path: Cache directory
+    :type path: `str`
+
+    :ivar max_bytes: Size budget in bytes
+    :type max_bytes: `int`
+
+    :ivar hits: Number of lookups served from the cache
+    :type hits: `int`
+
+    :ivar misses: Number of lookups that required conversion
+    :type misses: `int`
+
+    :ivar evictions: Number of entries removed by :meth:`prune`
+    :type evictions: `int`
+    """
+    MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, path, max_bytes=None):
+        """
+        Initialize the ConversionCache
+
+        :param path: Cache directory, created if missing
+        :type path: `str`
+
+        :param max_bytes: Size budget in bytes
+        :type max_bytes: `int`
+        """
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes if max_bytes else self.MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        msg = "{cls}('{path}', max_bytes={mb})".format(
+            cls=self.__class__.__name__,
+            path=self.path,
+            mb=self.max_bytes)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} path={path}>".format(cls=self.__class__.__name__,
+                                          path=self.path)
+        return msg
+
+    def key(self, data, config=''):
+        """
+        Cache key for page source data
+
+        :param data: Page source
+        :type data: `bytes`
+
+        :param config: Converter configuration identifier
+        :type config: `str`
+
+        :return: `str` hex digest
+        """
+        h = hashlib.sha256()
+        h.update(__version__.encode('utf-8'))
+        h.update(b'\0')
+        h.update(config.encode('utf-8'))
+        h.update(b'\0')
+        h.update(data)
+        return h.hexdigest()
+
+    def get(self, key):
+        """
+        Fetch a cache entry
+
+        :param key: Cache key
+        :type key: `str`
+
+        :return: `tuple` of (<html `str`>, <meta `dict`>) or `None`
+        """
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(entry)
+        except (OSError, ValueError) as e:
+            if getattr(e, 'errno', None) != errno.ENOENT:
+                msg = "Discarding unreadable cache entry {k}: {e}".format(
+                    k=key, e=e)
+                log.warning(msg)
+                self._remove(entry)
+            return None
+        return data['html'], data['meta']
+
+    def put(self, key, html, meta):
+        """
+        Store a cache entry
+
+        :param key: Cache key
+        :type key: `str`
+
+        :param html: Converted HTML
+        :type html: `str`
+
+        :param meta: Raw metadata of the source
+        :type meta: `dict`
+        """
+        entry = self._entry_path(key)
+        directory = os.path.dirname(entry)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'html': html, 'meta': meta}, f)
+            os.replace(tmp, entry)
+        except OSError as e:
+            msg = "Unable to write cache entry {k}: {e}".format(k=key, e=e)
+            log.warning(msg)
+            self._remove(tmp)
+
+    def record(self, hit):
+        """
+        Count a cache lookup
+
+        Lookups may happen in worker processes, so counting is left to the
+        process that owns the statistics.
+
+        :param hit: Whether the lookup was a hit
+        :type hit: `bool`
+        """
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def prune(self):
+        """
+        Evict least recently used entries until the cache fits `max_bytes`
+
+        :return: `int` size of the cache in bytes
+        """
+        entries = []
+        total = 0
+        for dirpath, dirnames, files in os.walk(self.path):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size,
+                                os.path.join(dirpath, name)))
+                total += st.st_size
+        if total > self.max_bytes:
+            entries.sort()
+            for mtime, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._remove(entry):
+                    self.evictions += 1
+                total -= size
+        return total
+
+    def stats(self):
+        """
+        Cache statistics
+
+        :return: `dict` of counters
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key[2:] + '.json')
+
+    def _remove(self, entry):
+        try:
+            os.remove(entry)
+            return True
+        except FileNotFoundError:
+            return False
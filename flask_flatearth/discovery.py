@@ -0,0 +1,195 @@
+import fnmatch
+import logging
+import os
+import re
+
+
+log = logging.getLogger('flask_flatearth.discovery')
+
+
+def suffixes(file_ext):
+    """
+    Normalize page source file extensions
+
+    :param file_ext: File extension(s), with or without the leading dot
+    :type file_ext: `str` or `list` of `str`
+
+    :return: `tuple` of lower case suffixes, such as ('.md', )
+    """
+    if isinstance(file_ext, str):
+        file_ext = [file_ext, ]
+    result = []
+    for ext in file_ext:
+        ext = ext.lower()
+        if not ext.startswith('.'):
+            ext = '.' + ext
+        if ext not in result:
+            result.append(ext)
+    return tuple(result)
+
+
+def changed_sources(previous, current):
+    """
+    Compare two manifests
+
+    :param previous: Earlier manifest
+    :type previous: `dict` of {<file name `str`>: (<mtime `int`>, \
+            <size `int`>)}
+
+    :param current: Later manifest
+    :type current: `dict` of {<file name `str`>: (<mtime `int`>, \
+            <size `int`>)}
+
+    :return: `tuple` of (<changed or added `list`>, <removed `list`>)
+    """
+    changed = [p for p in current if previous.get(p) != current[p]]
+    removed = [p for p in previous if p not in current]
+    return sorted(changed), sorted(removed)
+
+
+class SourceDiscovery(object):
+    """
+    Find page sources below a search path
+
+    Directories are read with `os.scandir` and walked in the same order as
+    `os.walk`, with the files of a directory before its subdirectories.
+    Files and directories whose name matches one of the `ignore` patterns are
+    skipped, so hidden files, version control directories such as '.git' and
+    draft directories are never loaded.
+
+    Each scan stores a manifest of the stat of every source found, which
+    callers can compare against later scans with :func:`changed_sources`.
+
+    :var IGNORE: Default name patterns to skip
+    :type IGNORE: `list` of `str`
+
+    :ivar search_path: Directory to search
+    :type search_path: `str`
+
+    :ivar suffixes: Lower case suffixes of page sources
+    :type suffixes: `tuple` of `str`
+
+    :ivar ignore: Shell style name patterns to skip
+    :type ignore: `list` of `str`
+
+    :ivar manifest: Stat of each source at the last scan, in scan order
+    :type manifest: `dict` of {<file name `str`>: (<mtime `int`>, \
+            <size `int`>)}
+    """
+    IGNORE = ['.*', 'drafts', '_drafts']
+
+    def __init__(self, search_path, file_ext='.md', ignore=None):
+        """
+        Initialize the SourceDiscovery
+
+        :param search_path: Directory to search
+        :type search_path: `str`
+
+        :param file_ext: Page source file extension(s)
+        :type file_ext: `str` or `list` of `str`
+
+        :param ignore: Shell style name patterns to skip
+        :type ignore: `list` of `str`
+        """
+        self.search_path = search_path
+        self.suffixes = suffixes(file_ext)
+        self.ignore = list(ignore if ignore is not None else self.IGNORE)
+        self._ignored = None
+        if self.ignore:
+            self._ignored = re.compile("|".join(
+                fnmatch.translate(p) for p in self.ignore)).match
+        self.manifest = {}
+
+    def __repr__(self):
+        msg = "{cls}({p}, file_ext={e}, ignore={i})".format(
+            cls=self.__class__.__name__,
+            p=self.search_path,
+            e=list(self.suffixes),
+            i=self.ignore)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} search_path={p}>".format(cls=self.__class__.__name__,
+                                               p=self.search_path)
+        return msg
+
+    def ignored(self, name):
+        """
+        Check if a file or directory name matches an ignore pattern
+
+        :param name: File or directory name
+        :type name: `str`
+
+        :return: `bool`
+        """
+        return self._ignored is not None and self._ignored(name) is not None
+
+    def matches(self, name):
+        """
+        Check if a file name is a page source
+
+        :param name: File name
+        :type name: `str`
+
+        :return: `bool`
+        """
+        return name.lower().endswith(self.suffixes) \
+            and not self.ignored(name)
+
+    def includes(self, file_name):
+        """
+        Check if a path would be found by a scan
+
+        The file must be below `search_path`, and the file name and every
+        directory between it and `search_path` must not be ignored.
+
+        :param file_name: Path of the file
+        :type file_name: `str`
+
+        :return: `bool`
+        """
+        if not self.matches(os.path.basename(file_name)):
+            return False
+        relative = os.path.relpath(os.path.abspath(file_name),
+                                   os.path.abspath(self.search_path))
+        parts = relative.split(os.sep)[:-1]
+        if parts and parts[0] == os.pardir:
+            return False
+        return not any(self.ignored(p) for p in parts)
+
+    def scan(self):
+        """
+        Find the page sources and store their manifest
+
+        :return: `dict` of {<file name `str`>: (<mtime `int`>, <size `int`>)}
+        """
+        manifest = {}
+        self._scan(self.search_path, manifest)
+        self.manifest = manifest
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "{d} found {n} sources".format(d=self, n=len(manifest))
+            log.debug(msg)
+        return manifest
+
+    def _scan(self, path, manifest):
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        directories = []
+        for entry in entries:
+            name = entry.name
+            if self._ignored is not None and self._ignored(name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif name.lower().endswith(self.suffixes) \
+                        and entry.is_file():
+                    st = entry.stat()
+                    manifest[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        for directory in directories:
+            self._scan(directory, manifest)
@@ -1,5 +1,7 @@
 import logging
 
+from ..routing import add_late_rules
+
 log = logging.getLogger('flask_flatearth.ext')
 
 
@@ -45,10 +47,11 @@ class ContentGeneratorExtension(object):
         :type name: `str`
         """
         self.name = name if name else self.EXTENSION_NAME
-        msg = "Initializing Extension {cls} as "\
-              "{name}".format(cls=self.__class__.__name__,
-                              name=self.name)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Initializing Extension {cls} as "\
+                  "{name}".format(cls=self.__class__.__name__,
+                                  name=self.name)
+            log.debug(msg)
         self.extensions = {}
         self.g = None
         self.generators = {}
@@ -62,11 +65,13 @@ class ContentGeneratorExtension(object):
             self.register(generator)
 
     def __call__(self):
-        msg = "Extension {e} called".format(e=self)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Extension {e} called".format(e=self)
+            log.debug(msg)
         self.load_pages()
-        msg = "Extension {e} returns {p}".format(e=self, p=self.pages)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Extension {e} returns {p}".format(e=self, p=self.pages)
+            log.debug(msg)
         return self.pages
 
     def __repr__(self):
@@ -81,6 +86,43 @@ class ContentGeneratorExtension(object):
                                         n=self.name)
         return msg
 
+    def add_url_rule(self, rule, endpoint, view_func):
+        """
+        Serve a url rule of the extension
+
+        Extensions may add their rules when pages are regenerated or restored,
+        while the app is serving requests.
+
+        .. see::
+            :func:`flask_flatearth.routing.add_late_rules`
+
+        :param rule: URL rule
+        :type rule: `str`
+
+        :param endpoint: Endpoint of the rule
+        :type endpoint: `str`
+
+        :param view_func: View function of the endpoint
+        :type view_func: `callable`
+        """
+        app = self.g.app
+        add_late_rules(app, [rule], endpoint)
+        app.view_functions[endpoint] = view_func
+        return self
+
+    def frozen_files(self):
+        """
+        Files served by the extension, for static exports
+
+        :meth:`ContentGenerator.freeze` writes these files along with the
+        pages. Extensions serving documents of their own should override
+        this.
+
+        :return: Iterable of (<URL `str`>, \
+                 :class:`flask_flatearth.response.PreparedPage`)
+        """
+        return ()
+
     def generate_context(self):
         """
         Returns a context to be passed through to templates.
@@ -89,9 +131,59 @@ class ContentGeneratorExtension(object):
         """
         return {}
 
+    def generated(self, pages):
+        """
+        Act on the pages generated by the ContentGenerator.
+
+        This is called by :meth:`ContentGenerator.generate` and
+        :meth:`ContentGenerator.regenerate` once the views of all pages are
+        registered, and when the pages of a snapshot are restored. The
+        `_generated()` method should be overridden to derive content from
+        every page, including the set pages of other extensions.
+
+        :param pages: Generated pages
+        :type pages: `dict` of {<slug `str`>: :class:<page `ContentPage`>}
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Extension {e} given {n} generated " \
+                  "pages".format(e=self, n=len(pages))
+            log.debug(msg)
+        self._generated(pages)
+        return self
+
+    def site_url(self, url=None, option=None):
+        """
+        Absolute URL of the site, for documents linking to its pages
+
+        :param url: URL given to the extension, used first
+        :type url: `str`
+
+        :param option: App config option holding the URL, used next. The URL
+                       of the app 'SERVER_NAME' is used otherwise.
+        :type option: `str`
+
+        :raise RuntimeError: if no URL is given or configured
+
+        :return: `str` without a trailing slash
+        """
+        config = self.g.app.config
+        if not url and option:
+            url = config.get(option)
+        if not url and config.get('SERVER_NAME'):
+            url = "{s}://{n}{r}".format(
+                s=config.get('PREFERRED_URL_SCHEME', 'http'),
+                n=config['SERVER_NAME'],
+                r=config.get('APPLICATION_ROOT') or '')
+        if not url:
+            msg = "Extension {e} requires a site URL, {o} or " \
+                  "SERVER_NAME".format(e=self, o=option)
+            raise RuntimeError(msg)
+        return url.rstrip('/')
+
     def load_pages(self):
-        msg = "Extension {e} loading pages.".format(e=self)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Extension {e} loading pages.".format(e=self)
+            log.debug(msg)
         if not self.is_registered:
             msg = "Extension {ext} not yet registered. Call register() or " \
                   "init with generator.".format(ext=self)
@@ -102,15 +194,31 @@ class ContentGeneratorExtension(object):
             gen_pages = pg[g](app=self.g.app,
                               slug=pg[g].PAGE_CLS.SLUG,
                               generator=self)
-            msg = "Extension {e} load_pages adds gen_pages " \
-                  "{g}".format(e=self, g=gen_pages)
-            log.debug(msg)
+            if log.isEnabledFor(logging.DEBUG):
+                msg = "Extension {e} load_pages adds gen_pages " \
+                      "{g}".format(e=self, g=gen_pages)
+                log.debug(msg)
             for p in gen_pages:
                 if p in self.pages:
-                    msg = "Page {p} already present. Attempted" \
+                    msg = "Page {p} already present. Attempted " \
                        "duplicate by {g}".format(p=p, g=pg[g])
                     raise RuntimeError(msg)
-                self.pages.update(gen_pages)
+            self.pages.update(gen_pages)
+
+    def reset(self):
+        """
+        Discard pages and state gathered from processed pages.
+
+        This is called by :meth:`ContentGenerator.regenerate` before the
+        pages are processed again. The `_reset()` method should be overridden
+        to clear state collected by `_process_page()`.
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Resetting Extension {obj}".format(obj=self)
+            log.debug(msg)
+        self.pages = {}
+        self._reset()
+        return self
 
     def setup(self):
         """
@@ -122,8 +230,9 @@ class ContentGeneratorExtension(object):
         .. warn::
             The ContentGenerator instance is not available during this call.
         """
-        msg = "Setting up Extension {obj}".format(obj=self)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Setting up Extension {obj}".format(obj=self)
+            log.debug(msg)
         self._setup()
         self.is_setup = True
         return self
@@ -145,15 +254,32 @@ class ContentGeneratorExtension(object):
                   " Initialize with setup().".format(obj=self)
             raise RuntimeError(msg)
         self.g = generator
-        msg = "Registering Extension {obj} with ContentGenerator " \
-              "{g}".format(obj=self,
-                           g=self.g)
-        log.debug(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "Registering Extension {obj} with ContentGenerator " \
+                  "{g}".format(obj=self,
+                               g=self.g)
+            log.debug(msg)
         generator.add_extension(self)
         self._register()
         self.is_registered = True
         return self
 
+    def _generated(self, pages):
+        """
+        .. see::
+            :meth:`ContentGeneratorExtension.generated`
+        """
+        pass
+
+    def _load_pages(self):
+        """
+        Add the pages of the extension to `pages`
+
+        .. see::
+            :meth:`ContentGeneratorExtension.load_pages`
+        """
+        pass
+
     def _register(self):
         """
         .. see::
@@ -161,6 +287,13 @@ class ContentGeneratorExtension(object):
         """
         pass
 
+    def _reset(self):
+        """
+        .. see::
+            :meth:`ContentGeneratorExtension.reset`
+        """
+        pass
+
     def _setup(self):
         """
         This is called to setup object attributes used to instantiate
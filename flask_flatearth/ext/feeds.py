@@ -0,0 +1,321 @@
+import heapq
+import itertools
+import logging
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+import flask
+
+from . import ContentGeneratorExtension
+from .topics import TopicExtension, topic_slug
+from ..response import PreparedPage
+from ..util import last_modified, parse_date
+
+
+log = logging.getLogger('flask_flatearth.ext.feeds')
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+
+def atom_feed(feed, entries):
+    """
+    Atom feed document
+
+    :param feed: Feed 'title', 'url' of the feed page, 'self' URL of the
+                 feed and 'updated' date
+    :type feed: `dict`
+
+    :param entries: Entries with their 'title', 'url', 'published' and
+                    'updated' dates, 'authors' names and 'summary'
+    :type entries: `list` of `dict`
+
+    :return: `str`
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<feed xmlns="{ns}">'.format(ns=ATOM_NS),
+             '<title>{t}</title>'.format(t=escape(feed['title'])),
+             '<id>{u}</id>'.format(u=escape(feed['url'])),
+             '<link href={u}/>'.format(u=quoteattr(feed['url'])),
+             '<link rel="self" href={u}/>'.format(u=quoteattr(feed['self'])),
+             '<updated>{d}</updated>'.format(d=feed['updated'].isoformat()),
+             '<author><name>{t}</name></author>'.format(
+                 t=escape(feed['title']))]
+    for entry in entries:
+        lines += ['<entry>',
+                  '<title>{t}</title>'.format(t=escape(entry['title'])),
+                  '<id>{u}</id>'.format(u=escape(entry['url'])),
+                  '<link href={u}/>'.format(u=quoteattr(entry['url'])),
+                  '<published>{d}</published>'.format(
+                      d=entry['published'].isoformat()),
+                  '<updated>{d}</updated>'.format(
+                      d=entry['updated'].isoformat())]
+        lines += ['<author><name>{a}</name></author>'.format(a=escape(a))
+                  for a in entry['authors']]
+        if entry['summary']:
+            lines.append('<summary>{s}</summary>'.format(
+                s=escape(entry['summary'])))
+        lines.append('</entry>')
+    lines.append('</feed>\n')
+    return '\n'.join(lines)
+
+
+def rss_feed(feed, entries):
+    """
+    RSS 2.0 feed document
+
+    :param feed: Feed as for :func:`atom_feed`
+    :type feed: `dict`
+
+    :param entries: Entries as for :func:`atom_feed`
+    :type entries: `list` of `dict`
+
+    :return: `str`
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<rss version="2.0">',
+             '<channel>',
+             '<title>{t}</title>'.format(t=escape(feed['title'])),
+             '<link>{u}</link>'.format(u=escape(feed['url'])),
+             '<description>{t}</description>'.format(
+                 t=escape(feed['title'])),
+             '<lastBuildDate>{d}</lastBuildDate>'.format(
+                 d=format_datetime(feed['updated']))]
+    for entry in entries:
+        lines += ['<item>',
+                  '<title>{t}</title>'.format(t=escape(entry['title'])),
+                  '<link>{u}</link>'.format(u=escape(entry['url'])),
+                  '<guid isPermaLink="true">{u}</guid>'.format(
+                      u=escape(entry['url'])),
+                  '<pubDate>{d}</pubDate>'.format(
+                      d=format_datetime(entry['published']))]
+        if entry['summary']:
+            lines.append('<description>{s}</description>'.format(
+                s=escape(entry['summary'])))
+        lines.append('</item>')
+    lines += ['</channel>', '</rss>\n']
+    return '\n'.join(lines)
+
+
+class FeedsExtension(ContentGeneratorExtension):
+    """
+    Serves Atom and RSS feeds of the latest articles
+
+    Feeds list the `size` most recently published pages of the `FEED_TYPES`,
+    newest first: the 'all' feed lists every such page, the 'authors/<slug>'
+    feeds the pages of an author and, with the
+    :class:`flask_flatearth.ext.topics.TopicExtension` registered, the
+    'topics/<slug>' feeds the pages of a topic. Each feed keeps a heap of its
+    latest `size` pages as pages are processed, so pages are never sorted as
+    a whole.
+
+    The feed documents are rendered once the pages are generated and served
+    at `URL` from their prepared bytes, with a strong ETag and the latest
+    entry date as Last-Modified, so polling clients are answered with 304
+    until a feed changes. They are precompressed with the encodings of the
+    ContentGenerator. With Flask, `url_for('flatearth_feeds', feed='all',
+    fmt='atom')` builds the URL of a feed.
+
+    Feed URLs are absolute, so page URLs are given below `base_url`. This
+    defaults to the 'FLATEARTH_FEEDS_BASE_URL' app config, or to the URL of
+    the app 'SERVER_NAME'. The feed `title` defaults to the
+    'FLATEARTH_FEEDS_TITLE' app config, or to the app name.
+
+    :var URL: URL of the feeds, by feed name and format
+    :type URL: `str`
+
+    :var FORMATS: Feed formats and their media types
+    :type FORMATS: `dict` of {<format `str`>: <mimetype `str`>}
+
+    :var FEED_TYPES: Page types listed by the feeds
+    :type FEED_TYPES: `list` of `str`
+
+    :var FEED_SIZE: Default number of pages listed by each feed
+    :type FEED_SIZE: `int`
+
+    :ivar size: Number of pages listed by each feed
+    :type size: `int`
+
+    :ivar heaps: Publish timestamp, processing order and slug of the latest
+                 pages, by feed name
+    :type heaps: `dict` of {<feed `str`>: `list` of `tuple`}
+
+    :ivar labels: Topic names by feed name
+    :type labels: `dict` of {<feed `str`>: <topic `str`>}
+
+    :ivar feeds: Feed documents by feed name and format, filled when pages
+                 are generated
+    :type feeds: `dict` of {(<feed `str`>, <format `str`>): \
+            :class:`flask_flatearth.response.PreparedPage`}
+    """
+    EXTENSION_NAME = "feeds_extension"
+    URL = '/feeds/{feed}.{fmt}.xml'
+    FORMATS = {'atom': 'application/atom+xml',
+               'rss': 'application/rss+xml'}
+    FEED_TYPES = ['article', ]
+    FEED_SIZE = 20
+
+    def __init__(self, name=None, generator=None, base_url=None, title=None,
+                 size=None):
+        """
+        Initialize the extension
+
+        :param name: Name of extension
+        :type name: `str`
+
+        :param base_url: URL the page URLs are relative to
+        :type base_url: `str`
+
+        :param title: Title of the feeds
+        :type title: `str`
+
+        :param size: Number of pages listed by each feed
+        :type size: `int`
+        """
+        self.base_url = base_url
+        self.title = title
+        self.size = size if size else self.FEED_SIZE
+        super(FeedsExtension, self).__init__(name=name, generator=generator)
+
+    def _setup(self):
+        self.rules_set = False
+        self.feeds = {}
+        self._reset()
+
+    def _reset(self):
+        self.heaps = {}
+        self.labels = {}
+        self.processed = 0
+        self._order = itertools.count()
+
+    def _process_page(self, meta, html, file_name):
+        self.processed += 1
+        self._add(meta)
+
+    def _add(self, meta):
+        """
+        Push a page onto the heaps of its feeds
+
+        :param meta: Page metadata
+        :type meta: `dict`
+        """
+        if meta.get('type') not in self.FEED_TYPES:
+            return
+        publish = meta.get('publish')
+        if isinstance(publish, tuple):
+            publish = publish[0]
+        date = parse_date(publish) if publish else None
+        if date is None:
+            return
+        item = (date.timestamp(), -next(self._order), meta['slug'])
+        names = ['all'] + ['authors/' + a for a in meta.get('author', ())]
+        if self._topics() is not None:
+            for topic in meta.get('topics', ()):
+                name = 'topics/' + topic_slug(topic)
+                self.labels.setdefault(name, topic)
+                names.append(name)
+        for name in names:
+            heap = self.heaps.setdefault(name, [])
+            if len(heap) < self.size:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def _generated(self, pages):
+        if not self.processed:
+            self._reset()
+            for page in self.g.pages.values():
+                self._add(page.meta)
+        base = self.site_url(self.base_url, 'FLATEARTH_FEEDS_BASE_URL')
+        config = self.g.app.config
+        title = self.title or config.get('FLATEARTH_FEEDS_TITLE') or \
+            self.g.app.name
+        feeds = {}
+        cache = {}
+        with self.g.metrics.timer('feeds'):
+            for name in self.heaps:
+                entries = []
+                for item in sorted(self.heaps[name], reverse=True):
+                    if item[2] not in cache and item[2] in pages:
+                        cache[item[2]] = self._entry(pages[item[2]], base)
+                    if item[2] in cache:
+                        entries.append(cache[item[2]])
+                if not entries:
+                    continue
+                slug = name.partition('/')[2]
+                page = pages.get(slug)
+                feed = {'title': title,
+                        'url': base + '/',
+                        'updated': max(e['updated'] for e in entries)}
+                if page is not None:
+                    label = self.labels.get(name) or \
+                        page.meta.get('title', slug)
+                    feed['title'] = "{t}: {l}".format(t=title, l=label)
+                    feed['url'] = base + page.urls()[0]
+                for fmt, render in [('atom', atom_feed), ('rss', rss_feed)]:
+                    feed['self'] = base + self.URL.format(feed=name, fmt=fmt)
+                    feeds[(name, fmt)] = PreparedPage.prepare(
+                        render(feed, entries),
+                        last_modified=feed['updated'],
+                        encodings=self.g.encodings)
+        self.feeds = feeds
+        if not self.rules_set:
+            self.add_url_rule(
+                self.URL.format(feed='<path:feed>',
+                                fmt='<any({f}):fmt>'.format(
+                                    f=', '.join(self.FORMATS))),
+                'flatearth_feeds', self._serve)
+            self.rules_set = True
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "{e} rendered feeds {f}".format(e=self, f=list(feeds))
+            log.debug(msg)
+
+    def frozen_files(self):
+        return [(self.URL.format(feed=feed, fmt=fmt), self.feeds[(feed, fmt)])
+                for feed, fmt in sorted(self.feeds)]
+
+    def _entry(self, page, base):
+        """
+        Feed entry of a page
+
+        :param page: Generated page
+        :type page: `ContentPage`
+
+        :param base: URL the page URL is relative to
+        :type base: `str`
+
+        :return: `dict`
+        """
+        meta = page.meta
+        publish = meta['publish']
+        published = parse_date(publish[0] if isinstance(publish, tuple)
+                               else publish)
+        authors = []
+        for a in meta.get('author', ()):
+            author = self.g.pages.get(a)
+            authors.append(author.meta.get('title', a) if author else a)
+        return {'title': meta.get('title', page.slug),
+                'url': base + page.urls()[0],
+                'published': published,
+                'updated': last_modified(meta) or published,
+                'authors': authors,
+                'summary': meta.get('description')}
+
+    def _topics(self):
+        """
+        Registered TopicExtension
+
+        :return: :class:`flask_flatearth.ext.topics.TopicExtension` or `None`
+        """
+        for ext in self.g.extensions.values():
+            if isinstance(ext, TopicExtension):
+                return ext
+        return None
+
+    def _serve(self, feed, fmt):
+        prepared = self.feeds.get((feed, fmt))
+        if prepared is None:
+            flask.abort(404)
+        response = prepared.response()
+        response.mimetype = self.FORMATS[fmt]
+        return response
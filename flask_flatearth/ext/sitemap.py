@@ -0,0 +1,309 @@
+import hashlib
+import logging
+import re
+import zlib
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import flask
+
+from . import ContentGeneratorExtension
+from ..response import PreparedPage
+
+
+log = logging.getLogger('flask_flatearth.ext.sitemap')
+
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+SHARD_SIZE = 50000
+SHARD_BYTES = 50 * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+URL_SAFE = re.compile(r"[A-Za-z0-9/%:@!$'()*+,;=?#._~-]*")
+
+
+class SitemapFile(object):
+    """
+    Sitemap file written an entry at a time
+
+    Entries are gzip compressed as they are added, in chunks of about
+    `CHUNK_BYTES`, so the document itself is never held in memory. The strong
+    ETag of the document is computed along the way.
+
+    :ivar root: Root element, 'urlset' or 'sitemapindex'
+    :type root: `str`
+
+    :ivar count: Number of entries added
+    :type count: `int`
+
+    :ivar size: Size of the document in bytes so far
+    :type size: `int`
+
+    :ivar last_modified: Latest modification date of the entries
+    :type last_modified: :class:`datetime.datetime`
+    """
+    def __init__(self, root='urlset'):
+        """
+        Initialize the SitemapFile
+
+        :param root: Root element, 'urlset' or 'sitemapindex'
+        :type root: `str`
+        """
+        self.root = root
+        self.count = 0
+        self.size = 0
+        self.last_modified = None
+        self._digest = hashlib.sha1()
+        self._compress = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self._chunks = []
+        self._pending = []
+        self._pending_size = 0
+        self._end = "</{r}>\n".format(r=root).encode('utf-8')
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<{r} xmlns="{ns}">\n'.format(r=root, ns=SITEMAP_NS)
+                    .encode('utf-8'))
+
+    def __repr__(self):
+        msg = "{cls}(root='{r}')".format(cls=self.__class__.__name__,
+                                         r=self.root)
+        return msg
+
+    def fits(self, entry, count=SHARD_SIZE, size=SHARD_BYTES):
+        """
+        Whether an entry can be added within the sitemap limits
+
+        :param entry: Entry from :func:`sitemap_entry`
+        :type entry: `bytes`
+
+        :param count: Maximum number of entries
+        :type count: `int`
+
+        :param size: Maximum document size in bytes
+        :type size: `int`
+
+        :return: `bool`
+        """
+        return self.count < count \
+            and self.size + len(entry) + len(self._end) <= size
+
+    def add(self, entry, lastmod=None):
+        """
+        Add an entry
+
+        :param entry: Entry from :func:`sitemap_entry`
+        :type entry: `bytes`
+
+        :param lastmod: Modification date of the entry
+        :type lastmod: :class:`datetime.datetime`
+        """
+        if lastmod is not None and (self.last_modified is None or
+                                    lastmod > self.last_modified):
+            self.last_modified = lastmod
+        self._write(entry)
+        self.count += 1
+
+    def close(self):
+        """
+        Finish the document
+
+        :return: :class:`flask_flatearth.response.PreparedPage` holding the
+                 gzip variant of the document
+        """
+        self._write(self._end)
+        self._flush()
+        self._chunks.append(self._compress.flush())
+        return PreparedPage(etag=self._digest.hexdigest(),
+                            last_modified=self.last_modified,
+                            encoded={'gzip': b''.join(self._chunks)})
+
+    def _flush(self):
+        data = b''.join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self._digest.update(data)
+        chunk = self._compress.compress(data)
+        if chunk:
+            self._chunks.append(chunk)
+
+    def _write(self, data):
+        self.size += len(data)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= CHUNK_BYTES:
+            self._flush()
+
+
+def sitemap_entry(tag, loc, lastmod=None):
+    """
+    Sitemap entry element
+
+    :param tag: Entry element, 'url' or 'sitemap'
+    :type tag: `str`
+
+    :param loc: Absolute URL
+    :type loc: `str`
+
+    :param lastmod: Modification date
+    :type lastmod: :class:`datetime.datetime`
+
+    :return: `bytes`
+    """
+    if not URL_SAFE.fullmatch(loc):
+        loc = escape(quote(loc, safe="/%:@!$&'()*+,;=?#"))
+    if lastmod is None:
+        entry = "<{t}><loc>{l}</loc></{t}>\n".format(t=tag, l=loc)
+    else:
+        entry = "<{t}><loc>{l}</loc><lastmod>{d}</lastmod></{t}>\n".format(
+            t=tag, l=loc, d=lastmod.isoformat())
+    return entry.encode('utf-8')
+
+
+def write_sitemaps(entries, count=SHARD_SIZE, size=SHARD_BYTES):
+    """
+    Write sitemap files of URLs
+
+    A new file is started whenever the next URL would exceed `count` URLs or
+    `size` bytes.
+
+    :param entries: URLs and their modification dates
+    :type entries: Iterable of (<loc `str`>, \
+            <lastmod :class:`datetime.datetime`>)
+
+    :param count: Maximum number of URLs per file
+    :type count: `int`
+
+    :param size: Maximum file size in bytes
+    :type size: `int`
+
+    :return: `list` of :class:`flask_flatearth.response.PreparedPage`
+    """
+    files = []
+    current = SitemapFile('urlset')
+    for loc, lastmod in entries:
+        entry = sitemap_entry('url', loc, lastmod)
+        if current.count and not current.fits(entry, count, size):
+            files.append(current.close())
+            current = SitemapFile('urlset')
+        current.add(entry, lastmod)
+    files.append(current.close())
+    return files
+
+
+class SitemapExtension(ContentGeneratorExtension):
+    """
+    Serves a sitemap of the generated pages
+
+    The sitemap lists the first URL of every generated page, with the
+    Last-Modified date the page is served with as `lastmod`, so pages listing
+    other pages have none. It is written once the pages are generated,
+    streaming the pages into gzip compressed files, and served from those
+    bytes with an ETag. Clients not accepting gzip get the files
+    decompressed.
+
+    Sitemaps of more than `shard_size` URLs are split into files of
+    `shard_size` URLs at `SHARD_URL`, listed by a sitemap index at `URL`.
+
+    Sitemap URLs are absolute, so page URLs are given below `base_url`. This
+    defaults to the 'FLATEARTH_SITEMAP_BASE_URL' app config, or to the URL
+    of the app 'SERVER_NAME'.
+
+    :var URL: URL of the sitemap or sitemap index
+    :type URL: `str`
+
+    :var SHARD_URL: URL of the sitemap files listed by the sitemap index
+    :type SHARD_URL: `str`
+
+    :var SHARD_SIZE: Maximum number of URLs per sitemap file
+    :type SHARD_SIZE: `int`
+
+    :ivar base_url: URL the page URLs are relative to
+    :type base_url: `str`
+
+    :ivar shard_size: Maximum number of URLs per sitemap file
+    :type shard_size: `int`
+
+    :ivar sitemap: File served at `URL`, `None` until pages are generated
+    :type sitemap: :class:`flask_flatearth.response.PreparedPage`
+
+    :ivar shards: Files served at `SHARD_URL` when the sitemap is split
+    :type shards: `list` of :class:`flask_flatearth.response.PreparedPage`
+    """
+    EXTENSION_NAME = "sitemap_extension"
+    URL = '/sitemap.xml'
+    SHARD_URL = '/sitemap-{number}.xml'
+    SHARD_SIZE = SHARD_SIZE
+
+    def __init__(self, name=None, generator=None, base_url=None,
+                 shard_size=None):
+        """
+        Initialize the extension
+
+        :param name: Name of extension
+        :type name: `str`
+
+        :param base_url: URL the page URLs are relative to
+        :type base_url: `str`
+
+        :param shard_size: Maximum number of URLs per sitemap file
+        :type shard_size: `int`
+        """
+        self.base_url = base_url
+        self.shard_size = shard_size if shard_size else self.SHARD_SIZE
+        super(SitemapExtension, self).__init__(name=name,
+                                               generator=generator)
+
+    def _setup(self):
+        self.rules_set = False
+        self.sitemap = None
+        self.shards = []
+
+    def _generated(self, pages):
+        base = self.site_url(self.base_url, 'FLATEARTH_SITEMAP_BASE_URL')
+        with self.g.metrics.timer('sitemap'):
+            files = write_sitemaps(self._entries(pages, base),
+                                   count=self.shard_size)
+            if len(files) == 1:
+                sitemap, shards = files[0], []
+            else:
+                index = SitemapFile('sitemapindex')
+                for n, f in enumerate(files, 1):
+                    loc = base + self.SHARD_URL.format(number=n)
+                    index.add(sitemap_entry('sitemap', loc, f.last_modified),
+                              f.last_modified)
+                sitemap, shards = index.close(), files
+        self.shards = shards
+        self.sitemap = sitemap
+        if not self.rules_set:
+            self.add_url_rule(self.URL, 'flatearth_sitemap', self._serve)
+            self.add_url_rule(self.SHARD_URL.format(number='<int:number>'),
+                              'flatearth_sitemap_shard', self._serve)
+            self.rules_set = True
+        msg = "{e} wrote sitemap of {n} files".format(e=self,
+                                                      n=len(files))
+        log.info(msg)
+
+    def frozen_files(self):
+        if self.sitemap is None:
+            return []
+        files = [(self.URL, self.sitemap)]
+        for n, shard in enumerate(self.shards, 1):
+            files.append((self.SHARD_URL.format(number=n), shard))
+        return files
+
+    def _entries(self, pages, base):
+        for p in pages:
+            urls = pages[p].urls()
+            if urls and '<' not in urls[0]:
+                yield base + urls[0], pages[p].last_modified()
+
+    def _serve(self, number=None):
+        if number is None:
+            prepared = self.sitemap
+        else:
+            shards = self.shards
+            prepared = shards[number - 1] \
+                if 0 < number <= len(shards) else None
+        if prepared is None:
+            flask.abort(404)
+        response = prepared.response()
+        response.mimetype = 'application/xml'
+        return response
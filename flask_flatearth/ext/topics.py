@@ -1,14 +1,28 @@
 import logging
+import sys
+from functools import partial
 
 from . import ContentGeneratorExtension
-from .. import MetaProcessor, PageGenerator
+from .. import ListingPageGenerator, MetaProcessor, PageGenerator
 from .. import ContentPage, ContentListingPage
-from ..util import rfc2822_now
+from ..util import rfc2822_now, sort_pages
 
 
 log = logging.getLogger('flask_flatearth.ext.topics')
 
 
+def topic_slug(topic):
+    """
+    Slug of the page of a topic
+
+    :param topic: Topic name
+    :type topic: `str`
+
+    :return: `str`
+    """
+    return topic.lower().replace(" ", "-")
+
+
 class TopicPage(ContentPage):
     """
     Topic Page
@@ -16,7 +30,7 @@ class TopicPage(ContentPage):
     CONTENT_TYPE = "topic"
     TEMPLATE = "topic.html"
     RULES = ['/topics/{slug}/', ]
-    pass
+    __slots__ = ()
 
 
 class TopicListingPage(ContentListingPage):
@@ -27,7 +41,7 @@ class TopicListingPage(ContentListingPage):
     SLUG = "topics"
     TEMPLATE = "topics.html"
     RULES = ['/topics/', ]
-    pass
+    __slots__ = ()
 
 
 class TopicMetaProcessor(MetaProcessor):
@@ -36,17 +50,21 @@ class TopicMetaProcessor(MetaProcessor):
     """
     def _process(self, data):
         full = ",".join(data)
-        result = set([t.strip() for t in full.split(',')])
+        result = set([sys.intern(t.strip()) for t in full.split(',')])
+        folded = {}
         for r in result:
-            if r.lower() in [n.lower() for n in result if r is not n]:
+            folded.setdefault(r.casefold(), []).append(r)
+        for names in folded.values():
+            if len(names) > 1:
                 msg = "Possible duplicate topic case '{topic}' in " \
-                      "set {topics}".format(topic=r, topics=result)
-                log.warn(msg)
-        msg = "MetaProcessor {mp} processed data '{d}' resulting in " \
-              "{r}".format(mp=self,
-                           d=data,
-                           r=result)
-        log.debug(msg)
+                      "set {topics}".format(topic=names[0], topics=result)
+                log.warning(msg)
+        if log.isEnabledFor(logging.DEBUG):
+            msg = "MetaProcessor {mp} processed data '{d}' resulting in " \
+                  "{r}".format(mp=self,
+                               d=data,
+                               r=result)
+            log.debug(msg)
         return result
 
 
@@ -57,16 +75,35 @@ class TopicPageGenerator(PageGenerator):
     PAGE_CLS = TopicPage
 
 
-class TopicPageListingGenerator(PageGenerator):
+class TopicPageListingGenerator(ListingPageGenerator):
     """
     Topic Listing PageGenerator
+
+    Topic pages are sorted by the topic metadata of the extension rather than
+    the metadata of the page they were created from.
     """
     PAGE_CLS = TopicListingPage
 
+    def _listing(self):
+        pages = [self.ext.pages[t] for t in self.ext.topics]
+        if self.g.sort_key:
+            return sort_pages(pages,
+                              self.g.sort_key,
+                              self.g.sort_reverse,
+                              meta=lambda p: self.ext.topics[p.slug])
+        return pages
+
 
 class TopicExtension(ContentGeneratorExtension):
     """
     Provides topic functionality for pages
+
+    Pages are linked to their topics by 'topic' references in the
+    ContentGenerator `graph`, so the pages of a topic are found in the order
+    they were processed with `graph.sources(topic, 'topic')`.
+
+    :ivar topics: Topic page metadata by topic slug
+    :type topics: `dict` of {<slug `str`>: <meta `dict`>}
     """
     EXTENSION_NAME = "topic_extension"
 
@@ -74,6 +111,9 @@ class TopicExtension(ContentGeneratorExtension):
         self.topics = {}
         self.publish = rfc2822_now()
 
+    def _reset(self):
+        self.topics = {}
+
     def _register(self):
         mp = TopicMetaProcessor(self.g,
                                 ext=self)
@@ -89,38 +129,48 @@ class TopicExtension(ContentGeneratorExtension):
 
     def _process_page(self, meta, html, file_name):
         for topic in meta.get('topics', []):
-            msg = "Extension {e} processing topic {t}".format(e=self, t=topic)
-            log.debug(msg)
-            if topic not in self.topics:
-                slug = topic.lower().replace(" ", "-")
+            if log.isEnabledFor(logging.DEBUG):
+                msg = "Extension {e} processing topic {t}".format(e=self,
+                                                                  t=topic)
+                log.debug(msg)
+            slug = topic_slug(topic)
+            self.g.graph.add(meta['slug'], slug, 'topic')
+            if slug not in self.topics:
                 m = {'type': 'topic',
                      'slug': slug,
                      'title': topic,
                      'publish': self.publish,
                      'set': 'topics',
                      'meta': meta,
-                     'html': html}
+                     'html': html,
+                     'file_name': file_name}
                 self.topics.update({slug: m})
-                msg = "{e} added topic '{t}'".format(e=self, t=topic)
-                log.debug(msg)
+                if log.isEnabledFor(logging.DEBUG):
+                    msg = "{e} added topic '{t}'".format(e=self, t=topic)
+                    log.debug(msg)
 
     def generate_context(self):
         return {'topics': self.topics}
 
     def _load_pages(self):
         for topic in self.topics:
-            refs = [self.g.pages[p] for p in self.g.pages if 'topics' in
-                    self.g.pages[p].meta and topic in
-                    self.g.pages[p].meta['topics']]
+            m = self.topics[topic]
+            refs = tuple(self.g.pages[p] for p in
+                         self.g.graph.sources(topic, 'topic'))
             page = self.generators['topic'](app=self.g.app,
                                             slug=topic,
-                                            meta=self.topics[topic]['meta'],
-                                            html=self.topics[topic]['html'])
+                                            meta=m['meta'],
+                                            html=m['html'],
+                                            file_name=m['file_name'])
             page[topic].refs = refs
-            msg = "{e} adding topic '{t}' with refs {r} for page " \
-                  "'{p}'".format(e=self,
-                                 t=topic,
-                                 r=refs,
-                                 p=page)
-            log.debug(msg)
+            if m['html'] is None:
+                page[topic].loader = partial(self.g._load_html,
+                                             m['file_name'])
+            if log.isEnabledFor(logging.DEBUG):
+                msg = "{e} adding topic '{t}' with refs {r} for page " \
+                      "'{p}'".format(e=self,
+                                     t=topic,
+                                     r=refs,
+                                     p=page)
+                log.debug(msg)
             self.pages.update(page)
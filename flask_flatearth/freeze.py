@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .response import CODECS, brotli
+
+
+log = logging.getLogger('flask_flatearth.freeze')
+
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+class ContentFreezer(object):
+    """
+    Static export of generated pages
+
+    Each page's prepared body is written for every URL of its rules, using a
+    pool of writer threads. URLs ending with '/' are written as
+    'index.html' in the matching directory. Files whose content already
+    matches are left untouched, so repeated freezes only write changed pages.
+
+    Pages of the ContentGenerator are written along with the files of its
+    extensions, such as the sitemap and feeds. Static files and other routes
+    of the flask app are left to the application.
+
+    The files written are listed in a `MANIFEST` file in `output_dir`.
+    Files listed by the previous freeze that are no longer written, such as
+    those of removed pages, are deleted. Other files in `output_dir` are
+    never deleted.
+
+    :var MANIFEST: Name of the file listing the frozen files
+    :type MANIFEST: `str`
+
+    :var WORKERS: Default number of writer threads
+    :type WORKERS: `int`
+
+    :ivar g: ContentGenerator to freeze
+    :type g: `ContentGenerator`
+
+    :ivar output_dir: Directory to write to
+    :type output_dir: `str`
+
+    :ivar encodings: Encodings to write '.gz' and '.br' siblings for
+    :type encodings: `list` of `str`
+
+    :ivar written: Number of files written
+    :type written: `int`
+
+    :ivar unchanged: Number of files left untouched
+    :type unchanged: `int`
+
+    :ivar removed: Number of files of the previous freeze deleted
+    :type removed: `int`
+    """
+    MANIFEST = '.flatearth-frozen'
+    WORKERS = 8
+
+    def __init__(self, g, output_dir, workers=None, encodings=()):
+        """
+        Initialize the ContentFreezer
+
+        :param g: ContentGenerator to freeze
+        :type g: `ContentGenerator`
+
+        :param output_dir: Directory to write to
+        :type output_dir: `str`
+
+        :param workers: Number of writer threads
+        :type workers: `int`
+
+        :param encodings: Encodings to write siblings for, out of 'gzip' and
+                          'br'
+        :type encodings: `list` of `str`
+        """
+        self.g = g
+        self.output_dir = output_dir
+        self.workers = workers if workers else self.WORKERS
+        self.encodings = [e for e in encodings if e in SUFFIXES
+                          and (e != 'br' or brotli is not None)]
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def __repr__(self):
+        msg = "{cls}({g}, '{o}', workers={w}, encodings={e})".format(
+            cls=self.__class__.__name__,
+            g=self.g,
+            o=self.output_dir,
+            w=self.workers,
+            e=self.encodings)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} output_dir={o}>".format(cls=self.__class__.__name__,
+                                             o=self.output_dir)
+        return msg
+
+    def freeze(self):
+        """
+        Write all generated pages and extension files, then delete the files
+        of the previous freeze that were not written again
+
+        :raise RuntimeError: if `generate()` was not called first
+
+        :return: `dict` of counters
+        """
+        if not self.g.generated_pages:
+            msg = "Attempting to freeze {g} before calling " \
+                  "generate()".format(g=self.g)
+            raise RuntimeError(msg)
+        pages = list(self.g.generated_pages.values())
+        frozen = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self._freeze_page, pages))
+            for ext in self.g.extensions.values():
+                results.extend(pool.map(self._freeze_file,
+                                        ext.frozen_files()))
+        for written, unchanged, files in results:
+            self.written += written
+            self.unchanged += unchanged
+            frozen.extend(files)
+        self._remove_stale(frozen)
+        msg = "{f} wrote {w} files, {u} unchanged, {r} removed".format(
+            f=self, w=self.written, u=self.unchanged, r=self.removed)
+        log.info(msg)
+        return self.stats()
+
+    def stats(self):
+        """
+        Freeze statistics
+
+        :return: `dict` of counters
+        """
+        return {'written': self.written,
+                'unchanged': self.unchanged,
+                'removed': self.removed}
+
+    def path(self, url):
+        """
+        Output file for a URL
+
+        :param url: Page URL
+        :type url: `str`
+
+        :return: `str`
+        """
+        parts = [p for p in url.split('/') if p]
+        if url.endswith('/'):
+            parts.append('index.html')
+        return os.path.join(self.output_dir, *parts)
+
+    def _freeze_page(self, page):
+        return self._freeze(page.urls(), self.g.prepared(page))
+
+    def _freeze_file(self, item):
+        url, prepared = item
+        return self._freeze([url], prepared)
+
+    def _freeze(self, urls, prepared):
+        """
+        Write a prepared page for its URLs
+
+        :param urls: URLs to write the page for
+        :type urls: `list` of `str`
+
+        :param prepared: Page to write
+        :type prepared: :class:`flask_flatearth.response.PreparedPage`
+
+        :return: `tuple` of (<written `int`>, <unchanged `int`>, <file
+                 names `list`>)
+        """
+        written = 0
+        unchanged = 0
+        frozen = []
+        for url in urls:
+            path = self.path(url)
+            files = [(path, prepared.etag, None)]
+            for encoding in self.encodings:
+                files.append((path + SUFFIXES[encoding], None, encoding))
+            for file_name, digest, encoding in files:
+                frozen.append(file_name)
+                if encoding is None:
+                    data = None
+                else:
+                    data = prepared.encoded.get(encoding)
+                    if data is None:
+                        data = CODECS[encoding][0](prepared.body)
+                    digest = hashlib.sha1(data).hexdigest()
+                if self._digest(file_name) == digest:
+                    unchanged += 1
+                    continue
+                self._write(file_name,
+                            data if data is not None else prepared.body)
+                written += 1
+        return written, unchanged, frozen
+
+    def _digest(self, file_name):
+        try:
+            with open(file_name, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    def _write(self, file_name, data):
+        directory = os.path.dirname(file_name)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, file_name)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _remove_stale(self, frozen):
+        """
+        Delete the files of the previous freeze that were not written again,
+        and list the frozen files in the `MANIFEST`
+
+        :param frozen: Names of the files frozen
+        :type frozen: `list` of `str`
+        """
+        manifest = os.path.join(self.output_dir, self.MANIFEST)
+        names = set(os.path.relpath(f, self.output_dir) for f in frozen)
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                previous = set(f.read().splitlines())
+        except FileNotFoundError:
+            previous = set()
+        root = os.path.abspath(self.output_dir)
+        for name in sorted(previous - names):
+            file_name = os.path.abspath(os.path.join(root, name))
+            if not file_name.startswith(root + os.sep):
+                continue
+            try:
+                os.remove(file_name)
+            except (FileNotFoundError, IsADirectoryError):
+                continue
+            self.removed += 1
+            self._remove_empty(os.path.dirname(file_name), root)
+        self._write(manifest,
+                    ''.join(n + '\n' for n in sorted(names)).encode('utf-8'))
+
+    def _remove_empty(self, directory, root):
+        while directory != root and directory.startswith(root + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
@@ -1,4 +1,4 @@
-from .. import ContentGenerator, PageGenerator
+from .. import ContentGenerator, ListingPageGenerator, PageGenerator
 from .. import ArticlePage, ArticleListingPage, AuthorPage, AuthorListingPage
 from .. import IndexPage
 
@@ -7,7 +7,7 @@ class ArticlePageGenerator(PageGenerator):
     PAGE_CLS = ArticlePage
 
 
-class ArticleListingPageGenerator(PageGenerator):
+class ArticleListingPageGenerator(ListingPageGenerator):
     PAGE_CLS = ArticleListingPage
 
 
@@ -15,7 +15,7 @@ class AuthorPageGenerator(PageGenerator):
     PAGE_CLS = AuthorPage
 
 
-class AuthorListingPageGenerator(PageGenerator):
+class AuthorListingPageGenerator(ListingPageGenerator):
     PAGE_CLS = AuthorListingPage
 
 
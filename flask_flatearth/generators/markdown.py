@@ -1,11 +1,20 @@
 import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 
+import markdown
 from markdown import Extension
 from markdown import Markdown
+from markdown.extensions.meta import BEGIN_RE, END_RE, META_MORE_RE, META_RE
 from markdown.inlinepatterns import Pattern
-from markdown.util import etree
+from markdown.util import ETX, STX, etree
 
 from . import BasicContentGenerator
+from .. import URLFOR_PLACEHOLDER
+from ..util import ordered_map
 
 
 log = logging.getLogger('flask_flatearth.generators.markdown')
@@ -14,8 +23,10 @@ log = logging.getLogger('flask_flatearth.generators.markdown')
 class UrlForExtension(Extension):
     def extendMarkdown(self, md, md_globals):
         self.md = md
-        log.info("Registering Markdown Extension: "
-                 "{cls}".format(cls=self.__class__.__name__))
+        if log.isEnabledFor(logging.INFO):
+            msg = "Registering Markdown Extension: " \
+                  "{cls}".format(cls=self.__class__.__name__)
+            log.info(msg)
         URLFOR_RE = r'(\[([^\[\]]+)\])?\{\{([\w_-]+)\}\}'
         urlforPattern = UrlForInlineProcessor(URLFOR_RE,
                                               self.getConfigs())
@@ -29,11 +40,13 @@ class UrlForInlineProcessor(Pattern):
 
     def handleMatch(self, m):
         if m.group(1).strip():
-            log.debug("handleMatch: {groups} in "
+            if log.isEnabledFor(logging.DEBUG):
+                msg = "handleMatch: {groups} in " \
                       "{filename}".format(groups=m.groups(),
-                                          filename=__name__))
+                                          filename=__name__)
+                log.debug(msg)
             slug = m.group(4).strip()
-            url = "{{url_for('" + slug + "')}}"
+            url = URLFOR_PLACEHOLDER.format(slug=slug)
             text = m.group(3).strip() if m.group(3) else url
             a = etree.Element('a')
             a.text = text
@@ -43,59 +56,305 @@ class UrlForInlineProcessor(Pattern):
         return a
 
 
+META_EXTENSION = 'markdown.extensions.meta'
+EXTENSIONS = [META_EXTENSION, 'urlfor']
+OUTPUT_FORMAT = 'html5'
+
+_converters = threading.local()
+
+
+def converter(extensions=None):
+    """
+    Markdown instance of the current thread, reset for a new document
+
+    Building a Markdown instance registers every processor of its
+    extensions, so one instance is kept per thread and extension list, and
+    `reset()` is called on it between documents. The metadata is cleared as
+    well, since blank documents are not run through the meta extension.
+    Worker processes each keep their own instance.
+
+    The 'urlfor' name stands for :class:`UrlForExtension`. Other names are
+    loaded by Markdown.
+
+    :param extensions: Markdown extension names
+    :type extensions: `list` of `str`
+
+    :return: :class:`markdown.Markdown`
+    """
+    extensions = tuple(extensions if extensions else EXTENSIONS)
+    cached = getattr(_converters, 'markdown', None)
+    if cached is None or cached[0] != extensions:
+        md = Markdown(
+            extensions=[UrlForExtension() if e == 'urlfor' else e
+                        for e in extensions],
+            output_format=OUTPUT_FORMAT
+        )
+        cached = (extensions, md)
+        _converters.markdown = cached
+    md = cached[1].reset()
+    md.Meta = {}
+    return md
+
+
+def read_source(file_name):
+    """
+    Read a page source
+
+    :param file_name: Path of the page source
+    :type file_name: `str`
+
+    :return: `tuple` of (<data `bytes`>, <read seconds `float`>)
+    """
+    if log.isEnabledFor(logging.DEBUG):
+        msg = "Opening page {pg} for Markdown processing" \
+              ".".format(pg=file_name)
+        log.debug(msg)
+    start = time.perf_counter()
+    with open(file_name, 'rb') as page_file:
+        data = page_file.read()
+    return data, time.perf_counter() - start
+
+
+def convert_page(file_name, cache=None, extensions=None):
+    """
+    Convert a Markdown page source
+
+    This is a module level function so that it can be dispatched to worker
+    processes by :meth:`MarkdownGenerator.load_pages`.
+
+    :param file_name: Path of the page source
+    :type file_name: `str`
+
+    :param cache: Conversion cache to consult before converting
+    :type cache: :class:`flask_flatearth.cache.ConversionCache`
+
+    :param extensions: Markdown extension names
+    :type extensions: `list` of `str`
+
+    :return: `tuple` of (<html `str`>, <meta `dict`>, <cache hit `bool`>,
+             <timings `dict`>) with the 'read' and 'convert' seconds and the
+             source 'bytes' in the timings
+    """
+    return convert_data(file_name, read_source(file_name),
+                        cache=cache, extensions=extensions)
+
+
+def convert_data(file_name, source, cache=None, extensions=None):
+    """
+    Convert a Markdown page source that was already read
+
+    :param file_name: Path of the page source
+    :type file_name: `str`
+
+    :param source: Result of :func:`read_source` for `file_name`
+    :type source: `tuple` of (<data `bytes`>, <read seconds `float`>)
+
+    :return: Same as :func:`convert_page`
+    """
+    data, seconds = source
+    start = time.perf_counter()
+    timings = {'read': seconds, 'bytes': len(data)}
+    if cache is not None:
+        key = cache.key(data, config=config_key(extensions))
+        entry = cache.get(key)
+        if entry is not None:
+            html, meta = entry
+            timings['convert'] = time.perf_counter() - start
+            return html, meta, True, timings
+    md = converter(extensions)
+    html = md.convert(
+        data.decode('utf-8')
+    )
+    if log.isEnabledFor(logging.DEBUG):
+        msg = "Generated html {h} for {p}".format(h=html, p=file_name)
+        log.debug(msg)
+    if cache is not None:
+        cache.put(key, html, md.Meta)
+    timings['convert'] = time.perf_counter() - start
+    return html, md.Meta, False, timings
+
+
+def scan_meta(file_name, tab_length=4):
+    """
+    Read the metadata header of a Markdown page source
+
+    The file is read line by line up to the end of the header, which is
+    parsed the same way as by the `markdown.extensions.meta` extension.
+
+    :param file_name: Path of the page source
+    :type file_name: `str`
+
+    :param tab_length: Markdown tab length
+    :type tab_length: `int`
+
+    :return: `dict` of {<label `str`>: `list` of <value `str`>}
+    """
+    meta = {}
+    key = None
+    with open(file_name, 'r', encoding='utf-8') as page_file:
+        for n, line in enumerate(page_file):
+            line = line.rstrip('\n').replace(STX, "").replace(ETX, "")
+            line = line.expandtabs(tab_length)
+            if n == 0 and BEGIN_RE.match(line):
+                continue
+            if line.strip() == '' or END_RE.match(line):
+                break
+            m1 = META_RE.match(line)
+            if m1:
+                key = m1.group('key').lower().strip()
+                meta.setdefault(key, []).append(m1.group('value').strip())
+                continue
+            m2 = META_MORE_RE.match(line)
+            if m2 and key:
+                meta[key].append(m2.group('value').strip())
+            else:
+                break
+    return meta
+
+
+def config_key(extensions=None):
+    """
+    Identify the Markdown conversion configuration for cache keys
+
+    :param extensions: Markdown extension names
+    :type extensions: `list` of `str`
+
+    :return: `str`
+    """
+    return "markdown={v};extensions={e};format={f}".format(
+        v=markdown.version,
+        e=",".join(extensions if extensions else EXTENSIONS),
+        f=OUTPUT_FORMAT)
+
+
 class MarkdownGenerator(BasicContentGenerator):
     """
     Markdown content generator
+
+    When `workers` is greater than 1, the page sources are read and converted
+    in a pool of worker processes. The results are merged back in the order of
+    `page_files`, so metadata processing, duplicate slug detection and the
+    extension `_process_page` calls behave the same as a serial load.
+
+    When `readers` is greater than 0, the sources are read ahead in a pool of
+    threads, so slow storage does not hold up conversion. Reading, converting
+    and merging form a pipeline in which at most `queue_depth` sources are
+    pending in each stage, whatever the number of sources.
+
+    When a `cache` is set, converted sources are looked up by content hash
+    before invoking Markdown. Stale entries are pruned by
+    :meth:`load_pages`, not when single sources are converted again.
+
+    The Markdown extensions are read from 'FLATEARTH_MARKDOWN_EXTENSIONS'.
+    The meta extension is always loaded, as pages are built from their
+    metadata.
+
+    :var MARKDOWN_EXTENSIONS: Default Markdown extension names
+    :type MARKDOWN_EXTENSIONS: `list` of `str`
+
+    :ivar markdown_extensions: Markdown extension names
+    :type markdown_extensions: `list` of `str`
     """
+    MARKDOWN_EXTENSIONS = EXTENSIONS
 
-    def load_pages(self):
-        for page in self.page_files:
-            msg = "Opening page {pg} for Markdown processing" \
-                  ".".format(pg=page)
-            log.debug(msg)
-            with open(page, 'r') as page_file:
-                md = Markdown(
-                    extensions=['markdown.extensions.meta',
-                                UrlForExtension()],
-                    output_format='html5'
-                )
-                html = md.convert(
-                    page_file.read()
-                )
-                msg = "Generated html {h} for {p}".format(h=html, p=page_file)
-                log.debug(msg)
-                meta = self._process_meta(md.Meta)
-                if meta['type'] in self.generators:
-                    if meta['slug'] in self.pages:
-                        msg = "page slug {} already added to " \
-                              "pages".format(meta['slug'])
-                        raise KeyError(msg)
-                    else:
-                        self._process_page(meta=meta,
-                                           html=html,
-                                           file_name=page)
-                        self.pages.update(self.generators[meta['type']](
-                                app=self.app,
-                                slug=meta['slug'],
-                                meta=meta,
-                                html=html,
-                                file_name=page
-                        ))
-        msg = "Generated pages {p}".format(p=self.pages)
-        log.debug(msg)
-        for article in self.pages:
-            msg = "Evaluating {p}".format(p=self.pages[article])
-            log.debug(msg)
-            if 'author' in self.pages[article].meta:
-                for author in self.pages[article].meta['author']:
-                    msg = "Searching for existing author '{a}' " \
-                          "page".format(a=author)
+    def __init__(self, *args, markdown_extensions=None, **kwargs):
+        """
+        Initialize the MarkdownGenerator
+
+        :param markdown_extensions: Markdown extension names, where 'urlfor'
+                                    stands for :class:`UrlForExtension`
+        :type markdown_extensions: `list` of `str`
+
+        :param args: Arguments for :class:`flask_flatearth.ContentGenerator`
+        :param kwargs: Arguments for :class:`flask_flatearth.ContentGenerator`
+        """
+        self.markdown_extensions = self._with_meta(
+            markdown_extensions if markdown_extensions
+            else self.MARKDOWN_EXTENSIONS)
+        super(MarkdownGenerator, self).__init__(*args, **kwargs)
+
+    def init_app(self, app):
+        super(MarkdownGenerator, self).init_app(app)
+        self.markdown_extensions = self._with_meta(app.config.get(
+            'FLATEARTH_MARKDOWN_EXTENSIONS', self.markdown_extensions))
+
+    def convert_pages(self, page_files):
+        """
+        Convert Markdown page sources
+
+        :param page_files: Source file names to convert
+        :type page_files: `list` of `str`
+
+        :return: Iterator of (<file name `str`>, <html `str`>, <meta `dict`>)
+        """
+        convert = partial(convert_data,
+                          cache=self.cache,
+                          extensions=self.markdown_extensions)
+        read_convert = partial(convert_page,
+                               cache=self.cache,
+                               extensions=self.markdown_extensions)
+        depth = self.queue_depth
+        parallel = len(page_files) > 1
+        with ExitStack() as stack:
+            readers = None
+            if self.readers > 0 and parallel:
+                readers = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=self.readers))
+            if self.workers > 1 and parallel:
+                if log.isEnabledFor(logging.DEBUG):
+                    msg = "Converting {n} pages with {w} workers".format(
+                        n=len(page_files), w=self.workers)
                     log.debug(msg)
-                    if author in self.pages:
-                        self.pages[author].refs \
-                            += [self.pages[article], ]
-                    else:
-                        msg = "No existing author {author} for " \
-                              "{article}".format(author=author,
-                                                 article=article)
-                        log.warn(msg)
+                pool = stack.enter_context(
+                    ProcessPoolExecutor(max_workers=self.workers))
+                if readers is None:
+                    # Workers read their sources in parallel
+                    results = ordered_map(pool, read_convert, page_files,
+                                          depth=depth)
+                else:
+                    sources = ordered_map(readers, read_source, page_files,
+                                          depth=depth)
+                    results = ordered_map(pool, convert, page_files,
+                                          sources, depth=depth)
+            elif readers is not None:
+                sources = ordered_map(readers, read_source, page_files,
+                                      depth=depth)
+                results = map(convert, page_files, sources)
+            else:
+                results = map(read_convert, page_files)
+            for page, result in zip(page_files, results):
+                yield self._converted(page, *result)
+
+    def convert_source(self, file_name):
+        page, html, meta = self._converted(file_name, *convert_page(
+            file_name,
+            cache=self.cache,
+            extensions=self.markdown_extensions))
+        return html, meta
+
+    def scan_pages(self, page_files):
+        """
+        Read the metadata header of Markdown page sources
+
+        :param page_files: Source file names to scan
+        :type page_files: `list` of `str`
+
+        :return: Iterator of (<file name `str`>, <meta `dict`>)
+        """
+        for page in page_files:
+            with self.metrics.timer('scan', source=page):
+                meta = scan_meta(page)
+            yield page, meta
+
+    def _converted(self, page, html, meta, cached, timings):
+        if self.cache is not None:
+            self.cache.record(cached)
+        self.metrics.record('read', timings['read'], source=page)
+        self.metrics.record('convert', timings['convert'], source=page)
+        self.metrics.record_source(page, timings['bytes'])
+        return page, html, meta
+
+    def _with_meta(self, extensions):
+        if META_EXTENSION in extensions:
+            return list(extensions)
+        return [META_EXTENSION, ] + list(extensions)
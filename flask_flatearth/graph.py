@@ -0,0 +1,105 @@
+class ReferenceGraph(object):
+    """
+    References between pages by slug
+
+    Edges are typed by `kind`, such as 'author' from an article to its
+    author, 'topic' from a page to its topic or 'set' from a listing page to
+    the pages it lists. Both directions are indexed, so the targets of a
+    page and the pages referencing it are found with a single lookup. Edges
+    keep the order they were added in, and adding an edge twice has no
+    effect.
+
+    The graph is filled by the ContentGenerator and its extensions as pages
+    are processed, and is available to templates as `graph`.
+
+    :ivar forward: Targets by kind and source slug
+    :type forward: `dict` of {<kind `str`>: {<slug `str`>: `list` of \
+            <slug `str`>}}
+
+    :ivar reverse: Sources by kind and target slug
+    :type reverse: `dict` of {<kind `str`>: {<slug `str`>: `list` of \
+            <slug `str`>}}
+    """
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __repr__(self):
+        msg = "{cls}()".format(cls=self.__class__.__name__)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} edges={n}>".format(cls=self.__class__.__name__,
+                                         n=len(self))
+        return msg
+
+    def clear(self):
+        """
+        Remove all edges
+        """
+        self.forward = {}
+        self.reverse = {}
+        self.edges = set()
+
+    def add(self, source, target, kind):
+        """
+        Add a reference
+
+        :param source: Slug of the referencing page
+        :type source: `str`
+
+        :param target: Slug of the referenced page
+        :type target: `str`
+
+        :param kind: Kind of reference
+        :type kind: `str`
+        """
+        edge = (kind, source, target)
+        if edge in self.edges:
+            return
+        self.edges.add(edge)
+        self.forward.setdefault(kind, {}).setdefault(source, []) \
+            .append(target)
+        self.reverse.setdefault(kind, {}).setdefault(target, []) \
+            .append(source)
+
+    def targets(self, source, kind):
+        """
+        Slugs referenced by a page
+
+        :param source: Slug of the referencing page
+        :type source: `str`
+
+        :param kind: Kind of reference
+        :type kind: `str`
+
+        :return: `list` of `str`, which must not be modified
+        """
+        return self.forward.get(kind, {}).get(source, [])
+
+    def sources(self, target, kind):
+        """
+        Slugs of the pages referencing a page
+
+        :param target: Slug of the referenced page
+        :type target: `str`
+
+        :param kind: Kind of reference
+        :type kind: `str`
+
+        :return: `list` of `str`, which must not be modified
+        """
+        return self.reverse.get(kind, {}).get(target, [])
+
+    def referenced(self, kind):
+        """
+        Slugs referenced with a kind, in the order first referenced
+
+        :param kind: Kind of reference
+        :type kind: `str`
+
+        :return: `list` of `str`
+        """
+        return list(self.reverse.get(kind, {}))
@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+PHASES = ['walk', 'scan', 'read', 'convert', 'meta', 'process_page',
+          'compile_templates', 'register_rules', 'register_view',
+          'load_snapshot']
+
+
+class Metrics(object):
+    """
+    Timings and sizes recorded while generating pages
+
+    Time spent is recorded per phase, and per source file for the 'scan',
+    'read', 'convert', 'meta' and 'process_page' phases or per page slug for
+    the 'register_rules' and 'register_view' phases. Template load and compile
+    time is recorded per template name in the 'compile_templates' phase, apart
+    from the rendering of the pages. Pages are linked to their
+    source file, so :meth:`slowest` reports the whole time spent on a page
+    from reading its source to rendering its view.
+
+    Timings accumulate across `generate()` and `regenerate()` calls until
+    :meth:`reset`.
+
+    :ivar phases: Seconds spent and number of calls by phase
+    :type phases: `dict` of {<phase `str`>: {'seconds': `float`, \
+            'count': `int`}}
+
+    :ivar sources: Seconds by phase and source size by source file name
+    :type sources: `dict` of {<file name `str`>: `dict`}
+
+    :ivar pages: Seconds by phase, rendered size and source file by page slug
+    :type pages: `dict` of {<slug `str`>: `dict`}
+
+    :ivar templates: Seconds spent loading each template
+    :type templates: `dict` of {<template name `str`>: `float`}
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def __repr__(self):
+        msg = "{cls}()".format(cls=self.__class__.__name__)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} pages={n}>".format(cls=self.__class__.__name__,
+                                        n=len(self.pages))
+        return msg
+
+    def reset(self):
+        """
+        Discard all recorded timings
+        """
+        with self.lock:
+            self.phases = {p: {'seconds': 0.0, 'count': 0}
+                           for p in PHASES}
+            self.sources = {}
+            self.pages = {}
+            self.templates = {}
+
+    def record(self, phase, seconds, source=None, page=None, template=None):
+        """
+        Record time spent in a phase
+
+        :param phase: Phase name
+        :type phase: `str`
+
+        :param seconds: Time spent
+        :type seconds: `float`
+
+        :param source: Source file name the time was spent on
+        :type source: `str`
+
+        :param page: Page slug the time was spent on
+        :type page: `str`
+
+        :param template: Template name the time was spent on
+        :type template: `str`
+        """
+        with self.lock:
+            totals = self.phases.setdefault(phase,
+                                            {'seconds': 0.0, 'count': 0})
+            totals['seconds'] += seconds
+            totals['count'] += 1
+            entry = None
+            if page is not None:
+                entry = self.pages.setdefault(page, {})
+            elif source is not None:
+                entry = self.sources.setdefault(source, {})
+            if entry is not None:
+                entry[phase] = entry.get(phase, 0.0) + seconds
+            if template is not None:
+                self.templates[template] = \
+                    self.templates.get(template, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase, source=None, page=None, template=None):
+        """
+        Time the enclosed block
+
+        Example::
+
+            with metrics.timer('meta', source=file_name):
+                meta = process(meta)
+
+        :param phase: Phase name
+        :type phase: `str`
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start,
+                        source=source, page=page, template=template)
+
+    def record_source(self, source, size):
+        """
+        Record the size of a source file
+
+        :param source: Source file name
+        :type source: `str`
+
+        :param size: Size in bytes
+        :type size: `int`
+        """
+        with self.lock:
+            self.sources.setdefault(source, {})['bytes'] = size
+
+    def record_page(self, page, source=None, size=None):
+        """
+        Link a page to its source file and record its rendered size
+
+        :param page: Page slug
+        :type page: `str`
+
+        :param source: Source file name of the page
+        :type source: `str`
+
+        :param size: Rendered size in bytes
+        :type size: `int`
+        """
+        with self.lock:
+            entry = self.pages.setdefault(page, {})
+            if source is not None:
+                entry['source'] = source
+            if size is not None:
+                entry['bytes'] = size
+
+    def slowest(self, n=10):
+        """
+        Pages that took the longest, slowest first
+
+        :param n: Number of pages to report
+        :type n: `int`
+
+        :return: `list` of `dict` with the page 'slug', total 'seconds',
+                 'bytes' rendered and time by phase
+        """
+        with self.lock:
+            report = []
+            for slug in self.pages:
+                entry = self.pages[slug]
+                source = self.sources.get(entry.get('source'), {})
+                phases = {p: v for p, v in source.items() if p != 'bytes'}
+                for p in entry:
+                    if p not in ['source', 'bytes']:
+                        phases[p] = phases.get(p, 0.0) + entry[p]
+                report.append({'slug': slug,
+                               'seconds': sum(phases.values()),
+                               'bytes': entry.get('bytes'),
+                               'source': entry.get('source'),
+                               'source_bytes': source.get('bytes'),
+                               'phases': phases})
+            report.sort(key=lambda r: r['seconds'], reverse=True)
+            return report[:n]
+
+    def as_dict(self, slowest=10):
+        """
+        Recorded metrics
+
+        :param slowest: Number of slowest pages to include
+        :type slowest: `int`
+
+        :return: `dict` with 'phases', 'pages', 'sources', 'templates' and
+                 'slowest'
+        """
+        with self.lock:
+            return {'phases': {p: dict(v) for p, v in self.phases.items()},
+                    'pages': {s: dict(v) for s, v in self.pages.items()},
+                    'sources': {s: dict(v) for s, v in self.sources.items()},
+                    'templates': dict(self.templates),
+                    'slowest': self.slowest(slowest)}
+
+    def to_json(self, slowest=10, indent=None):
+        """
+        Recorded metrics as a JSON report
+
+        :return: `str`
+        """
+        return json.dumps(self.as_dict(slowest=slowest),
+                          indent=indent,
+                          sort_keys=True)
+
+    def prometheus(self, slowest=10):
+        """
+        Recorded metrics in the Prometheus text exposition format
+
+        Phase totals are reported for every phase, and per page timings only
+        for the `slowest` pages to keep the number of series bounded.
+
+        :return: `str`
+        """
+        with self.lock:
+            lines = [
+                "# HELP flatearth_phase_seconds_total Seconds spent by phase",
+                "# TYPE flatearth_phase_seconds_total counter"]
+            for phase in sorted(self.phases):
+                lines.append('flatearth_phase_seconds_total{{phase="{p}"}} '
+                             '{v:.6f}'.format(p=phase,
+                                              v=self.phases[phase]['seconds']))
+            lines.extend([
+                "# HELP flatearth_phase_calls_total Calls timed by phase",
+                "# TYPE flatearth_phase_calls_total counter"])
+            for phase in sorted(self.phases):
+                lines.append('flatearth_phase_calls_total{{phase="{p}"}} '
+                             '{v}'.format(p=phase,
+                                          v=self.phases[phase]['count']))
+            lines.extend([
+                "# HELP flatearth_pages Pages with recorded metrics",
+                "# TYPE flatearth_pages gauge",
+                "flatearth_pages {n}".format(n=len(self.pages)),
+                "# HELP flatearth_template_seconds Seconds spent loading and "
+                "compiling each template",
+                "# TYPE flatearth_template_seconds gauge"])
+            for name in sorted(self.templates):
+                lines.append('flatearth_template_seconds{{template="{t}"}} '
+                             '{v:.6f}'.format(t=_label(name),
+                                              v=self.templates[name]))
+            lines.extend([
+                "# HELP flatearth_page_seconds Seconds spent on the slowest "
+                "pages",
+                "# TYPE flatearth_page_seconds gauge"])
+            report = self.slowest(slowest)
+            for r in report:
+                lines.append('flatearth_page_seconds{{slug="{s}"}} '
+                             '{v:.6f}'.format(s=_label(r['slug']),
+                                              v=r['seconds']))
+            lines.extend([
+                "# HELP flatearth_page_bytes Rendered bytes of the slowest "
+                "pages",
+                "# TYPE flatearth_page_bytes gauge"])
+            for r in report:
+                if r['bytes'] is not None:
+                    lines.append('flatearth_page_bytes{{slug="{s}"}} '
+                                 '{v}'.format(s=_label(r['slug']),
+                                              v=r['bytes']))
+            return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
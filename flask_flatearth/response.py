@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import zlib
+
+import flask
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _gzip_compress(data):
+    return gzip.compress(data, mtime=0)
+
+
+def _brotli_compress(data):
+    return brotli.compress(data)
+
+
+def _brotli_decompress(data):
+    return brotli.decompress(data)
+
+
+CODECS = {'zlib': (zlib.compress, zlib.decompress),
+          'gzip': (_gzip_compress, gzip.decompress),
+          'br': (_brotli_compress, _brotli_decompress)}
+
+CONTENT_ENCODINGS = ['br', 'gzip']
+
+
+class PreparedPage(object):
+    """
+    Rendered page prepared for serving
+
+    The strong ETag and the encoded variants are computed once when the page
+    is prepared. Responses answer conditional requests with 304 and pick the
+    best variant accepted by the client.
+
+    The identity body may be left out when an encoded variant is held, in
+    which case it is decoded from that variant when needed. The body and
+    variants may be `memoryview` slices of a mapped store file, and are only
+    copied to `bytes` when a response is made.
+
+    :ivar etag: Strong entity tag of the identity body, without quotes
+    :type etag: `str`
+
+    :ivar last_modified: Last modification of the page content
+    :type last_modified: :class:`datetime.datetime`
+
+    :ivar encoded: Encoded variants of the body
+    :type encoded: `dict` of {<codec `str`>: <data `bytes`>}
+    """
+    def __init__(self, body=None, etag=None, last_modified=None,
+                 encoded=None):
+        """
+        Initialize the PreparedPage
+
+        :param body: Identity body
+        :type body: `bytes`
+
+        :param etag: Strong entity tag, computed from `body` if `None`
+        :type etag: `str`
+
+        :param last_modified: Last modification of the page content
+        :type last_modified: :class:`datetime.datetime`
+
+        :param encoded: Encoded variants of the body
+        :type encoded: `dict` of {<codec `str`>: <data `bytes`>}
+        """
+        self._body = body
+        self.encoded = encoded if encoded else {}
+        self.etag = etag if etag else hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+
+    @classmethod
+    def prepare(cls, content, last_modified=None, encodings=()):
+        """
+        Prepare rendered content
+
+        :param content: Rendered content
+        :type content: `str`
+
+        :param last_modified: Last modification of the page content
+        :type last_modified: :class:`datetime.datetime`
+
+        :param encodings: Codecs to precompute variants for. Unavailable
+                          codecs are skipped.
+        :type encodings: `list` of `str`
+
+        :return: :class:`PreparedPage`
+        """
+        body = content.encode('utf-8')
+        encoded = {e: CODECS[e][0](body) for e in encodings
+                   if e in CODECS and (e != 'br' or brotli is not None)}
+        return cls(body, last_modified=last_modified, encoded=encoded)
+
+    def __repr__(self):
+        msg = "{cls}(etag='{etag}', encoded={enc})".format(
+            cls=self.__class__.__name__,
+            etag=self.etag,
+            enc=list(self.encoded))
+        return msg
+
+    @property
+    def body(self):
+        if self._body is None:
+            codec = next(iter(self.encoded))
+            return CODECS[codec][1](self.encoded[codec])
+        return self._body
+
+    @property
+    def content(self):
+        """
+        Rendered content
+
+        :return: `str`
+        """
+        return str(self.body, 'utf-8')
+
+    @property
+    def size(self):
+        """
+        Bytes held by the prepared page
+
+        :return: `int`
+        """
+        size = len(self._body) if self._body is not None else 0
+        return size + sum(len(d) for d in self.encoded.values())
+
+    def compact(self, codec, keep=()):
+        """
+        Copy holding only compressed variants of the body
+
+        :param codec: Codec of the variant held if none of `keep` is held
+        :type codec: `str`
+
+        :param keep: Codecs of the held variants to keep
+        :type keep: `list` of `str`
+
+        :return: :class:`PreparedPage`
+        """
+        encoded = {c: self.encoded[c] for c in keep if c in self.encoded}
+        if not encoded:
+            data = self.encoded.get(codec)
+            if data is None:
+                data = CODECS[codec][0](self.body)
+            encoded = {codec: data}
+        return self.__class__(etag=self.etag,
+                              last_modified=self.last_modified,
+                              encoded=encoded)
+
+    def response(self, request=None):
+        """
+        Response for a request
+
+        :param request: Request to respond to, default `flask.request`
+        :type request: :class:`flask.Request`
+
+        :return: :class:`flask.Response`
+        """
+        request = request if request is not None else flask.request
+        offered = [e for e in CONTENT_ENCODINGS if e in self.encoded]
+        encoding = None
+        if offered:
+            encoding = request.accept_encodings.best_match(offered)
+        if encoding:
+            response = flask.Response(bytes(self.encoded[encoding]))
+            response.content_encoding = encoding
+            response.set_etag('{}-{}'.format(self.etag, encoding))
+        else:
+            response = flask.Response(bytes(self.body))
+            response.set_etag(self.etag)
+        if self.encoded:
+            response.vary.add('Accept-Encoding')
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        return response.make_conditional(request)
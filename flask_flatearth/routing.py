@@ -0,0 +1,120 @@
+import logging
+import threading
+
+try:
+    from werkzeug.routing.matcher import State
+except ImportError:
+    State = None
+
+
+log = logging.getLogger('flask_flatearth.routing')
+
+lock = threading.Lock()
+
+
+def add_late_rules(app, urls, endpoint, methods=('GET', 'OPTIONS')):
+    """
+    Add url rules to an app that may already be serving requests
+
+    Flask refuses :meth:`flask.Flask.add_url_rule` once it has handled a
+    request, so the rules are added to the url map directly, with the
+    methods `add_url_rule()` would set up for a view.
+
+    Requests match against the url map while rules are added, which
+    :meth:`werkzeug.routing.Map.add` does not support: the rules it matches
+    with are modified and sorted in place. The states of the url map matcher
+    along the paths of the new rules are copied instead, and the matcher is
+    swapped for one holding the copies once they are complete, so requests
+    match with either the previous or the new rules. Other states are shared
+    between both.
+
+    :param app: Flask app
+    :type app: :class:`flask.Flask`
+
+    :param urls: URL rules
+    :type urls: `list` of `str`
+
+    :param endpoint: Endpoint of the rules
+    :type endpoint: `str`
+
+    :param methods: HTTP methods of the rules
+    :type methods: `list` of `str`
+
+    :return: `list` of :class:`werkzeug.routing.Rule` added
+    """
+    url_map = app.url_map
+    rules = []
+    for url in urls:
+        r = app.url_rule_class(url, endpoint=endpoint, methods=list(methods))
+        r.provide_automatic_options = True
+        rules.append(r)
+    with lock:
+        matcher = getattr(url_map, '_matcher', None)
+        if State is None or not hasattr(matcher, '_root'):
+            for r in rules:
+                url_map.add(r)
+            return rules
+        url_map.update()
+        swapped = type(matcher)(matcher.merge_slashes)
+        swapped._root = _copy_state(matcher._root)
+        copied = {id(swapped._root)}
+        by_endpoint = dict(url_map._rules_by_endpoint)
+        for r in rules:
+            r.bind(url_map)
+            if not r.build_only:
+                _insert(swapped._root, r, copied)
+            by_endpoint[endpoint] = sorted(
+                by_endpoint.get(endpoint, []) + [r],
+                key=lambda rule: rule.build_compare_key())
+        url_map._rules_by_endpoint = by_endpoint
+        url_map._matcher = swapped
+    if log.isEnabledFor(logging.DEBUG):
+        msg = "Added late rules {u} for {e}".format(u=urls, e=endpoint)
+        log.debug(msg)
+    return rules
+
+
+def _copy_state(state):
+    return State(dynamic=list(state.dynamic),
+                 rules=list(state.rules),
+                 static=dict(state.static))
+
+
+def _insert(root, rule, copied):
+    """
+    Add a rule to a matcher tree, copying the states it passes through
+
+    This follows :meth:`werkzeug.routing.matcher.StateMachineMatcher.add`.
+
+    :param root: Root state, already copied
+    :type root: :class:`werkzeug.routing.matcher.State`
+
+    :param rule: Bound rule
+    :type rule: :class:`werkzeug.routing.Rule`
+
+    :param copied: Ids of the states copied or created so far
+    :type copied: `set` of `int`
+    """
+    state = root
+    for part in rule._parts:
+        if part.static:
+            child = state.static.get(part.content)
+            if child is None:
+                child = State()
+            elif id(child) not in copied:
+                child = _copy_state(child)
+            state.static[part.content] = child
+        else:
+            for n, (test_part, child) in enumerate(state.dynamic):
+                if test_part == part:
+                    if id(child) not in copied:
+                        child = _copy_state(child)
+                        state.dynamic[n] = (test_part, child)
+                    break
+            else:
+                child = State()
+                state.dynamic.append((part, child))
+                state.dynamic.sort(key=lambda entry: entry[0].weight)
+        copied.add(id(child))
+        state = child
+    state.rules.append(rule)
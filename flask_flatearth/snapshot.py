@@ -0,0 +1,132 @@
+import gc
+import logging
+import os
+import pickle
+import struct
+import tempfile
+
+from .store import MappedPageStore, dump_store
+
+
+log = logging.getLogger('flask_flatearth.snapshot')
+
+
+SNAPSHOT_MAGIC = b'FESS'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sHxxQQQQ')
+
+
+def write_snapshot(path, boot, state, pages):
+    """
+    Write a snapshot of generated content
+
+    The file holds a header, a page store of the rendered pages as written
+    by :func:`flask_flatearth.store.dump_store`, then the pickled `boot` and
+    `state` sections. The boot section holds what is needed to serve the
+    pages, so it is kept small, while the state section is only read when
+    needed. Like :func:`flask_flatearth.store.write_store`, the snapshot is
+    written to a temporary file which is then renamed into place.
+
+    :param path: Snapshot file name
+    :type path: `str`
+
+    :param boot: State read when the snapshot is loaded
+    :type boot: `dict`
+
+    :param state: State read when first needed
+    :type state: `dict`
+
+    :param pages: Slugs and their rendered pages
+    :type pages: Iterable of (<slug `str`>, \
+            :class:`flask_flatearth.response.PreparedPage`)
+
+    :return: `int` number of pages written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                         0, 0, 0, 0))
+            written = dump_store(f, pages)
+            sections = []
+            for section in (boot, state):
+                offset = f.tell()
+                pickle.dump(section, f, protocol=pickle.HIGHEST_PROTOCOL)
+                sections += [offset, f.tell() - offset]
+            f.seek(0)
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                         *sections))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return written
+
+
+def read_snapshot(path):
+    """
+    Read the boot section of a snapshot written by :func:`write_snapshot`
+
+    The rendered pages are not read, but mapped by the returned store.
+
+    :param path: Snapshot file name
+    :type path: `str`
+
+    :raise RuntimeError: if the file is not a snapshot of this version
+
+    :return: `tuple` of (<boot `dict`>, \
+            :class:`flask_flatearth.store.MappedPageStore`)
+    """
+    boot = _read_section(path, 0)
+    store = MappedPageStore(path, offset=SNAPSHOT_HEADER.size)
+    if log.isEnabledFor(logging.DEBUG):
+        msg = "Read snapshot {p} with {n} pages".format(p=path,
+                                                        n=len(store.index))
+        log.debug(msg)
+    return boot, store
+
+
+def read_snapshot_state(path):
+    """
+    Read the state section of a snapshot written by :func:`write_snapshot`
+
+    :param path: Snapshot file name
+    :type path: `str`
+
+    :raise RuntimeError: if the file is not a snapshot of this version
+
+    :return: `dict`
+    """
+    return _read_section(path, 1)
+
+
+def _read_section(path, section):
+    """
+    Unpickle a section of a snapshot
+
+    Sections are unpickled, so snapshots must only be read from trusted
+    locations. Garbage collection is paused while unpickling, as sections
+    hold many objects but no garbage.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+        fields = SNAPSHOT_HEADER.unpack(header) \
+            if len(header) == SNAPSHOT_HEADER.size else (None, None)
+        if fields[:2] != (SNAPSHOT_MAGIC, SNAPSHOT_VERSION):
+            msg = "{p} is not a version {v} snapshot file".format(
+                p=path, v=SNAPSHOT_VERSION)
+            raise RuntimeError(msg)
+        offset, length = fields[2 + 2 * section:4 + 2 * section]
+        f.seek(offset)
+        data = f.read(length)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
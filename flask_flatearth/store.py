@@ -0,0 +1,566 @@
+import datetime
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .response import CODECS, CONTENT_ENCODINGS, PreparedPage, brotli
+
+
+log = logging.getLogger('flask_flatearth.store')
+
+
+class PageStore(object):
+    """
+    Store for rendered pages
+
+    Views registered with a store look up the
+    :class:`flask_flatearth.response.PreparedPage` by page slug on each
+    request, and render the page again when the store does not hold it. The
+    base store keeps every page.
+
+    :ivar hits: Number of lookups served from the store
+    :type hits: `int`
+
+    :ivar misses: Number of lookups not held by the store
+    :type misses: `int`
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __repr__(self):
+        msg = "{cls}()".format(cls=self.__class__.__name__)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} pages={n}>".format(cls=self.__class__.__name__,
+                                        n=len(self))
+        return msg
+
+    def get(self, slug):
+        """
+        Fetch a rendered page
+
+        :param slug: Page slug
+        :type slug: `str`
+
+        :return: :class:`flask_flatearth.response.PreparedPage` or `None`
+        """
+        with self.lock:
+            page = self.pages.get(slug)
+            if page is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return page
+
+    def put(self, slug, page):
+        """
+        Store a rendered page
+
+        :param slug: Page slug
+        :type slug: `str`
+
+        :param page: Rendered page
+        :type page: :class:`flask_flatearth.response.PreparedPage`
+        """
+        with self.lock:
+            self.pages[slug] = page
+
+    def discard(self, slug):
+        """
+        Drop a rendered page if held
+
+        :param slug: Page slug
+        :type slug: `str`
+        """
+        with self.lock:
+            self.pages.pop(slug, None)
+
+    def stats(self):
+        """
+        Store statistics
+
+        :return: `dict` of counters
+        """
+        return {'pages': len(self),
+                'hits': self.hits,
+                'misses': self.misses}
+
+
+class LRUPageStore(PageStore):
+    """
+    Page store holding at most `max_pages` rendered pages
+
+    The least recently requested page is dropped when the store is full.
+
+    :var MAX_PAGES: Default number of pages held
+    :type MAX_PAGES: `int`
+
+    :ivar evictions: Number of pages dropped to stay within `max_pages`
+    :type evictions: `int`
+    """
+    MAX_PAGES = 1000
+
+    def __init__(self, max_pages=None):
+        super(LRUPageStore, self).__init__()
+        self.max_pages = max_pages if max_pages else self.MAX_PAGES
+        self.pages = OrderedDict()
+        self.evictions = 0
+
+    def __repr__(self):
+        msg = "{cls}(max_pages={n})".format(cls=self.__class__.__name__,
+                                           n=self.max_pages)
+        return msg
+
+    def get(self, slug):
+        with self.lock:
+            page = self.pages.get(slug)
+            if page is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.pages.move_to_end(slug)
+            return page
+
+    def put(self, slug, page):
+        with self.lock:
+            self.pages[slug] = page
+            self.pages.move_to_end(slug)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        stats = super(LRUPageStore, self).stats()
+        stats.update({'evictions': self.evictions})
+        return stats
+
+
+class CompressedPageStore(PageStore):
+    """
+    Page store holding compressed pages within a byte budget
+
+    Pages are held with only compressed variants: the 'gzip' and 'br'
+    variants they were prepared with for serving, or else their `codec`
+    variant. The least recently requested pages are dropped once the held
+    size exceeds `max_bytes`. Clients accepting a held encoding are served
+    its bytes directly. With a `spill_path`, dropped pages are written to
+    that directory and loaded back on their next request instead of being
+    rendered again.
+
+    The codecs are 'zlib', 'gzip' and 'br'. The 'br' codec requires the
+    optional `brotli` package.
+
+    :var MAX_BYTES: Default byte budget
+    :type MAX_BYTES: `int`
+
+    :var CODEC: Default codec
+    :type CODEC: `str`
+
+    :ivar bytes: Compressed bytes held in memory
+    :type bytes: `int`
+
+    :ivar evictions: Number of pages dropped to stay within `max_bytes`
+    :type evictions: `int`
+
+    :ivar spill_hits: Number of lookups loaded back from `spill_path`
+    :type spill_hits: `int`
+    """
+    MAX_BYTES = 64 * 1024 * 1024
+    CODEC = 'zlib'
+
+    def __init__(self, max_bytes=None, codec=None, spill_path=None):
+        """
+        Initialize the CompressedPageStore
+
+        :param max_bytes: Byte budget for compressed pages in memory
+        :type max_bytes: `int`
+
+        :param codec: Compression codec
+        :type codec: `str`
+
+        :param spill_path: Directory for pages dropped from memory
+        :type spill_path: `str`
+        """
+        super(CompressedPageStore, self).__init__()
+        self.max_bytes = max_bytes if max_bytes else self.MAX_BYTES
+        self.codec = codec if codec else self.CODEC
+        if self.codec not in CODECS:
+            msg = "Unknown page store codec '{}'".format(self.codec)
+            raise RuntimeError(msg)
+        if self.codec == 'br' and brotli is None:
+            msg = "Page store codec 'br' requires the brotli package"
+            raise RuntimeError(msg)
+        self.spill_path = spill_path
+        if spill_path:
+            os.makedirs(spill_path, exist_ok=True)
+        self.pages = OrderedDict()
+        self.spilled = {}
+        self.bytes = 0
+        self.evictions = 0
+        self.spill_hits = 0
+
+    def __repr__(self):
+        msg = "{cls}(max_bytes={mb}, codec='{c}', spill_path={sp})".format(
+            cls=self.__class__.__name__,
+            mb=self.max_bytes,
+            c=self.codec,
+            sp=self.spill_path)
+        return msg
+
+    def get(self, slug):
+        with self.lock:
+            page = self.pages.get(slug)
+            if page is not None:
+                self.hits += 1
+                self.pages.move_to_end(slug)
+                return page
+            spilled = self.spilled.get(slug)
+        page = self._read_spill(slug, spilled)
+        with self.lock:
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.spill_hits += 1
+            self._hold(slug, page)
+        return page
+
+    def put(self, slug, page):
+        page = page.compact(self.codec, keep=CONTENT_ENCODINGS)
+        self._remove_spill(slug)
+        with self.lock:
+            self._hold(slug, page)
+
+    def discard(self, slug):
+        self._remove_spill(slug)
+        with self.lock:
+            page = self.pages.pop(slug, None)
+            if page is not None:
+                self.bytes -= page.size
+
+    def stats(self):
+        stats = super(CompressedPageStore, self).stats()
+        lookups = self.hits + self.misses
+        stats.update({'bytes': self.bytes,
+                      'evictions': self.evictions,
+                      'spill_hits': self.spill_hits,
+                      'hit_rate': self.hits / lookups if lookups else 0.0})
+        return stats
+
+    def _hold(self, slug, page):
+        previous = self.pages.pop(slug, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self.spilled.pop(slug, None)
+        self.pages[slug] = page
+        self.bytes += page.size
+        while self.bytes > self.max_bytes and len(self.pages) > 1:
+            evicted, evicted_page = self.pages.popitem(last=False)
+            self.bytes -= evicted_page.size
+            self.evictions += 1
+            self._write_spill(evicted, evicted_page)
+
+    def _spill_file(self, slug, codec):
+        name = hashlib.sha1(slug.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_path, name + '.' + codec)
+
+    def _read_spill(self, slug, spilled):
+        if spilled is None:
+            return None
+        etag, last_modified, codecs = spilled
+        encoded = {}
+        try:
+            for codec in codecs:
+                with open(self._spill_file(slug, codec), 'rb') as f:
+                    encoded[codec] = f.read()
+        except FileNotFoundError:
+            return None
+        return PreparedPage(etag=etag,
+                            last_modified=last_modified,
+                            encoded=encoded)
+
+    def _remove_spill(self, slug):
+        with self.lock:
+            spilled = self.spilled.pop(slug, None)
+        if spilled is not None:
+            for codec in spilled[2]:
+                try:
+                    os.remove(self._spill_file(slug, codec))
+                except FileNotFoundError:
+                    pass
+
+    def _write_spill(self, slug, page):
+        if not self.spill_path:
+            return
+        written = []
+        for codec in page.encoded:
+            fd, tmp = tempfile.mkstemp(dir=self.spill_path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(page.encoded[codec])
+                os.replace(tmp, self._spill_file(slug, codec))
+                written.append(self._spill_file(slug, codec))
+            except OSError as e:
+                msg = "Unable to spill page {s}: {e}".format(s=slug, e=e)
+                log.warning(msg)
+                for name in [tmp] + written:
+                    try:
+                        os.remove(name)
+                    except FileNotFoundError:
+                        pass
+                return
+        self.spilled[slug] = (page.etag, page.last_modified,
+                              tuple(page.encoded))
+
+
+STORE_MAGIC = b'FEPS'
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct('<4sHxxQQ')
+
+
+def write_store(path, pages):
+    """
+    Write rendered pages to a store file for :class:`MappedPageStore`
+
+    The file holds a header, the page bodies and encoded variants one after
+    the other, and a JSON index of their offsets by page slug. Pages are
+    streamed to a temporary file which is then renamed into place, so
+    processes mapping the previous file keep serving it.
+
+    :param path: Store file name
+    :type path: `str`
+
+    :param pages: Slugs and their rendered pages
+    :type pages: Iterable of (<slug `str`>, \
+            :class:`flask_flatearth.response.PreparedPage`)
+
+    :return: `int` number of pages written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            written = dump_store(f, pages)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return written
+
+
+def dump_store(f, pages):
+    """
+    Write rendered pages as a store at the current position of a file
+
+    Offsets in the store are relative to its header, so a store can be
+    embedded in a larger file and mapped with the `offset` of
+    :class:`MappedPageStore`.
+
+    :param f: File opened for writing in binary mode, which must be seekable
+    :type f: file object
+
+    :param pages: Slugs and their rendered pages
+    :type pages: Iterable of (<slug `str`>, \
+            :class:`flask_flatearth.response.PreparedPage`)
+
+    :return: `int` number of pages written
+    """
+    start = f.tell()
+    index = {}
+    f.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, 0, 0))
+    offset = 0
+    for slug, page in pages:
+        variants = {'identity': page.body}
+        variants.update(page.encoded)
+        entry = {}
+        for name, data in variants.items():
+            f.write(data)
+            entry[name] = (offset, len(data))
+            offset += len(data)
+        modified = page.last_modified.timestamp() \
+            if page.last_modified is not None else None
+        index[slug] = (page.etag, modified, entry)
+    data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    f.write(data)
+    end = f.tell()
+    f.seek(start)
+    f.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION,
+                              STORE_HEADER.size + offset, len(data)))
+    f.seek(end)
+    return len(index)
+
+
+class MappedPageStore(PageStore):
+    """
+    Page store serving pages from a memory mapped store file
+
+    The store file is written once by :func:`write_store`, usually by
+    :meth:`flask_flatearth.ContentGenerator.publish` in a master process,
+    and mapped read only by every worker process. Bodies are sliced out of
+    the mapping with `memoryview` and never copied into the store, so the
+    workers share a single copy of the rendered pages through the page cache.
+
+    Pages put in the store are held in memory by the process and take
+    precedence over the store file. Discarded pages are no longer served from
+    the store file, so regenerated pages are rendered again.
+
+    :ivar path: Store file name
+    :type path: `str`
+
+    :ivar offset: Position of the store in the file
+    :type offset: `int`
+
+    :ivar index: Entity tag, last modification timestamp and variant
+                 offsets by page slug
+    :type index: `dict` of {<slug `str`>: `list`}
+
+    :ivar masked: Slugs discarded by this process, no longer served from the
+                  store file
+    :type masked: `set` of `str`
+    """
+    def __init__(self, path, offset=0):
+        """
+        Initialize the MappedPageStore
+
+        A missing store file is logged and leaves the store empty.
+
+        :param path: Store file name
+        :type path: `str`
+
+        :param offset: Position of the store in the file, for stores embedded
+                       by :func:`dump_store`
+        :type offset: `int`
+
+        :raise RuntimeError: if the file is not a store file of this version
+        """
+        super(MappedPageStore, self).__init__()
+        self.path = path
+        self.offset = offset
+        self.index = {}
+        self.masked = set()
+        self.map = None
+        self.view = None
+        try:
+            with open(path, 'rb') as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            msg = "Page store file {p} not found. Pages will be rendered " \
+                  "by this process.".format(p=path)
+            log.warning(msg)
+            return
+        except ValueError:
+            msg = "Page store file {p} is empty".format(p=path)
+            raise RuntimeError(msg)
+        magic = version = None
+        if len(self.map) >= offset + STORE_HEADER.size:
+            magic, version, index_offset, index_length = \
+                STORE_HEADER.unpack_from(self.map, offset)
+        if magic != STORE_MAGIC or version != STORE_VERSION \
+                or offset + index_offset + index_length > len(self.map):
+            self.map.close()
+            msg = "{p} is not a version {v} page store file".format(
+                p=path, v=STORE_VERSION)
+            raise RuntimeError(msg)
+        self.view = memoryview(self.map)
+        self.base = offset + STORE_HEADER.size
+        index_offset += offset
+        self.index = json.loads(
+            self.view[index_offset:index_offset + index_length].tobytes())
+
+    def __len__(self):
+        return len(self.pages) + len(
+            [s for s in self.index
+             if s not in self.pages and s not in self.masked])
+
+    def __repr__(self):
+        msg = "{cls}('{p}')".format(cls=self.__class__.__name__,
+                                    p=self.path)
+        return msg
+
+    def get(self, slug):
+        with self.lock:
+            page = self.pages.get(slug)
+            entry = None
+            if page is None and slug not in self.masked:
+                entry = self.index.get(slug)
+            if page is None and entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        if page is not None:
+            return page
+        etag, modified, variants = entry
+        slices = {}
+        for name, (offset, length) in variants.items():
+            start = self.base + offset
+            slices[name] = self.view[start:start + length]
+        if modified is not None:
+            modified = datetime.datetime.fromtimestamp(
+                modified, datetime.timezone.utc)
+        body = slices.pop('identity')
+        return PreparedPage(body, etag=etag, last_modified=modified,
+                            encoded=slices)
+
+    def put(self, slug, page):
+        with self.lock:
+            self.pages[slug] = page
+            self.masked.discard(slug)
+
+    def discard(self, slug):
+        with self.lock:
+            self.pages.pop(slug, None)
+            if slug in self.index:
+                self.masked.add(slug)
+
+    def stats(self):
+        stats = super(MappedPageStore, self).stats()
+        stats.update({'mapped': len(self.index),
+                      'bytes': len(self.map) if self.map is not None else 0})
+        return stats
+
+
+def store_from_config(config):
+    """
+    Create a page store from flask app configuration
+
+    'FLATEARTH_STORE_MAP' creates a :class:`MappedPageStore` for that store
+    file. Otherwise 'FLATEARTH_STORE_MAX_BYTES', 'FLATEARTH_STORE_CODEC' or
+    'FLATEARTH_STORE_SPILL_DIR' create a :class:`CompressedPageStore`, and
+    'FLATEARTH_STORE_MAX_PAGES' a :class:`LRUPageStore`.
+
+    :param config: Flask app configuration
+    :type config: `dict`
+
+    :return: :class:`PageStore` or `None` if no store is configured
+    """
+    store_map = config.get('FLATEARTH_STORE_MAP')
+    if store_map:
+        return MappedPageStore(store_map)
+    max_bytes = config.get('FLATEARTH_STORE_MAX_BYTES')
+    codec = config.get('FLATEARTH_STORE_CODEC')
+    spill_path = config.get('FLATEARTH_STORE_SPILL_DIR')
+    max_pages = config.get('FLATEARTH_STORE_MAX_PAGES')
+    if max_bytes or codec or spill_path:
+        return CompressedPageStore(
+            max_bytes=int(max_bytes) if max_bytes else None,
+            codec=codec,
+            spill_path=spill_path)
+    if max_pages:
+        return LRUPageStore(max_pages=int(max_pages))
+    return None
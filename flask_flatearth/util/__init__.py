@@ -1,7 +1,163 @@
 import datetime
 import time
+from collections import deque
 from email import utils
 
 
+DATE_FORMATS = ['%Y-%m-%d %H:%M:%S %Z', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d']
+
+
 def rfc2822_now():
     return utils.formatdate(time.mktime(datetime.datetime.now().timetuple()))
+
+
+def parse_date(value):
+    """
+    Parse a metadata date
+
+    RFC 2822 dates are expected, and ISO style dates are accepted. Dates
+    without a timezone are taken as UTC.
+
+    :param value: Date string
+    :type value: `str`
+
+    :return: :class:`datetime.datetime` or `None` if not parseable
+    """
+    try:
+        date = utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        date = None
+        for fmt in DATE_FORMATS:
+            try:
+                date = datetime.datetime.strptime(value.strip(), fmt)
+                break
+            except ValueError:
+                continue
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date
+
+
+def last_modified(meta):
+    """
+    Latest of the 'publish' and 'updates' metadata dates
+
+    Updates take the format "{date}: {reason}".
+
+    :param meta: Page metadata
+    :type meta: `dict`
+
+    :return: :class:`datetime.datetime` or `None`
+    """
+    if not meta:
+        return None
+    values = []
+    for label in ['publish', 'updates']:
+        entries = meta.get(label, [])
+        if isinstance(entries, str):
+            entries = [entries, ]
+        for entry in entries:
+            if label == 'updates':
+                entry = entry.split(': ', 1)[0]
+            values.append(parse_date(entry))
+    dates = [d for d in values if d is not None]
+    return max(dates) if dates else None
+
+
+def ordered_map(executor, fn, *iterables, depth=64):
+    """
+    Map a function over iterables with an executor, keeping input order
+
+    Unlike :meth:`concurrent.futures.Executor.map`, which submits every call
+    up front, the inputs are consumed as results are taken, so at most
+    `depth` calls are pending at any time. Calls still pending are cancelled
+    if the iterator is closed early.
+
+    :param executor: Executor to submit the calls to
+    :type executor: :class:`concurrent.futures.Executor`
+
+    :param fn: Function to call with one item of each iterable
+    :type fn: `callable`
+
+    :param depth: Maximum number of pending calls
+    :type depth: `int`
+
+    :return: Iterator of results
+    """
+    pending = deque()
+    try:
+        for args in zip(*iterables):
+            pending.append(executor.submit(fn, *args))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def sort_value(meta, label):
+    """
+    Value of a metadata label for sorting
+
+    'publish' and 'updates' sort by date, 'sequence' numerically and other
+    labels by their case folded text.
+
+    :param meta: Page metadata
+    :type meta: `dict`
+
+    :param label: Metadata label
+    :type label: `str`
+
+    :return: Sortable value or `None` if missing or invalid
+    """
+    value = meta.get(label) if meta else None
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    if value is None:
+        return None
+    if label in ['publish', 'updates']:
+        date = parse_date(value.split(': ', 1)[0])
+        return date.timestamp() if date is not None else None
+    if label == 'sequence':
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return str(value).casefold()
+
+
+def sort_pages(pages, key, reverse=False, meta=None):
+    """
+    Sort pages by a metadata label
+
+    Pages missing the label come last, in their given order.
+
+    :param pages: Pages to sort
+    :type pages: `list` of `flask_flatearth.ContentPage`
+
+    :param key: Metadata label to sort by
+    :type key: `str`
+
+    :param reverse: Sort descending
+    :type reverse: `bool`
+
+    :param meta: Function returning the metadata to sort a page by. Defaults
+                 to the page `meta`.
+    :type meta: `callable`
+
+    :return: `list` of `flask_flatearth.ContentPage`
+    """
+    if meta is None:
+        meta = _page_meta
+    values = [(sort_value(meta(p), key), p) for p in pages]
+    present = [v for v in values if v[0] is not None]
+    present.sort(key=lambda v: v[0], reverse=reverse)
+    return [v[1] for v in present] + [v[1] for v in values if v[0] is None]
+
+
+def _page_meta(page):
+    return page.meta
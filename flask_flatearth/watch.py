@@ -0,0 +1,301 @@
+import logging
+import os
+import threading
+import time
+
+import flask
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+from .discovery import SourceDiscovery, changed_sources
+
+
+log = logging.getLogger('flask_flatearth.watch')
+
+
+class PollingSource(object):
+    """
+    Change source comparing stat snapshots of the search path
+
+    Snapshots are taken with the search path, file extensions and ignore
+    patterns of the generator, so ignored files are not reported.
+
+    :ivar g: ContentGenerator to watch
+    :type g: `ContentGenerator`
+
+    :ivar discovery: Takes the snapshots
+    :type discovery: :class:`flask_flatearth.discovery.SourceDiscovery`
+
+    :ivar snapshot: Stat of each page source at the last check
+    :type snapshot: `dict` of {<file name `str`>: (<mtime `int`>, \
+            <size `int`>)}
+    """
+    def __init__(self, g):
+        self.g = g
+        self.discovery = SourceDiscovery(g.search_path,
+                                         file_ext=g.file_ext,
+                                         ignore=g.ignore)
+        self.snapshot = self.discovery.scan()
+
+    def __str__(self):
+        msg = "<{cls} g={g}>".format(cls=self.__class__.__name__,
+                                     g=self.g)
+        return msg
+
+    def close(self):
+        pass
+
+    def poll(self, timeout, stopped):
+        """
+        Wait for changes
+
+        :param timeout: Seconds to wait before checking
+        :type timeout: `float`
+
+        :param stopped: Event set when the watcher stops
+        :type stopped: :class:`threading.Event`
+
+        :return: `set` of changed file names
+        """
+        if stopped.wait(timeout):
+            return set()
+        snapshot = self.discovery.scan()
+        changed, removed = changed_sources(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        return set(changed) | set(removed)
+
+
+class InotifySource(object):
+    """
+    Change source using inotify through the `inotify_simple` package
+
+    Every directory below the search path is watched. Directories created
+    later are watched as they appear, and their existing files are reported
+    as changed. If a directory is moved away or the kernel event queue
+    overflows, `None` is reported to request a full check.
+
+    :ivar g: ContentGenerator to watch
+    :type g: `ContentGenerator`
+    """
+    FLAGS = ['CREATE', 'DELETE', 'MODIFY', 'CLOSE_WRITE', 'MOVED_FROM',
+             'MOVED_TO', 'DELETE_SELF', 'MOVE_SELF']
+
+    def __init__(self, g):
+        self.g = g
+        self.inotify = inotify_simple.INotify()
+        self.flags = 0
+        for flag in self.FLAGS:
+            self.flags |= getattr(inotify_simple.flags, flag)
+        self.watches = {}
+        self._watch(self.g.search_path)
+
+    def __str__(self):
+        msg = "<{cls} g={g}>".format(cls=self.__class__.__name__,
+                                     g=self.g)
+        return msg
+
+    def close(self):
+        self.inotify.close()
+
+    def poll(self, timeout, stopped):
+        """
+        Wait for changes
+
+        :param timeout: Seconds to wait for events
+        :type timeout: `float`
+
+        :param stopped: Event set when the watcher stops
+        :type stopped: :class:`threading.Event`
+
+        :return: `set` of changed file names, or `None` for a full check
+        """
+        flags = inotify_simple.flags
+        changed = set()
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.mask & flags.Q_OVERFLOW:
+                return None
+            directory = self.watches.get(event.wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, event.name)
+            if event.mask & flags.ISDIR:
+                if self.g._source_discovery().ignored(event.name):
+                    continue
+                if event.mask & (flags.CREATE | flags.MOVED_TO):
+                    changed.update(self._watch(path))
+                elif event.mask & flags.MOVED_FROM:
+                    return None
+            elif event.mask & flags.IGNORED:
+                del self.watches[event.wd]
+            elif self.g._matches(event.name):
+                changed.add(path)
+        return changed
+
+    def _watch(self, path):
+        found = []
+        ignored = self.g._source_discovery().ignored
+        for dirpath, dirnames, files in os.walk(path):
+            dirnames[:] = [d for d in dirnames if not ignored(d)]
+            try:
+                wd = self.inotify.add_watch(dirpath, self.flags)
+            except OSError:
+                continue
+            self.watches[wd] = dirpath
+            found.extend(os.path.join(dirpath, f) for f in files
+                         if self.g._matches(f))
+        return found
+
+
+class ContentWatcher(object):
+    """
+    Background thread regenerating pages when sources change
+
+    Changes are collected until none have been seen for `debounce` seconds,
+    then :meth:`ContentGenerator.regenerate` is called with the changed
+    paths. Changes are detected with inotify if the optional `inotify_simple`
+    package is installed, and by polling stat snapshots every `interval`
+    seconds otherwise.
+
+    Views are swapped by single assignments into the flask app
+    `view_functions`, and url rules of new pages are added by swapping the
+    url map matcher, so requests see either the previous or the updated page
+    while the generator lock keeps regenerations from overlapping.
+
+    Pages are regenerated in an app context of `app`, which defaults to the
+    app of the ContentGenerator, or to the current app when the watcher is
+    created for a ContentGenerator set up with `init_app()`.
+
+    :var INTERVAL: Default seconds between polling checks
+    :type INTERVAL: `float`
+
+    :var DEBOUNCE: Default seconds to wait for changes to settle
+    :type DEBOUNCE: `float`
+
+    :ivar g: ContentGenerator to regenerate
+    :type g: `ContentGenerator`
+
+    :ivar app: Flask app to regenerate pages in
+    :type app: :class:`flask.Flask`
+
+    :ivar source: Change source
+    :type source: :class:`PollingSource` or :class:`InotifySource`
+    """
+    INTERVAL = 1.0
+    DEBOUNCE = 0.1
+
+    def __init__(self, g, interval=None, debounce=None, use_inotify=True,
+                 app=None):
+        """
+        Initialize the ContentWatcher
+
+        :param g: ContentGenerator to regenerate
+        :type g: `ContentGenerator`
+
+        :param interval: Seconds between polling checks
+        :type interval: `float`
+
+        :param debounce: Seconds to wait for changes to settle
+        :type debounce: `float`
+
+        :param use_inotify: Use inotify when available
+        :type use_inotify: `bool`
+
+        :param app: Flask app to regenerate pages in
+        :type app: :class:`flask.Flask`
+
+        :raise RuntimeError: if no app is given, set on the ContentGenerator
+                             or current
+        """
+        self.g = g
+        if app is None:
+            app = g._app if g._app is not None \
+                else flask.current_app._get_current_object()
+        self.app = app
+        self.interval = interval if interval else self.INTERVAL
+        self.debounce = debounce if debounce is not None else self.DEBOUNCE
+        self.use_inotify = use_inotify and inotify_simple is not None
+        self.source = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __repr__(self):
+        msg = "{cls}({g}, interval={i}, debounce={d})".format(
+            cls=self.__class__.__name__,
+            g=self.g,
+            i=self.interval,
+            d=self.debounce)
+        return msg
+
+    def __str__(self):
+        msg = "<{cls} g={g}>".format(cls=self.__class__.__name__,
+                                     g=self.g)
+        return msg
+
+    def start(self):
+        """
+        Start watching in a daemon thread
+        """
+        if self.use_inotify:
+            self.source = InotifySource(self.g)
+        else:
+            self.source = PollingSource(self.g)
+        msg = "Starting {w} with {s}".format(w=self, s=self.source)
+        log.info(msg)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run,
+                                       name=str(self),
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stop watching and wait for the thread to finish
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        return self
+
+    def _run(self):
+        pending = set()
+        deadline = None
+        try:
+            while not self.stopped.is_set():
+                timeout = self.interval
+                if deadline is not None:
+                    timeout = max(0, min(timeout,
+                                         deadline - time.monotonic()))
+                changed = self.source.poll(timeout, self.stopped)
+                if changed is None or changed:
+                    if pending is not None:
+                        if changed is None:
+                            pending = None
+                        else:
+                            pending.update(changed)
+                    deadline = time.monotonic() + self.debounce
+                elif deadline is not None \
+                        and time.monotonic() >= deadline:
+                    self._regenerate(pending)
+                    pending = set()
+                    deadline = None
+        finally:
+            self.source.close()
+
+    def _regenerate(self, pending):
+        paths = sorted(pending) if pending is not None else None
+        msg = "{w} regenerating for {p}".format(w=self, p=paths)
+        log.debug(msg)
+        try:
+            with self.app.app_context():
+                updated = self.g.regenerate(paths)
+        except Exception:
+            msg = "{w} failed to regenerate for {p}".format(w=self, p=paths)
+            log.exception(msg)
+            return
+        msg = "{w} updated {u}".format(w=self, u=updated)
+        log.info(msg)
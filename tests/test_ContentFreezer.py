@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH
+from flask_flatearth.ext.feeds import FeedsExtension
+from flask_flatearth.ext.sitemap import SitemapExtension
+from flask_flatearth.freeze import ContentFreezer
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+templates = os.path.join(BASEPATH, 'examples', 'template')
+
+
+@pytest.fixture
+def mdg():
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    mdg.generate()
+    return mdg
+
+
+def test_contentfreezer_path():
+    freezer = ContentFreezer(None, 'out')
+    assert freezer.path('/') == os.path.join('out', 'index.html')
+    assert freezer.path('/articles/a/') == os.path.join(
+        'out', 'articles', 'a', 'index.html')
+    assert freezer.path('/feed.xml') == os.path.join('out', 'feed.xml')
+
+
+def test_contentfreezer_freeze(mdg, tmp_path):
+    out = str(tmp_path)
+    stats = mdg.freeze(out, encodings=['gzip'])
+    pages = len(mdg.generated_pages)
+    assert stats == {'written': pages * 2, 'unchanged': 0, 'removed': 0}
+    index = os.path.join(out, 'articles', 'example', 'index.html')
+    client = mdg.app.test_client()
+    with open(index, 'rb') as f:
+        assert f.read() == client.get('/articles/example/').data
+    with open(index + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == \
+            client.get('/articles/example/').data
+    assert mdg.freeze(out, encodings=['gzip']) == \
+        {'written': 0, 'unchanged': pages * 2, 'removed': 0}
+
+
+def test_contentfreezer_freeze_before_generate(tmp_path):
+    mdg = markdown.MarkdownGenerator(flask.Flask(__name__),
+                                     search_path=search)
+    pytest.raises(RuntimeError, mdg.freeze, str(tmp_path))
+
+
+def test_contentfreezer_freeze_extensions(tmp_path):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    SitemapExtension(generator=mdg)
+    FeedsExtension(generator=mdg)
+    mdg.generate()
+    out = str(tmp_path)
+    mdg.freeze(out)
+    client = app.test_client()
+    for url in ['/sitemap.xml', '/feeds/all.atom.xml', '/feeds/all.rss.xml']:
+        with open(os.path.join(out, *url.split('/')), 'rb') as f:
+            assert f.read() == client.get(url).data
+
+
+def test_contentfreezer_freeze_removed(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    mdg.generate()
+    out = tmp_path / 'out'
+    (out / 'static').mkdir(parents=True)
+    (out / 'static' / 'site.css').write_text('body {}')
+    mdg.freeze(str(out), encodings=['gzip'])
+    example = out / 'articles' / 'example'
+    assert (example / 'index.html').is_file()
+    (pages / 'example.md').unlink()
+    mdg.regenerate()
+    assert mdg.freeze(str(out), encodings=['gzip'])['removed'] == 2
+    assert not example.exists()
+    assert (out / 'articles').is_dir()
+    assert (out / 'static' / 'site.css').is_file()
+
+
+def test_contentfreezer_write_failed(tmp_path, monkeypatch):
+    freezer = ContentFreezer(None, str(tmp_path))
+
+    def replace(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(os, 'replace', replace)
+    pytest.raises(OSError, freezer._write, str(tmp_path / 'index.html'),
+                  b'page')
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,150 @@
+import os
+import shutil
+import threading
+import time
+import types
+
+import mock
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH
+from flask_flatearth import watch
+from flask_flatearth.routing import add_late_rules
+from flask_flatearth.watch import ContentWatcher, PollingSource
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+templates = os.path.join(BASEPATH, 'examples', 'template')
+
+
+@pytest.fixture
+def site(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    mdg.generate()
+    return mdg, pages, app.test_client()
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_pollingsource_poll(site):
+    mdg, pages, client = site
+    source = PollingSource(mdg)
+    stopped = mock.Mock(wait=mock.Mock(return_value=False))
+    assert source.poll(0, stopped) == set()
+    (pages / 'new.md').write_text('type: page\nslug: new\n\nNew')
+    (pages / 'example.md').unlink()
+    (pages / 'ignored.txt').write_text('ignored')
+    assert source.poll(0, stopped) == {str(pages / 'new.md'),
+                                       str(pages / 'example.md')}
+
+
+def test_contentwatcher_regenerates(site):
+    mdg, pages, client = site
+    watcher = ContentWatcher(mdg, interval=0.01, debounce=0.05,
+                             use_inotify=False).start()
+    try:
+        article = pages / 'example.md'
+        article.write_text(article.read_text().replace(
+            'title: An Example Page', 'title: A Watched Page'))
+        assert wait_for(lambda: b'A Watched Page' in
+                        client.get('/articles/example/').data)
+    finally:
+        watcher.stop()
+    assert watcher.thread is None
+
+
+def test_contentwatcher_init_app(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(search_path=str(pages))
+    pytest.raises(RuntimeError, ContentWatcher, mdg)
+    with app.app_context():
+        mdg.init_app(app)
+        mdg.generate()
+        watcher = mdg.watch(interval=0.01, debounce=0.05)
+    assert watcher.app is app
+    watcher.stop()
+    watcher = ContentWatcher(mdg, interval=0.01, debounce=0.05,
+                             use_inotify=False, app=app).start()
+    try:
+        (pages / 'new.md').write_text('type: page\nslug: new\n\nNew')
+        client = app.test_client()
+        assert wait_for(lambda: client.get('/new/').status_code == 200)
+    finally:
+        watcher.stop()
+
+
+def test_inotifysource_after_load_snapshot(site, tmp_path, monkeypatch):
+    mdg, pages, client = site
+    path = str(tmp_path / 'site.snapshot')
+    mdg.snapshot(path)
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    worker = markdown.MarkdownGenerator(app, search_path=str(pages))
+    worker.load_snapshot(path)
+    (pages / '.hidden').mkdir()
+    events = []
+
+    class INotify(object):
+        def add_watch(self, path, mask):
+            events.append(path)
+            return len(events)
+
+        def read(self, timeout=None):
+            return [types.SimpleNamespace(wd=1, mask=0, name='new.md'),
+                    types.SimpleNamespace(wd=1, mask=1, name='.git')]
+
+    flags = types.SimpleNamespace(Q_OVERFLOW=2, ISDIR=1, CREATE=4,
+                                  MOVED_TO=8, MOVED_FROM=16, IGNORED=32)
+    for flag in watch.InotifySource.FLAGS:
+        setattr(flags, flag, 0)
+    monkeypatch.setattr(watch, 'inotify_simple', types.SimpleNamespace(
+        INotify=INotify, flags=flags))
+    source = watch.InotifySource(worker)
+    assert str(pages) in events
+    assert str(pages / '.hidden') not in events
+    assert source.poll(0, None) == {str(pages / 'new.md')}
+
+
+def test_add_late_rules_while_matching(site):
+    mdg, pages, client = site
+    app = mdg.app
+    failures = []
+    stopped = threading.Event()
+
+    def match():
+        while not stopped.is_set():
+            for url in ['/articles/example/', '/articles/', '/']:
+                with app.test_request_context(url):
+                    if flask.request.url_rule is None:
+                        failures.append(url)
+    threads = [threading.Thread(target=match) for n in range(2)]
+    for t in threads:
+        t.start()
+    try:
+        for n in range(200):
+            add_late_rules(app, ['/late/{}/'.format(n)], 'late-{}'.format(n))
+            app.view_functions['late-{}'.format(n)] = lambda: 'late'
+    finally:
+        stopped.set()
+        for t in threads:
+            t.join()
+    assert failures == []
+    assert client.get('/late/199/').data == b'late'
+    with app.test_request_context():
+        assert flask.url_for('late-7') == '/late/7/'
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from flask_flatearth.cache import ConversionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ConversionCache(str(tmp_path / 'cache'))
+
+
+def test_conversioncache_key(cache):
+    assert cache.key(b'data') == cache.key(b'data')
+    assert cache.key(b'data') != cache.key(b'other')
+    assert cache.key(b'data', config='a') != cache.key(b'data', config='b')
+
+
+def test_conversioncache_get_put(cache):
+    key = cache.key(b'data')
+    assert cache.get(key) is None
+    cache.put(key, '<p>html</p>', {'type': ['article']})
+    assert cache.get(key) == ('<p>html</p>', {'type': ['article']})
+
+
+def test_conversioncache_get_corrupt(cache):
+    key = cache.key(b'data')
+    cache.put(key, '<p>html</p>', {})
+    with open(cache._entry_path(key), 'w') as f:
+        f.write('{')
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._entry_path(key))
+
+
+def test_conversioncache_record(cache):
+    cache.record(True)
+    cache.record(False)
+    cache.record(False)
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'evictions': 0}
+
+
+def test_conversioncache_prune(cache):
+    keys = [cache.key(str(n).encode()) for n in range(10)]
+    for n, key in enumerate(keys):
+        cache.put(key, 'x' * 100, {})
+        os.utime(cache._entry_path(key), (n, n))
+    cache.max_bytes = cache.prune() // 2
+    assert cache.prune() <= cache.max_bytes
+    assert cache.evictions == 5
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) is not None
@@ -0,0 +1,124 @@
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH
+from flask_flatearth.ext.feeds import FeedsExtension
+from flask_flatearth.ext.topics import TopicExtension
+from flask_flatearth.util import sort_pages
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+templates = os.path.join(BASEPATH, 'examples', 'template')
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+ARTICLE = """type: article
+slug: {slug}
+title: {title}
+author: jcastillo2nd
+topics: tutorial
+publish: {publish}
+
+Content
+"""
+
+
+def site(pages, **kwargs):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost', FLATEARTH_FEEDS_TITLE='Site')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=mdg)
+    ext = FeedsExtension(generator=mdg, **kwargs)
+    mdg.generate()
+    return mdg, ext, app.test_client()
+
+
+def atom_links(data):
+    root = ET.fromstring(data)
+    return [e.find(ATOM + 'link').get('href')
+            for e in root.findall(ATOM + 'entry')]
+
+
+def test_feedsextension_feeds(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    for n in range(5):
+        (pages / 'new-{}.md'.format(n)).write_text(ARTICLE.format(
+            slug='new-{}'.format(n),
+            title='New & {}'.format(n),
+            publish='Mon, {:02d} Jun 2019 10:00:00 +0000'.format(n + 1)))
+    mdg, ext, client = site(pages, size=3)
+    rv = client.get('/feeds/all.atom.xml')
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/atom+xml'
+    assert atom_links(rv.data) == ['http://localhost/articles/new-{}/'.format(
+        n) for n in [4, 3, 2]]
+    assert b'<title>New &amp; 4</title>' in rv.data
+    articles = sort_pages(mdg.pages_iter(page_type='article'),
+                          'publish', reverse=True)
+    for name, members in [
+            ('authors/jcastillo2nd', articles),
+            ('topics/tutorial', [p for p in articles
+                                 if 'tutorial' in p.meta['topics']])]:
+        data = client.get('/feeds/{}.atom.xml'.format(name)).data
+        assert atom_links(data) == ['http://localhost/articles/{}/'.format(
+            p.slug) for p in members[:3]]
+    topic = ET.fromstring(client.get('/feeds/topics/how-to.atom.xml').data)
+    assert topic.find(ATOM + 'title').text == 'Site: how to'
+    rss = ET.fromstring(client.get('/feeds/all.rss.xml').data)
+    assert [i.find('link').text for i in rss.iter('item')] == \
+        atom_links(rv.data)
+    assert client.get('/feeds/all.atom.xml', headers={
+        'If-None-Match': rv.headers['ETag']}).status_code == 304
+    assert client.get('/feeds/all.atom.xml', headers={
+        'If-Modified-Since': rv.headers['Last-Modified']}).status_code == 304
+    assert client.get('/feeds/authors/nobody.atom.xml').status_code == 404
+    assert client.get('/feeds/all.json.xml').status_code == 404
+    with mdg.app.test_request_context():
+        assert flask.url_for('flatearth_feeds', feed='all', fmt='rss') == \
+            '/feeds/all.rss.xml'
+
+    (pages / 'newest.md').write_text(ARTICLE.format(
+        slug='newest', title='Newest',
+        publish='Mon, 01 Jul 2019 10:00:00 +0000'))
+    mdg.regenerate()
+    rv2 = client.get('/feeds/all.atom.xml', headers={
+        'If-None-Match': rv.headers['ETag']})
+    assert rv2.status_code == 200
+    assert atom_links(rv2.data)[0] == 'http://localhost/articles/newest/'
+
+
+def test_feedsextension_heaps():
+    mdg, ext, client = site(search, size=2)
+    for name in ext.heaps:
+        assert len(ext.heaps[name]) <= 2
+    articles = sort_pages(mdg.pages_iter(page_type='article'),
+                          'publish', reverse=True)
+    latest = [item[2] for item in sorted(ext.heaps['all'], reverse=True)]
+    assert latest == [p.slug for p in articles[:2]]
+
+
+@pytest.mark.parametrize('defer', [False, True])
+def test_feedsextension_load_snapshot(tmp_path, defer):
+    mdg, ext, client = site(search)
+    path = str(tmp_path / 'site.snapshot')
+    mdg.snapshot(path)
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost', FLATEARTH_FEEDS_TITLE='Site',
+                      FLATEARTH_DEFER=defer)
+    loaded = markdown.MarkdownGenerator(app, search_path=search)
+    TopicExtension(generator=loaded)
+    FeedsExtension(generator=loaded)
+    loaded.load_snapshot(path)
+    assert bool(loaded.generated_pages) is not defer
+    assert ext.feeds
+    for name, fmt in ext.feeds:
+        url = '/feeds/{}.{}.xml'.format(name, fmt)
+        rv = app.test_client().get(url)
+        assert rv.status_code == 200
+        assert rv.data == client.get(url).data
@@ -0,0 +1,623 @@
+import logging
+import os
+import shutil
+
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH, ContentPage
+from flask_flatearth.ext.topics import TopicExtension
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+templates = os.path.join(BASEPATH, 'examples', 'template')
+
+
+@pytest.fixture
+def app():
+    return flask.Flask(__name__)
+
+
+def test_markdowngenerator_load_pages(app):
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    mdg.load_pages()
+    assert 'index' in mdg.pages
+    assert mdg.pages['jcastillo2nd'].refs
+    assert mdg.pages['example'].file_name.endswith('example.md')
+
+
+def test_markdowngenerator_graph(site):
+    mdg, pages, client = site
+    graph = mdg.graph
+    articles = graph.sources('jcastillo2nd', 'author')
+    assert 'example' in articles
+    assert [p.slug for p in mdg.pages['jcastillo2nd'].refs] == articles
+    assert graph.targets('example', 'author') == ['jcastillo2nd']
+    assert set(graph.targets('articles', 'set')) == set(
+        p.slug for p in mdg.pages_iter(page_type='article'))
+    assert graph.sources('how-to', 'topic') == ['troubleshooting-topic2']
+    assert 'topics' in graph.sources('how-to', 'set')
+
+
+def test_markdowngenerator_compact_pages(app):
+    mdg = markdown.MarkdownGenerator(app, search_path=search, defer=True)
+    mdg.load_pages()
+    articles = list(mdg.pages_iter(page_type='article'))
+    assert len(articles) > 1
+    assert not any(hasattr(p, '__dict__') for p in mdg.pages.values())
+    first, second = articles[:2]
+    assert first.meta['type'] is second.meta['type']
+    assert isinstance(first.meta['author'], tuple)
+    assert first.meta['author'] is second.meta['author']
+    assert [k for k in first.meta if k == 'slug'][0] is \
+        [k for k in second.meta if k == 'slug'][0]
+    assert isinstance(mdg.pages['jcastillo2nd'].refs, tuple)
+
+
+def test_markdowngenerator_load_pages_workers(app):
+    serial = markdown.MarkdownGenerator(app, search_path=search)
+    serial.load_pages()
+    app.config.update(FLATEARTH_WORKERS=2)
+    parallel = markdown.MarkdownGenerator(app, search_path=search)
+    assert parallel.workers == 2
+    parallel.load_pages()
+    assert list(parallel.pages) == list(serial.pages)
+    for slug in serial.pages:
+        assert parallel.pages[slug].html == serial.pages[slug].html
+        assert parallel.pages[slug].meta == serial.pages[slug].meta
+
+
+def test_markdowngenerator_convert_pages_workers_read(app, monkeypatch):
+    submitted = []
+
+    class Pool(markdown.ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args)
+            return super(Pool, self).submit(fn, *args, **kwargs)
+    monkeypatch.setattr(markdown, 'ProcessPoolExecutor', Pool)
+    mdg = markdown.MarkdownGenerator(app, search_path=search, workers=2)
+    files = mdg.page_files
+    assert [p for p, html, meta in mdg.convert_pages(files)] == files
+    assert submitted == [(f, ) for f in files]
+
+
+def test_markdowngenerator_load_pages_readers(app):
+    serial = markdown.MarkdownGenerator(app, search_path=search)
+    serial.load_pages()
+    app.config.update(FLATEARTH_READERS=2, FLATEARTH_QUEUE_DEPTH=2)
+    pipelined = markdown.MarkdownGenerator(app, search_path=search)
+    assert (pipelined.readers, pipelined.queue_depth) == (2, 2)
+    pipelined.load_pages()
+    assert list(pipelined.pages) == list(serial.pages)
+    for slug in serial.pages:
+        assert pipelined.pages[slug].html == serial.pages[slug].html
+        assert pipelined.pages[slug].refs == serial.pages[slug].refs
+
+
+def test_markdowngenerator_convert_pages_bounded(app, tmp_path,
+                                                 monkeypatch):
+    for n in range(50):
+        (tmp_path / '{:02d}.md'.format(n)).write_text(
+            'type: page\nslug: page-{}\n\nPage'.format(n))
+    read = []
+    read_source = markdown.read_source
+
+    def counted(file_name):
+        read.append(file_name)
+        return read_source(file_name)
+    monkeypatch.setattr(markdown, 'read_source', counted)
+    mdg = markdown.MarkdownGenerator(app, search_path=str(tmp_path),
+                                     readers=4, queue_depth=3)
+    files = sorted(mdg.page_files)
+    ahead = []
+    for n, (page, html, meta) in enumerate(mdg.convert_pages(files)):
+        assert page == files[n]
+        ahead.append(len(read) - n)
+    assert len(read) == 50
+    assert max(ahead) <= 3
+
+
+def test_markdowngenerator_load_pages_cache(app, tmp_path):
+    app.config.update(FLATEARTH_CACHE_DIR=str(tmp_path))
+    cold = markdown.MarkdownGenerator(app, search_path=search)
+    cold.load_pages()
+    assert cold.cache.stats()['misses'] == len(cold.page_files)
+    warm = markdown.MarkdownGenerator(app, search_path=search)
+    warm.load_pages()
+    assert warm.cache.stats()['hits'] == len(warm.page_files)
+    for slug in cold.pages:
+        assert warm.pages[slug].html == cold.pages[slug].html
+        assert warm.pages[slug].meta == cold.pages[slug].meta
+
+
+def test_markdowngenerator_cache_prune(app, tmp_path, monkeypatch):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app.config.update(FLATEARTH_CACHE_DIR=str(tmp_path / 'cache'),
+                      SERVER_NAME='localhost')
+    app.template_folder = templates
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    pruned = []
+    monkeypatch.setattr(mdg.cache, 'prune', lambda: pruned.append(1))
+    mdg.generate()
+    assert len(pruned) == 1
+    article = pages / 'example.md'
+    article.write_text(article.read_text().replace(
+        'title: An Example Page', 'title: A Changed Page'))
+    assert 'example' in mdg.regenerate([str(article)])
+    assert len(pruned) == 1
+
+
+def test_markdowngenerator_pages_iter_index(app):
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    mdg.load_pages()
+    for page_type in ['article', 'author', 'index', 'missing']:
+        scan = [p for p in mdg.pages.values() if p.meta['type'] == page_type]
+        assert list(mdg.pages_iter(page_type=page_type)) == scan
+    titles = [p.meta['title'] for p in mdg.pages_sorted('article', 'title')]
+    assert titles == sorted(titles, key=str.casefold)
+    assert mdg.pages_sorted('article', 'title', reverse=True) == \
+        mdg.pages_sorted('article', 'title')[::-1]
+    article = mdg.pages_sorted('article', 'title')[0]
+    mdg.add_pages({article.slug: article})
+    assert mdg.type_index['article'][-1] == article.slug
+    assert len(mdg.type_index['article']) == 4
+
+
+@pytest.fixture
+def site(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=mdg)
+    mdg.generate()
+    return mdg, pages, app.test_client()
+
+
+def test_markdowngenerator_regenerate(site):
+    mdg, pages, client = site
+    assert client.get('/articles/example/').status_code == 200
+    assert mdg.regenerate() == set()
+    article = pages / 'example.md'
+    article.write_text(article.read_text().replace(
+        'title: An Example Page', 'title: A Changed Page'))
+    updated = mdg.regenerate([str(article)])
+    assert {'example', 'jcastillo2nd', 'articles', 'topics'} <= updated
+    assert 'understanding-topic1' not in updated
+    assert b'A Changed Page' in client.get('/articles/example/').data
+
+
+def test_markdowngenerator_regenerate_add_remove(site):
+    mdg, pages, client = site
+    client.get('/')
+    (pages / 'new.md').write_text(
+        'type: article\nslug: new-article\ntitle: New\n'
+        'author: jcastillo2nd\n\nNew article\n')
+    (pages / 'example.md').unlink()
+    updated = mdg.regenerate()
+    assert {'new-article', 'example'} <= updated
+    assert client.get('/articles/new-article/').status_code == 200
+    assert client.get('/articles/example/').status_code == 404
+    assert 'example' not in mdg.pages
+
+
+def test_markdowngenerator_regenerate_invalid(site, caplog):
+    mdg, pages, client = site
+    article = pages / 'example.md'
+    saved = article.read_text()
+    type_index = {t: list(s) for t, s in mdg.type_index.items()}
+    article.write_text('')
+    (pages / 'new.md').write_text('type: article\n\nNo slug\n')
+    (pages / 'copy.md').write_text(
+        saved.replace('title: An Example Page', 'title: A Copy'))
+    assert mdg.regenerate() == set()
+    assert len([r for r in caplog.records
+                if r.message.startswith('Skipping source')]) == 3
+    assert {t: list(s) for t, s in mdg.type_index.items()} == type_index
+    assert client.get('/articles/example/').status_code == 200
+    article.write_text(saved.replace('title: An Example Page',
+                                     'title: A Changed Page'))
+    assert 'example' in mdg.regenerate()
+    assert b'A Changed Page' in client.get('/articles/example/').data
+
+
+def test_markdowngenerator_regenerate_not_modified(site):
+    mdg, pages, client = site
+    article = client.get('/articles/troubleshooting-topic2/')
+    since = {'If-Modified-Since': article.headers['Last-Modified']}
+    assert client.get('/articles/troubleshooting-topic2/',
+                      headers=since).status_code == 304
+    topic = client.get('/topics/how-to/')
+    assert 'Last-Modified' not in topic.headers
+    (pages / 'new.md').write_text(
+        'type: article\nslug: new-article\ntitle: New How To\n'
+        'topics: how to\npublish: 2018-01-01 00:00:00 UTC\n\nNew\n')
+    mdg.regenerate()
+    rv = client.get('/topics/how-to/', headers=since)
+    assert rv.status_code == 200
+    assert b'New How To' in rv.data
+    assert client.get('/topics/how-to/', headers={
+        'If-None-Match': topic.headers['ETag']}).status_code == 200
+    for url in ['/articles/', '/authors/jcastillo2nd/']:
+        assert 'Last-Modified' not in client.get(url).headers
+
+
+def test_markdowngenerator_regenerate_ignored(site):
+    mdg, pages, client = site
+    draft = pages / 'drafts' / 'draft.md'
+    draft.parent.mkdir()
+    draft.write_text('type: article\nslug: draft\ntitle: Draft\n\nDraft\n')
+    (pages / '.hidden.md').write_text('type: page\nslug: hidden\n')
+    assert mdg.regenerate() == set()
+    assert mdg.regenerate([str(draft)]) == set()
+    assert 'draft' not in mdg.pages
+    assert str(draft) not in mdg.discovery.manifest
+    outside = pages.parent / 'outside.md'
+    outside.write_text('type: page\nslug: outside\n\nOutside\n')
+    assert mdg.regenerate([str(outside)]) == set()
+    assert 'outside' not in mdg.pages
+
+
+def test_markdowngenerator_regenerate_before_generate(app):
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    pytest.raises(RuntimeError, mdg.regenerate)
+
+
+def test_markdowngenerator_generate_lazy(tmp_path):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_LAZY=True,
+                      FLATEARTH_STORE_MAX_PAGES=1)
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    mdg.generate()
+    assert len(mdg.store) == 0
+    client = app.test_client()
+    first = client.get('/articles/example/').data
+    assert len(mdg.store) == 1
+    client.get('/')
+    assert client.get('/articles/example/').data == first
+    assert mdg.store.stats()['evictions'] == 2
+
+
+def test_markdowngenerator_publish(site, tmp_path):
+    mdg, pages, client = site
+    path = str(tmp_path / 'pages.store')
+    assert mdg.publish(path) == len(mdg.generated_pages)
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_STORE_MAP=path,
+                      FLATEARTH_LAZY=True,
+                      FLATEARTH_DEFER=True)
+    worker = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=worker)
+    worker.generate()
+    worker_client = app.test_client()
+    for slug in ['index', 'example', 'articles', 'topics']:
+        url = mdg.generated_pages[slug].urls()[0]
+        assert worker_client.get(url).data == client.get(url).data
+    assert worker.pages['example'].html is None
+    assert worker.metrics.phases['convert']['count'] == 0
+    assert worker.store.stats()['misses'] == 0
+
+
+def test_markdowngenerator_publish_not_lazy(site, tmp_path):
+    mdg, pages, client = site
+    path = str(tmp_path / 'pages.store')
+    mdg.publish(path)
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost', FLATEARTH_STORE_MAP=path)
+    worker = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=worker)
+    worker.generate()
+    assert not worker.lazy
+    assert len(worker.store.pages) == 0
+    assert not any(worker.generated_pages[p].rendered_bytes
+                   for p in worker.generated_pages)
+    url = mdg.generated_pages['example'].urls()[0]
+    assert app.test_client().get(url).data == client.get(url).data
+    assert worker.store.stats()['misses'] == 0
+
+
+def snapshot_worker(pages, path, **config):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost', **config)
+    worker = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=worker)
+    worker.load_snapshot(path)
+    return worker, app.test_client()
+
+
+def test_markdowngenerator_snapshot(site, tmp_path, monkeypatch):
+    mdg, pages, client = site
+    path = str(tmp_path / 'site.snapshot')
+    assert mdg.snapshot(path) == len(mdg.generated_pages)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rendered a template")
+
+    monkeypatch.setattr(flask, 'render_template', fail)
+    worker, worker_client = snapshot_worker(pages, path)
+    for page in mdg.generated_pages.values():
+        for url in page.urls():
+            response = worker_client.get(url)
+            assert response.data == client.get(url).data
+            assert response.get_etag() == client.get(url).get_etag()
+    assert worker_client.get('/articles/example').status_code == 308
+    assert worker_client.get('/articles/missing/').status_code == 404
+    assert worker.metrics.phases['convert']['count'] == 0
+    assert worker.metrics.phases['walk']['count'] == 0
+    assert worker.pages['example'].html is None
+    assert worker.graph.sources('jcastillo2nd', 'author') == \
+        mdg.graph.sources('jcastillo2nd', 'author')
+    with worker.app.test_request_context():
+        assert flask.url_for('example') == '/articles/example/'
+        assert flask.url_for('example', _external=True, _scheme='https',
+                             _anchor='top') == \
+            'https://localhost/articles/example/#top'
+    with worker.app.test_request_context(base_url='http://localhost/app'):
+        assert flask.url_for('example', _external=True) == \
+            'http://localhost/app/articles/example/'
+    with worker.app.app_context():
+        assert flask.url_for('example') == \
+            'http://localhost/articles/example/'
+        assert flask.url_for('index') == 'http://localhost/'
+        assert flask.url_for('example', _scheme='https') == \
+            'https://localhost/articles/example/'
+    frozen = tmp_path / 'build'
+    assert worker.freeze(str(frozen))['written'] > 0
+    assert (frozen / 'index.html').read_bytes() == client.get('/').data
+    pytest.raises(RuntimeError, worker.load_snapshot, path)
+
+
+def test_markdowngenerator_snapshot_deferred(site, tmp_path):
+    mdg, pages, client = site
+    path = str(tmp_path / 'site.snapshot')
+    mdg.snapshot(path)
+    worker, worker_client = snapshot_worker(pages, path,
+                                            FLATEARTH_DEFER=True)
+    assert worker.generated_pages == {}
+    assert worker_client.get('/articles/example/').data == \
+        client.get('/articles/example/').data
+    assert worker.generated_pages == {}
+    assert [p.slug for p in worker.pages_iter('article')] == \
+        [p.slug for p in mdg.pages_iter('article')]
+    assert set(worker.generated_pages) == set(mdg.generated_pages)
+    assert worker.metrics.phases['walk']['count'] == 0
+    article = pages / 'example.md'
+    article.write_text(article.read_text() + '\nAppended paragraph\n')
+    assert worker.regenerate([str(article)]) >= {'example'}
+    assert worker.metrics.phases['walk']['count'] == 0
+    assert b'Appended paragraph' in \
+        worker_client.get('/articles/example/').data
+
+
+def test_markdowngenerator_snapshot_regenerate(site, tmp_path):
+    mdg, pages, client = site
+    path = str(tmp_path / 'site.snapshot')
+    mdg.snapshot(path)
+    worker, worker_client = snapshot_worker(pages, path)
+    article = pages / 'example.md'
+    article.write_text(article.read_text().replace(
+        'title: An Example Page', 'title: A Changed Page'))
+    (pages / 'new.md').write_text(
+        'type: article\nslug: new-article\ntitle: New\n'
+        'author: jcastillo2nd\n\nNew article\n')
+    assert {'example', 'new-article'} <= worker.regenerate()
+    assert b'A Changed Page' in worker_client.get('/articles/example/').data
+    assert worker_client.get('/articles/new-article/').status_code == 200
+
+
+def test_markdowngenerator_snapshot_invalid(app, tmp_path):
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    path = tmp_path / 'site.snapshot'
+    pytest.raises(RuntimeError, mdg.snapshot, str(path))
+    path.write_bytes(b'not a snapshot')
+    pytest.raises(RuntimeError, mdg.load_snapshot, str(path))
+
+
+def test_markdowngenerator_generate_paginated(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_PAGE_SIZE=3,
+                      FLATEARTH_SORT_KEY='title')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=mdg)
+    mdg.generate()
+    client = app.test_client()
+    listed = mdg.pages_sorted('article', 'title')
+    first = mdg.generated_pages['articles']
+    second = mdg.generated_pages['articles-page-2']
+    assert first.listed + second.listed == listed
+    assert first.pagination['next'] == 'articles-page-2'
+    assert second.urls() == ['/articles/page/2/']
+    assert client.get('/articles/page/2/').status_code == 200
+    assert client.get('/topics/page/2/').status_code == 200
+    assert 'articles-page-3' not in mdg.generated_pages
+    for n in range(3):
+        (pages / 'new{}.md'.format(n)).write_text(
+            'type: article\nslug: new-{n}\ntitle: New {n}\n'
+            'author: jcastillo2nd\n\nNew article\n'.format(n=n))
+    assert 'articles-page-3' in mdg.regenerate()
+    assert client.get('/articles/page/3/').status_code == 200
+
+
+def test_markdowngenerator_metrics():
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_METRICS_URL='/metrics')
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    mdg.generate()
+    phases = mdg.metrics.phases
+    for phase in ['walk', 'read', 'convert', 'meta', 'register_rules',
+                  'register_view']:
+        assert phases[phase]['count'] > 0
+    assert phases['read']['count'] == len(mdg.page_files)
+    assert phases['register_view']['count'] == len(mdg.generated_pages)
+    example = mdg.metrics.pages['example']
+    assert example['source'].endswith('example.md')
+    assert example['bytes'] == len(mdg.pages['example'].prepared().body)
+    response = app.test_client().get('/metrics')
+    assert response.mimetype == 'text/plain'
+    assert b'flatearth_phase_seconds_total{phase="convert"}' in response.data
+
+
+def test_markdowngenerator_warm_templates(tmp_path):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_TEMPLATE_CACHE_DIR=str(tmp_path))
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    assert app.jinja_env.bytecode_cache.directory == str(tmp_path)
+    loaded = mdg.warm_templates(['article.html', 'missing.html'])
+    assert loaded == ['article.html', 'base.html']
+    assert set(mdg.metrics.templates) == {'article.html', 'base.html'}
+    assert mdg.metrics.phases['compile_templates']['count'] == 2
+    assert len(os.listdir(str(tmp_path))) == 2
+    mdg.generate()
+    assert 'topics.html' not in mdg.metrics.templates
+    assert 'authors.html' in mdg.metrics.templates
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(FLATEARTH_TEMPLATE_CACHE_DIR=str(tmp_path))
+    booted = markdown.MarkdownGenerator(app, search_path=search)
+    parse = app.jinja_env.parse
+    parsed = []
+    app.jinja_env.parse = lambda *args: parsed.append(args[1]) or \
+        parse(*args)
+    assert booted.warm_templates(['article.html', 'topics.html']) == \
+        ['article.html', 'topics.html', 'base.html']
+    assert parsed == ['topics.html']
+    assert booted.metrics.phases['compile_templates']['count'] == 3
+
+
+def test_markdowngenerator_render_content(site, monkeypatch):
+    mdg, pages, client = site
+    calls = []
+    monkeypatch.setattr(flask, 'render_template_string',
+                        lambda source: calls.append(source) or 'rendered')
+    with mdg.app.app_context():
+        assert mdg.render_content(mdg.pages['example'].html).count(
+            'href="http://localhost/articles/example/"') == 1
+        assert not calls
+        assert mdg.urls[('example', False)] == \
+            'http://localhost/articles/example/'
+        assert mdg.render_content("{{url_for('index')}} {{ config }}") \
+            == 'rendered'
+        assert calls == ["{{url_for('index')}} {{ config }}"]
+    with mdg.app.test_request_context('/', base_url='http://localhost/app'):
+        assert mdg.render_content(mdg.pages['example'].html).count(
+            'href="/app/articles/example/"') == 1
+    assert mdg.urls[('example', True)] == '/app/articles/example/'
+
+
+def test_markdowngenerator_debug_messages_deferred(app, monkeypatch):
+    formatted = []
+
+    def fmt(page):
+        formatted.append(page)
+        return page.slug
+
+    monkeypatch.setattr(ContentPage, '__repr__', fmt)
+    monkeypatch.setattr(ContentPage, '__str__', fmt)
+    logger = logging.getLogger('flask_flatearth')
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        mdg = markdown.MarkdownGenerator(app, search_path=search)
+        TopicExtension(generator=mdg)
+        mdg.load_pages()
+        mdg._generate_pages()
+        assert formatted == []
+        logger.setLevel(logging.DEBUG)
+        mdg.extensions['topic_extension'].reset()
+        mdg._generate_pages()
+        assert formatted
+    finally:
+        logger.setLevel(level)
+
+
+def test_markdowngenerator_markdown_extensions(app, tmp_path):
+    source = tmp_path / 'table.md'
+    source.write_text('type: page\nslug: table\n\n| a | b |\n|---|---|\n'
+                      '| 1 | 2 |\n')
+    app.config.update(
+        FLATEARTH_MARKDOWN_EXTENSIONS=['markdown.extensions.tables',
+                                       'urlfor'])
+    mdg = markdown.MarkdownGenerator(app, search_path=str(tmp_path))
+    assert mdg.markdown_extensions[0] == markdown.META_EXTENSION
+    mdg.load_pages()
+    assert '<table>' in mdg.pages['table'].html
+    plain = markdown.convert_page(str(source))
+    assert '<table>' not in plain[0]
+    assert plain[1] == {'type': ['page'], 'slug': ['table']}
+
+
+def test_markdowngenerator_converter_reuse():
+    md = markdown.converter()
+    assert markdown.converter() is md
+    assert markdown.converter(['markdown.extensions.meta']) is not md
+    first = markdown.converter().convert('title: One\n\nText')
+    md = markdown.converter()
+    assert md.convert('Text') == first
+    assert md.Meta == {}
+    markdown.converter().convert('title: Two\n\nText')
+    md = markdown.converter()
+    assert md.convert('') == ''
+    assert md.Meta == {}
+
+
+def test_markdowngenerator_scan_meta(app, tmp_path):
+    edge = tmp_path / 'edge.md'
+    edge.write_bytes(b'---\r\nTitle: Edge\r\nauthor: one\r\n\tmore\r\n'
+                     b'  slug:  edge  \r\n---\r\nnot: meta\r\n')
+    plain = tmp_path / 'plain.md'
+    plain.write_text('# No metadata\n\ntype: none\n')
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    for page in mdg.page_files + [str(edge), str(plain)]:
+        with open(page, 'rb') as f:
+            md = markdown.converter()
+            md.convert(f.read().decode('utf-8'))
+        assert markdown.scan_meta(page) == md.Meta
+    assert markdown.scan_meta(str(edge))['author'] == ['one', 'more']
+
+
+def test_markdowngenerator_scan_metadata(app, tmp_path):
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    metadata = mdg.scan_metadata()
+    mdg.load_pages()
+    for page in mdg.pages.values():
+        assert metadata[page.file_name] == page.meta
+    (tmp_path / 'a.md').write_text('type: page\nslug: same\n')
+    (tmp_path / 'b.md').write_text('type: page\nslug: same\n')
+    duplicate = markdown.MarkdownGenerator(app, search_path=str(tmp_path))
+    pytest.raises(KeyError, duplicate.scan_metadata)
+
+
+def test_markdowngenerator_generate_deferred(site, tmp_path):
+    mdg, pages, client = site
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost',
+                      FLATEARTH_DEFER=True,
+                      FLATEARTH_LAZY=True)
+    deferred = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=deferred)
+    deferred.generate()
+    assert deferred.metrics.phases['convert']['count'] == 0
+    assert deferred.pages['example'].html is None
+    assert deferred.generated_pages['examples'].html is None
+    deferred_client = app.test_client()
+    for url in ['/articles/example/', '/authors/jcastillo2nd/', '/',
+                '/topics/examples/', '/topics/']:
+        assert deferred_client.get(url).data == client.get(url).data
+    assert deferred.metrics.phases['convert']['count'] == 3
+    assert deferred.pages['example'].html == mdg.pages['example'].html
+    assert deferred.generated_pages['examples'].html == \
+        mdg.generated_pages['examples'].html
+    article = pages / 'example.md'
+    article.write_text(article.read_text() + '\nAppended paragraph\n')
+    assert 'example' in deferred.regenerate([str(article)])
+    assert b'Appended paragraph' in \
+        deferred_client.get('/articles/example/').data
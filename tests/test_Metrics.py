@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+from flask_flatearth.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.record('read', 0.5, source='a.md')
+    metrics.record('convert', 1.0, source='a.md')
+    metrics.record_source('a.md', 100)
+    metrics.record('register_view', 0.25, page='a')
+    metrics.record_page('a', source='a.md', size=2000)
+    metrics.record('register_view', 0.5, page='b')
+    return metrics
+
+
+def test_metrics_record(metrics):
+    assert metrics.phases['read'] == {'seconds': 0.5, 'count': 1}
+    assert metrics.phases['register_view'] == {'seconds': 0.75, 'count': 2}
+    assert metrics.sources['a.md'] == {'read': 0.5, 'convert': 1.0,
+                                       'bytes': 100}
+
+
+def test_metrics_timer(metrics):
+    with metrics.timer('meta', source='a.md'):
+        pass
+    assert metrics.phases['meta']['count'] == 1
+    assert 'meta' in metrics.sources['a.md']
+    with pytest.raises(ValueError):
+        with metrics.timer('meta'):
+            raise ValueError()
+    assert metrics.phases['meta']['count'] == 2
+
+
+def test_metrics_templates(metrics):
+    metrics.record('compile_templates', 0.25, template='base.html')
+    metrics.record('compile_templates', 0.25, template='base.html')
+    assert metrics.templates == {'base.html': 0.5}
+    assert metrics.as_dict()['templates'] == {'base.html': 0.5}
+    assert 'flatearth_template_seconds{template="base.html"} 0.500000' \
+        in metrics.prometheus()
+    assert metrics.slowest()[0]['seconds'] == 1.75
+
+
+def test_metrics_slowest(metrics):
+    report = metrics.slowest(1)
+    assert len(report) == 1
+    assert report[0]['slug'] == 'a'
+    assert report[0]['seconds'] == 1.75
+    assert report[0]['bytes'] == 2000
+    assert report[0]['source_bytes'] == 100
+    assert [r['slug'] for r in metrics.slowest()] == ['a', 'b']
+
+
+def test_metrics_reports(metrics):
+    data = json.loads(metrics.to_json())
+    assert data == json.loads(json.dumps(metrics.as_dict()))
+    assert data['slowest'][0]['slug'] == 'a'
+    text = metrics.prometheus()
+    assert 'flatearth_phase_seconds_total{phase="convert"} 1.000000' in text
+    assert 'flatearth_page_bytes{slug="a"} 2000' in text
+    assert 'flatearth_pages 2' in text
+    metrics.reset()
+    assert metrics.pages == {}
+    assert metrics.phases['read']['count'] == 0
+
+
+def test_metrics_reports_while_recording(metrics):
+    stop = threading.Event()
+
+    def record():
+        n = 0
+        while not stop.is_set():
+            n = (n + 1) % 2000
+            if not n:
+                metrics.reset()
+            metrics.record('register_view', 0.1, page='p{}'.format(n))
+            metrics.record('phase{}'.format(n % 50), 0.1,
+                           template='t{}'.format(n))
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    try:
+        for _ in range(50):
+            metrics.prometheus()
+            metrics.slowest()
+            metrics.as_dict()
+    finally:
+        stop.set()
+        thread.join()
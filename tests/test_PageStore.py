@@ -0,0 +1,151 @@
+import datetime
+import gzip
+import os
+
+import pytest
+
+import flask
+from flask_flatearth.response import PreparedPage
+from flask_flatearth.store import PageStore, LRUPageStore
+from flask_flatearth.store import CompressedPageStore, store_from_config
+from flask_flatearth.store import MappedPageStore, write_store
+
+
+@pytest.fixture
+def store():
+    return PageStore()
+
+
+@pytest.fixture
+def lru_store():
+    return LRUPageStore(max_pages=2)
+
+
+def test_pagestore_get_put(store):
+    assert store.get('page') is None
+    store.put('page', 'content')
+    assert store.get('page') == 'content'
+    store.discard('page')
+    store.discard('page')
+    assert store.get('page') is None
+    assert store.stats() == {'pages': 0, 'hits': 1, 'misses': 2}
+
+
+def test_lrupagestore_evicts(lru_store):
+    lru_store.put('a', 'A')
+    lru_store.put('b', 'B')
+    assert lru_store.get('a') == 'A'
+    lru_store.put('c', 'C')
+    assert lru_store.get('b') is None
+    assert lru_store.get('a') == 'A'
+    assert lru_store.get('c') == 'C'
+    assert len(lru_store) == 2
+    assert lru_store.stats()['evictions'] == 1
+
+
+@pytest.fixture
+def compressed_store(tmp_path):
+    return CompressedPageStore(max_bytes=60, spill_path=str(tmp_path))
+
+
+def test_compressedpagestore_compresses():
+    store = CompressedPageStore(codec='gzip')
+    content = 'content ' * 1000
+    store.put('page', PreparedPage.prepare(content))
+    page = store.get('page')
+    assert page.content == content
+    assert gzip.decompress(page.encoded['gzip']) == content.encode()
+    assert store.stats()['bytes'] < len(content)
+
+
+def test_compressedpagestore_evicts_and_spills(compressed_store):
+    for slug in 'abcd':
+        compressed_store.put(slug, PreparedPage.prepare(slug * 1000))
+    assert compressed_store.bytes <= compressed_store.max_bytes
+    assert compressed_store.evictions > 0
+    page = compressed_store.get('a')
+    assert page.content == 'a' * 1000
+    assert page.etag == PreparedPage.prepare('a' * 1000).etag
+    stats = compressed_store.stats()
+    assert stats['spill_hits'] == 1
+    assert stats['hit_rate'] == 1.0
+    compressed_store.discard('b')
+    assert compressed_store.get('b') is None
+
+
+def test_compressedpagestore_serves_encodings(tmp_path):
+    app = flask.Flask(__name__)
+    store = CompressedPageStore(max_bytes=1, spill_path=str(tmp_path))
+    content = '<p>content</p>' * 100
+    for slug in 'ab':
+        store.put(slug, PreparedPage.prepare(content, encodings=['gzip']))
+    assert store.evictions == 1
+    for slug in 'ab':
+        page = store.get(slug)
+        assert list(page.encoded) == ['gzip']
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = page.response()
+        assert response.content_encoding == 'gzip'
+        assert gzip.decompress(response.get_data()) == content.encode()
+        with app.test_request_context():
+            assert page.response().get_data() == content.encode()
+    assert store.stats()['spill_hits'] >= 1
+
+
+def test_compressedpagestore_codec():
+    pytest.raises(RuntimeError, CompressedPageStore, codec='unknown')
+
+
+def test_mappedpagestore(tmp_path):
+    path = str(tmp_path / 'pages.store')
+    modified = datetime.datetime(2018, 3, 16, tzinfo=datetime.timezone.utc)
+    a = PreparedPage.prepare('a' * 1000, last_modified=modified,
+                             encodings=['gzip'])
+    b = PreparedPage.prepare('b')
+    assert write_store(path, [('a', a), ('b', b)]) == 2
+    store = MappedPageStore(path)
+    assert len(store) == 2
+    page = store.get('a')
+    assert isinstance(page.body, memoryview)
+    assert page.content == 'a' * 1000
+    assert page.etag == a.etag
+    assert page.last_modified == modified
+    assert bytes(page.encoded['gzip']) == a.encoded['gzip']
+    assert store.get('b').last_modified is None
+    assert store.get('c') is None
+    store.put('b', PreparedPage.prepare('B'))
+    assert store.get('b').content == 'B'
+    store.discard('a')
+    store.discard('b')
+    assert store.get('a') is None and store.get('b') is None
+    assert store.stats()['mapped'] == 2
+
+
+def test_mappedpagestore_files(tmp_path, caplog):
+    store = MappedPageStore(str(tmp_path / 'missing.store'))
+    assert len(store) == 0 and store.get('a') is None
+    assert 'not found' in caplog.text
+    (tmp_path / 'other.store').write_bytes(b'x' * 64)
+    pytest.raises(RuntimeError, MappedPageStore,
+                  str(tmp_path / 'other.store'))
+    (tmp_path / 'short.store').write_bytes(b'x' * 4)
+    pytest.raises(RuntimeError, MappedPageStore,
+                  str(tmp_path / 'short.store'))
+    path = str(tmp_path / 'truncated.store')
+    write_store(path, [('a', PreparedPage.prepare('<p>a</p>'))])
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+    pytest.raises(RuntimeError, MappedPageStore, path)
+
+
+def test_store_from_config(tmp_path):
+    assert store_from_config({}) is None
+    assert isinstance(store_from_config(
+        {'FLATEARTH_STORE_MAP': str(tmp_path / 'pages.store')}),
+        MappedPageStore)
+    assert isinstance(store_from_config({'FLATEARTH_STORE_MAX_PAGES': 5}),
+                      LRUPageStore)
+    store = store_from_config({'FLATEARTH_STORE_MAX_BYTES': 100,
+                               'FLATEARTH_STORE_SPILL_DIR': str(tmp_path)})
+    assert isinstance(store, CompressedPageStore)
+    assert store.max_bytes == 100
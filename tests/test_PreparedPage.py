@@ -0,0 +1,68 @@
+import datetime
+import gzip
+
+import pytest
+
+import flask
+from flask_flatearth.response import PreparedPage
+from flask_flatearth.util import last_modified
+
+app = flask.Flask(__name__)
+modified = datetime.datetime(2018, 5, 27, 6, 34,
+                             tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def page():
+    return PreparedPage.prepare('<p>content</p>',
+                                last_modified=modified,
+                                encodings=['gzip'])
+
+
+def respond(page, **headers):
+    with app.test_request_context(headers=headers):
+        return page.response()
+
+
+def test_preparedpage_response(page):
+    response = respond(page)
+    assert response.status_code == 200
+    assert response.get_data() == b'<p>content</p>'
+    assert response.headers['ETag'] == '"{}"'.format(page.etag)
+    assert response.last_modified == modified
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_preparedpage_response_gzip(page):
+    response = respond(page, **{'Accept-Encoding': 'gzip, deflate'})
+    assert response.content_encoding == 'gzip'
+    assert gzip.decompress(response.get_data()) == b'<p>content</p>'
+    assert response.headers['ETag'] == '"{}-gzip"'.format(page.etag)
+
+
+def test_preparedpage_response_not_modified(page):
+    etag = '"{}"'.format(page.etag)
+    assert respond(page, **{'If-None-Match': etag}).status_code == 304
+    since = 'Sun, 27 May 2018 06:34:00 GMT'
+    assert respond(page, **{'If-Modified-Since': since}).status_code == 304
+    assert respond(page, **{'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_preparedpage_compact(page):
+    compact = page.compact('zlib')
+    assert list(compact.encoded) == ['zlib']
+    assert compact.etag == page.etag
+    assert compact.content == page.content
+    kept = page.compact('zlib', keep=['br', 'gzip'])
+    assert kept.encoded == {'gzip': page.encoded['gzip']}
+    assert kept.content == page.content
+
+
+def test_last_modified():
+    meta = {'publish': '2018-05-27 06:34:00 UTC',
+            'updates': ['Fri, May 25 2018 07:13:00 GMT+1000: typo',
+                        'Sat, 02 Jun 2018 01:00:00 +0000: rewrite']}
+    assert last_modified(meta) == datetime.datetime(
+        2018, 6, 2, 1, tzinfo=datetime.timezone.utc)
+    assert last_modified({'publish': 'not a date'}) is None
+    assert last_modified(None) is None
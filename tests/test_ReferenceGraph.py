@@ -0,0 +1,30 @@
+import pytest
+
+from flask_flatearth.graph import ReferenceGraph
+
+
+@pytest.fixture
+def graph():
+    graph = ReferenceGraph()
+    graph.add('article-1', 'alice', 'author')
+    graph.add('article-2', 'alice', 'author')
+    graph.add('article-2', 'bob', 'author')
+    graph.add('article-2', 'alice', 'author')
+    graph.add('article-1', 'flask', 'topic')
+    return graph
+
+
+def test_referencegraph_lookups(graph):
+    assert len(graph) == 4
+    assert graph.sources('alice', 'author') == ['article-1', 'article-2']
+    assert graph.targets('article-2', 'author') == ['alice', 'bob']
+    assert graph.targets('article-2', 'topic') == []
+    assert graph.sources('flask', 'author') == []
+    assert graph.referenced('author') == ['alice', 'bob']
+    assert graph.referenced('set') == []
+
+
+def test_referencegraph_clear(graph):
+    graph.clear()
+    assert len(graph) == 0
+    assert graph.sources('alice', 'author') == []
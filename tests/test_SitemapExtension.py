@@ -0,0 +1,126 @@
+import datetime
+import gzip
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH
+from flask_flatearth.ext.sitemap import SitemapExtension, write_sitemaps
+from flask_flatearth.ext.topics import TopicExtension
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+templates = os.path.join(BASEPATH, 'examples', 'template')
+
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def site(pages, **kwargs):
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost')
+    mdg = markdown.MarkdownGenerator(app, search_path=str(pages))
+    TopicExtension(generator=mdg)
+    ext = SitemapExtension(generator=mdg, **kwargs)
+    mdg.generate()
+    return mdg, ext, app.test_client()
+
+
+def locs(data):
+    root = ET.fromstring(data)
+    return root.tag, [(e.find(NS + 'loc').text,
+                       getattr(e.find(NS + 'lastmod'), 'text', None))
+                      for e in root]
+
+
+def test_sitemapextension_sitemap(tmp_path):
+    pages = tmp_path / 'pages'
+    shutil.copytree(search, str(pages))
+    mdg, ext, client = site(pages)
+    rv = client.get('/sitemap.xml', headers={'Accept-Encoding': 'gzip'})
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/xml'
+    assert rv.content_encoding == 'gzip'
+    tag, entries = locs(gzip.decompress(rv.data))
+    assert tag == NS + 'urlset'
+    urls = dict(entries)
+    assert len(urls) == len(mdg.generated_pages)
+    assert 'http://localhost/topics/how-to/' in urls
+    with mdg.app.test_request_context():
+        url = flask.url_for('understanding-topic1', _external=True)
+    served = client.get(url).last_modified
+    assert datetime.datetime.fromisoformat(urls[url]) == served
+    assert urls['http://localhost/articles/example/'] is None
+    assert urls['http://localhost/topics/how-to/'] is None
+    plain = client.get('/sitemap.xml')
+    assert plain.content_encoding is None
+    assert locs(plain.data)[1] == entries
+    assert client.get('/sitemap.xml', headers={
+        'Accept-Encoding': 'gzip',
+        'If-None-Match': rv.headers['ETag']}).status_code == 304
+    assert client.get('/sitemap-1.xml').status_code == 404
+
+    (pages / 'new.md').write_text('type: page\nslug: new\n\nNew')
+    mdg.regenerate()
+    assert 'http://localhost/new/' in dict(
+        locs(client.get('/sitemap.xml').data)[1])
+
+
+def test_sitemapextension_shards(tmp_path):
+    mdg, ext, client = site(search, shard_size=5,
+                            base_url='https://example.com/site/')
+    count = len(mdg.generated_pages)
+    tag, index = locs(client.get('/sitemap.xml').data)
+    assert tag == NS + 'sitemapindex'
+    assert len(index) == len(ext.shards) == -(-count // 5)
+    listed = []
+    for n, (loc, lastmod) in enumerate(index, 1):
+        assert loc == 'https://example.com/site/sitemap-{}.xml'.format(n)
+        tag, entries = locs(client.get('/sitemap-{}.xml'.format(n)).data)
+        assert tag == NS + 'urlset' and len(entries) <= 5
+        assert lastmod == max((e[1] for e in entries if e[1]), default=None)
+        listed += entries
+    assert len(listed) == count
+    assert all(loc.startswith('https://example.com/site/')
+               for loc, lastmod in listed)
+    assert client.get('/sitemap-0.xml').status_code == 404
+
+
+def test_sitemapextension_base_url_required():
+    app = flask.Flask(__name__, template_folder=templates)
+    mdg = markdown.MarkdownGenerator(app, search_path=search)
+    SitemapExtension(generator=mdg)
+    with pytest.raises(RuntimeError):
+        mdg.generate()
+
+
+def test_write_sitemaps_limits():
+    entries = [('http://localhost/p{}/?a=1&b=2'.format(n), None)
+               for n in range(10)]
+    files = write_sitemaps(entries, count=4)
+    assert [len(locs(f.body)[1]) for f in files] == [4, 4, 2]
+    assert b'&amp;b=2' in files[0].body
+    files = write_sitemaps(entries, size=400)
+    assert all(len(f.body) <= 400 for f in files)
+    assert sum(len(locs(f.body)[1]) for f in files) == 10
+    assert len(locs(write_sitemaps([])[0].body)[1]) == 0
+
+
+@pytest.mark.parametrize('defer', [False, True])
+def test_sitemapextension_load_snapshot(tmp_path, defer):
+    mdg, ext, client = site(search)
+    path = str(tmp_path / 'site.snapshot')
+    mdg.snapshot(path)
+    app = flask.Flask(__name__, template_folder=templates)
+    app.config.update(SERVER_NAME='localhost', FLATEARTH_DEFER=defer)
+    loaded = markdown.MarkdownGenerator(app, search_path=search)
+    TopicExtension(generator=loaded)
+    SitemapExtension(generator=loaded)
+    loaded.load_snapshot(path)
+    assert bool(loaded.generated_pages) is not defer
+    rv = app.test_client().get('/sitemap.xml')
+    assert rv.status_code == 200
+    assert rv.data == client.get('/sitemap.xml').data
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from flask_flatearth.discovery import SourceDiscovery, changed_sources
+from flask_flatearth.discovery import suffixes
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ['a.md', 'b.MD', 'c.txt', 'md', 'x.d', '.hidden.md',
+                 'sub/d.md', 'sub/deeper/e.md', '.git/f.md',
+                 'drafts/g.md', 'sub/_drafts/h.md']:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    return tmp_path
+
+
+def test_suffixes():
+    assert suffixes('.md') == ('.md', )
+    assert suffixes(['md', '.MD', '.markdown']) == ('.md', '.markdown')
+
+
+def test_sourcediscovery_matches(tree):
+    discovery = SourceDiscovery(str(tree))
+    assert discovery.matches('a.md')
+    assert discovery.matches('b.MD')
+    assert not discovery.matches('x.d')
+    assert not discovery.matches('md')
+    assert not discovery.matches('.hidden.md')
+
+
+def test_sourcediscovery_scan(tree):
+    discovery = SourceDiscovery(str(tree))
+    manifest = discovery.scan()
+    found = [os.path.relpath(p, str(tree)) for p in manifest]
+    assert sorted(found[:2]) == ['a.md', 'b.MD']
+    assert found[2:] == ['sub/d.md', 'sub/deeper/e.md']
+    assert discovery.manifest is manifest
+    st = os.stat(str(tree / 'a.md'))
+    assert manifest[str(tree / 'a.md')] == (st.st_mtime_ns, st.st_size)
+
+
+def test_sourcediscovery_scan_ignore(tree):
+    discovery = SourceDiscovery(str(tree), file_ext=['md'], ignore=[])
+    found = set(os.path.relpath(p, str(tree)) for p in discovery.scan())
+    assert {'.hidden.md', '.git/f.md', 'drafts/g.md'} <= found
+    discovery = SourceDiscovery(str(tree), ignore=['sub'])
+    found = set(os.path.relpath(p, str(tree)) for p in discovery.scan())
+    assert found == {'a.md', 'b.MD', '.hidden.md', '.git/f.md',
+                     'drafts/g.md'}
+
+
+def test_sourcediscovery_includes(tree):
+    discovery = SourceDiscovery(str(tree))
+    assert discovery.includes(str(tree / 'sub' / 'd.md'))
+    assert not discovery.includes(str(tree / 'drafts' / 'g.md'))
+    assert not discovery.includes(str(tree / 'c.txt'))
+    outside = SourceDiscovery(str(tree / 'sub'))
+    assert outside.includes(str(tree / 'sub' / 'deeper' / 'e.md'))
+    assert not outside.includes(str(tree / 'a.md'))
+    assert not outside.includes(os.path.join(str(tree), 'sub', os.pardir,
+                                             'a.md'))
+
+
+def test_changed_sources(tree):
+    discovery = SourceDiscovery(str(tree))
+    previous = discovery.scan()
+    (tree / 'a.md').write_text('changed content')
+    (tree / 'sub' / 'd.md').unlink()
+    (tree / 'new.md').write_text('new')
+    (tree / 'drafts' / 'new.md').write_text('draft')
+    assert changed_sources(previous, discovery.scan()) == (
+        [str(tree / 'a.md'), str(tree / 'new.md')],
+        [str(tree / 'sub' / 'd.md')])
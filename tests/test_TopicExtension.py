@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import flask
+from flask_flatearth import BASEPATH
+from flask_flatearth.ext.topics import TopicExtension, TopicMetaProcessor
+
+markdown = pytest.importorskip('flask_flatearth.generators.markdown')
+
+search = os.path.join(BASEPATH, 'examples', 'pages')
+
+
+@pytest.fixture
+def ext():
+    mdg = markdown.MarkdownGenerator(flask.Flask(__name__),
+                                     search_path=search)
+    ext = TopicExtension(generator=mdg)
+    mdg.load_pages()
+    return ext
+
+
+def test_topicextension_topic_refs(ext):
+    graph = ext.g.graph
+    assert sorted(graph.sources('tutorial', 'topic')) == [
+        'understanding-topic1', 'understanding-topic2']
+    assert graph.sources('how-to', 'topic') == ['troubleshooting-topic2']
+    assert 'how-to' in graph.targets('troubleshooting-topic2', 'topic')
+    pages = ext()
+    assert [p.slug for p in pages['how-to'].refs] == ['troubleshooting-topic2']
+    for topic in ext.topics:
+        scan = [p for p in ext.g.pages.values() if topic in
+                [t.lower().replace(" ", "-") for t in
+                 p.meta.get('topics', [])]]
+        assert list(pages[topic].refs) == scan
+
+
+def test_topicmetaprocessor_case_duplicates(ext, caplog):
+    mp = TopicMetaProcessor(ext.g, ext=ext)
+    assert mp._process(['Flask, flask', 'other']) == {'Flask', 'flask',
+                                                      'other'}
+    assert 'Possible duplicate topic case' in caplog.text